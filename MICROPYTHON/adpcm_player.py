@@ -0,0 +1,307 @@
+# adpcm_player.py - پخش WAV فشرده IMA-ADPCM (ساخته‌شده با adpcm.py روی PC)
+# از SD فقط یک‌چهارم داده PCM خوانده می‌شود:
+#   44.1kHz استریو: ~43 KB/s به جای 172 KB/s
+# دیکود بلوک به بلوک با viper انجام می‌شود و مستقیم به I2S می‌رود
+
+from machine import I2S, Pin
+import array
+import gc
+import micropython
+import os
+import time
+
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IMA_ADPCM = 0x11
+
+BLOCKS_PER_READ = 4  # هر بار چند بلوک از SD خوانده شود
+
+_STEPS = array.array('H', (
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31,
+    34, 37, 41, 45, 50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143,
+    157, 173, 190, 209, 230, 253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658,
+    724, 796, 876, 963, 1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024,
+    3327, 3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442, 11487, 12635, 13899,
+    15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794, 32767,
+))
+
+
+# ================ خواندن هدر WAV ==================
+def read_wav_header(f):
+    """
+    پیمایش chunk ها (هدر ADPCM بیشتر از 44 بایت است)
+    خروجی: دیکشنری فرمت + data_offset و data_size
+    فایل بعد از این تابع روی شروع داده است
+    """
+    riff = f.read(12)
+    if riff[0:4] != b'RIFF' or riff[8:12] != b'WAVE':
+        raise ValueError("Not a WAV file")
+
+    info = {}
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            raise ValueError("No data chunk")
+        cid = head[0:4]
+        size = int.from_bytes(head[4:8], 'little')
+
+        if cid == b'fmt ':
+            fmt = f.read(size)
+            info['format'] = int.from_bytes(fmt[0:2], 'little')
+            info['channels'] = int.from_bytes(fmt[2:4], 'little')
+            info['sample_rate'] = int.from_bytes(fmt[4:8], 'little')
+            info['block_align'] = int.from_bytes(fmt[12:14], 'little')
+            info['bit_depth'] = int.from_bytes(fmt[14:16], 'little')
+            if info['format'] == WAVE_FORMAT_IMA_ADPCM:
+                info['samples_per_block'] = int.from_bytes(fmt[18:20], 'little')
+        elif cid == b'fact':
+            info['frames'] = int.from_bytes(f.read(4), 'little')
+            f.seek(size - 4, 1)
+        elif cid == b'data':
+            info['data_offset'] = f.tell()
+            info['data_size'] = size
+            return info
+        else:
+            f.seek(size + (size & 1), 1)
+
+
+# ================ دیکودر ==================
+@micropython.viper
+def _decode_block(src: ptr8, dst: ptr16, block_bytes: int, channels: int, steps: ptr16) -> int:
+    """یک بلوک ADPCM -> PCM شانزده‌بیتی interleaved؛ خروجی: تعداد فریم"""
+    frames = 0
+    ch = 0
+    stride = channels * 4
+    while ch < channels:
+        h = ch * 4
+        pred = src[h] | (src[h + 1] << 8)
+        if pred > 32767:
+            pred -= 65536
+        index = src[h + 2]
+        if index > 88:
+            index = 88
+
+        dst[ch] = pred & 0xFFFF
+        out = channels + ch
+        pos = stride + h
+        frames = 1
+
+        while pos < block_bytes:
+            k = 0
+            while k < 8:
+                code = (src[pos + (k >> 1)] >> ((k & 1) << 2)) & 0x0F
+                step = steps[index]
+                diff = step >> 3
+                if code & 4:
+                    diff += step
+                if code & 2:
+                    diff += step >> 1
+                if code & 1:
+                    diff += step >> 2
+                if code & 8:
+                    pred -= diff
+                    if pred < -32768:
+                        pred = -32768
+                else:
+                    pred += diff
+                    if pred > 32767:
+                        pred = 32767
+
+                c = code & 7
+                if c < 4:
+                    index -= 1
+                    if index < 0:
+                        index = 0
+                else:
+                    index += (c - 3) << 1
+                    if index > 88:
+                        index = 88
+
+                dst[out] = pred & 0xFFFF
+                out += channels
+                frames += 1
+                k += 1
+            pos += stride
+
+        ch += 1
+    return frames
+
+
+# ================ پخش ==================
+def play_adpcm(path, sck=26, ws=25, sd=22, ibuf=20480):
+    """پخش WAV (ADPCM یا PCM معمولی) با تنظیم خودکار I2S از روی هدر"""
+
+    print(f"\n{'='*50}")
+    print(f"🎵 Playing: {path}")
+    print(f"{'='*50}")
+
+    gc.collect()
+
+    try:
+        f = open(path, "rb")
+        info = read_wav_header(f)
+    except Exception as e:
+        print(f"✗ Cannot read file: {e}")
+        return False
+
+    channels = info['channels']
+    rate = info['sample_rate']
+    adpcm = info['format'] == WAVE_FORMAT_IMA_ADPCM
+
+    print(f"📊 {rate}Hz, {channels}ch, {'IMA-ADPCM' if adpcm else 'PCM'}")
+
+    audio_out = I2S(
+        0,
+        sck=Pin(sck),
+        ws=Pin(ws),
+        sd=Pin(sd),
+        mode=I2S.TX,
+        bits=16,
+        format=I2S.MONO if channels == 1 else I2S.STEREO,
+        rate=rate,
+        ibuf=ibuf
+    )
+
+    block_align = info['block_align']
+    remaining = info['data_size']
+    start = time.ticks_ms()
+
+    try:
+        if not adpcm:
+            # PCM معمولی: بدون دیکود
+            buf = bytearray(4096)
+            while remaining > 0:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                n = min(n, remaining)
+                audio_out.write(memoryview(buf)[:n])
+                remaining -= n
+        else:
+            spb = info['samples_per_block']
+            raw = bytearray(block_align * BLOCKS_PER_READ)
+            pcm = bytearray(spb * channels * 2)
+            raw_mv = memoryview(raw)
+            pcm_mv = memoryview(pcm)
+            # برش‌ها یک بار ساخته می‌شوند تا در حلقه حافظه اختصاص داده نشود
+            blocks = [raw_mv[i * block_align:] for i in range(BLOCKS_PER_READ)]
+            frames_left = info.get('frames', 0x7FFFFFFF)
+
+            while remaining > 0 and frames_left > 0:
+                n = f.readinto(raw)
+                if not n:
+                    break
+                n = min(n, remaining)
+                remaining -= n
+
+                i = 0
+                while (i + 1) * block_align <= n and frames_left > 0:
+                    frames = _decode_block(blocks[i], pcm, block_align, channels, _STEPS)
+                    frames_left -= frames
+                    if frames_left >= 0:
+                        audio_out.write(pcm)
+                    else:
+                        # بلوک آخر با سکوت پر شده؛ فقط فریم‌های واقعی پخش شوند
+                        audio_out.write(pcm_mv[:(frames + frames_left) * channels * 2])
+                    i += 1
+
+        elapsed = time.ticks_diff(time.ticks_ms(), start) / 1000
+        print(f"\n✓ Finished in {elapsed:.1f}s")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import sys
+        sys.print_exception(e)
+        return False
+
+    finally:
+        f.close()
+        audio_out.deinit()
+
+
+# ================ بنچمارک دیکود ==================
+def benchmark_decode(path, blocks=50):
+    """
+    هزینه CPU دیکود ADPCM به ازای هر ثانیه صدا
+    اگر "CPU load" نزدیک 100% باشد، I2S خالی می‌ماند و صدا می‌لرزد
+    """
+
+    print("\n" + "="*50)
+    print("🔬 ADPCM decode benchmark")
+    print("="*50)
+
+    with open(path, "rb") as f:
+        info = read_wav_header(f)
+        if info['format'] != WAVE_FORMAT_IMA_ADPCM:
+            print("✗ Not an IMA-ADPCM file")
+            return None
+
+        channels = info['channels']
+        rate = info['sample_rate']
+        block_align = info['block_align']
+        raw = bytearray(block_align)
+        pcm = bytearray(info['samples_per_block'] * channels * 2)
+
+        decoded = 0
+        read_us = 0
+        decode_us = 0
+        for _ in range(blocks):
+            t1 = time.ticks_us()
+            if f.readinto(raw) < block_align:
+                break
+            t2 = time.ticks_us()
+            decoded += _decode_block(raw, pcm, block_align, channels, _STEPS)
+            t3 = time.ticks_us()
+            read_us += time.ticks_diff(t2, t1)
+            decode_us += time.ticks_diff(t3, t2)
+
+    if not decoded:
+        print("✗ Nothing decoded")
+        return None
+
+    audio_s = decoded / rate
+    decode_ms = decode_us / 1000 / audio_s
+    read_ms = read_us / 1000 / audio_s
+
+    print(f"  {rate}Hz, {channels}ch, {decoded} frames ({audio_s:.2f}s audio)")
+    print(f"  Decode: {decode_ms:.1f} ms per second of audio")
+    print(f"  SD read: {read_ms:.1f} ms per second of audio")
+    print(f"  CPU load: {(decode_ms + read_ms) / 10:.1f}% of realtime")
+
+    if decode_ms + read_ms > 800:
+        print("  ⚠️  Too close to realtime! Use mono or a lower rate")
+    else:
+        print("  ✓ Enough headroom for I2S")
+
+    return decode_ms
+
+
+# ================ تابع اصلی ==================
+def main():
+    import sdcard
+    from machine import SPI
+
+    spi = SPI(1,
+              baudrate=20000000,
+              polarity=0,
+              phase=0,
+              sck=Pin(18),
+              mosi=Pin(23),
+              miso=Pin(19))
+
+    sd = sdcard.SDCard(spi, Pin(5))
+    try:
+        os.umount("/sd")
+    except:
+        pass
+    os.mount(sd, "/sd")
+
+    file_path = "/sd/LastNight_44100_2_adpcm.wav"
+
+    benchmark_decode(file_path)
+    play_adpcm(file_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -120,6 +120,7 @@ import os
 import time
 import gc
 import machine
+import library
 
 # ------------------------------------------
 #  اتصال به وایفای
@@ -335,6 +336,146 @@ def delete_file(path):
 
 
 
+# ------------------------------------------
+#  همگام‌سازی کتابخانه با manifest سرور
+# ------------------------------------------
+SYNC_STATE = ".sync"  # فایل وضعیت: هر خط sha256<TAB>size<TAB>name
+
+
+def url_quote(name):
+    """کد کردن نام فایل برای URL (MicroPython ماژول urllib ندارد)"""
+    out = ""
+    for b in name.encode():
+        c = chr(b)
+        if b < 128 and (c.isalpha() or c.isdigit() or c in "-_.~"):
+            out += c
+        else:
+            out += "%%%02X" % b
+    return out
+
+
+def load_sync_state(folder):
+    """وضعیت آخرین همگام‌سازی: name -> (sha256, size)"""
+    state = {}
+    try:
+        with open(f"{folder}/{SYNC_STATE}") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t", 2)
+                if len(parts) == 3:
+                    state[parts[2]] = (parts[0], int(parts[1]))
+    except OSError:
+        pass
+    return state
+
+
+def save_sync_state(folder, state):
+    """ذخیره وضعیت (اول فایل موقت تا قطع برق وضعیت را خراب نکند)"""
+    path = f"{folder}/{SYNC_STATE}"
+    with open(path + ".tmp", "w") as f:
+        for name, (digest, size) in state.items():
+            f.write(f"{digest}\t{size}\t{name}\n")
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    os.rename(path + ".tmp", path)
+
+
+def fetch_manifest(base_url):
+    """
+    دریافت manifest خط به خط (flask_server.py -> /manifest)
+    خروجی: لیست (name, size, sha256)
+    """
+    r = urequests.get(f"{base_url}/manifest", stream=True)
+    if r.status_code != 200:
+        r.close()
+        raise OSError(f"HTTP {r.status_code}")
+
+    entries = []
+    try:
+        while True:
+            line = r.raw.readline()
+            if not line:
+                break
+            parts = line.decode().rstrip("\n").split("\t", 3)
+            if len(parts) == 4:
+                entries.append((parts[3], int(parts[1]), parts[0]))
+    finally:
+        r.close()
+    return entries
+
+
+def local_size(path):
+    try:
+        return os.stat(path)[6]
+    except OSError:
+        return -1
+
+
+def sync_library(base_url, folder="sd", delete=True):
+    """
+    همگام‌سازی تدریجی پوشه با سرور:
+    فقط فایل‌های جدید یا تغییرکرده دانلود می‌شوند و فایل‌های حذف‌شده از سرور پاک می‌شوند
+    مقایسه با هش ذخیره‌شده در .sync است، پس فایل‌ها روی ESP32 دوباره هش نمی‌شوند
+    فقط فایل‌هایی که قبلاً با همین تابع آمده‌اند حذف می‌شوند
+    """
+    print(f"\n🔄 Syncing {folder} with {base_url}")
+    gc.collect()
+
+    try:
+        manifest = fetch_manifest(base_url)
+    except Exception as e:
+        print(f"❌ Can't get manifest: {e}")
+        return False
+
+    state = load_sync_state(folder)
+    wanted = set()
+    todo = []
+    for name, size, digest in manifest:
+        wanted.add(name)
+        if state.get(name) == (digest, size) and local_size(f"{folder}/{name}") == size:
+            continue
+        todo.append((name, size, digest))
+
+    stale = [name for name in state if name not in wanted]
+    total = sum(size for _, size, _ in todo)
+    print(f"📋 {len(manifest)} on server, {len(todo)} to download ({total/1024:.0f} KB), "
+          f"{len(stale) if delete else 0} to delete")
+
+    ok = True
+    for i, (name, size, digest) in enumerate(todo, 1):
+        print(f"\n[{i}/{len(todo)}] {name}")
+        path = f"{folder}/{name}"
+        part = path + ".part"
+
+        # دانلود در فایل موقت؛ فایل قبلی تا پایان موفق دست نمی‌خورد
+        if not download_file(f"{base_url}/{url_quote(name)}", part) or local_size(part) != size:
+            print(f"❌ Incomplete: {name}")
+            delete_file(part)
+            ok = False
+            continue
+
+        if local_size(path) >= 0:
+            os.remove(path)
+        os.rename(part, path)
+        state[name] = (digest, size)
+        save_sync_state(folder, state)  # بعد از هر فایل، تا sync قطع‌شده از همین‌جا ادامه دهد
+
+    if delete:
+        for name in stale:
+            delete_file(f"{folder}/{name}")
+            del state[name]
+        if stale:
+            save_sync_state(folder, state)
+
+    # index کتابخانه همین‌جا به‌روز شود تا پلیر در boot بعدی فقط یک فایل بخواند
+    library.update(folder)
+
+    print(f"\n{'✅' if ok else '⚠️ '} Sync finished")
+    return ok
+
+
+
 if 1:
     import machine, os
     import sdcard
@@ -377,13 +518,16 @@ def main():
     # نمایش فایل‌های فعلی
     list_files()
     
-    # دانلود فایل
+    # دانلود یک فایل
     # فرمت: http://IP:PORT/filename.ext
-    success = download_file(
-        url=f"http://{SERVER_IP}:{SERVER_PORT}/LastNight3.wav",
-        path="sd/LastNight3.wav",
-        chunk_size=512  # کاهش chunk برای جلوگیری از MemoryError
-    )
+    # success = download_file(
+    #     url=f"http://{SERVER_IP}:{SERVER_PORT}/LastNight3.wav",
+    #     path="sd/LastNight3.wav",
+    #     chunk_size=512  # کاهش chunk برای جلوگیری از MemoryError
+    # )
+
+    # همگام‌سازی کل کتابخانه: فقط فایل‌های جدید/تغییرکرده
+    success = sync_library(f"http://{SERVER_IP}:{SERVER_PORT}", "sd")
     
     if success:
         # نمایش فایل‌های بعد از دانلود
@@ -0,0 +1,256 @@
+# g711_player.py - پخش WAV هشت‌بیتی μ-law / A-law (ساخته‌شده با g711.py روی PC)
+# از SD نصف PCM خوانده می‌شود (44.1kHz استریو: ~86 KB/s به جای 172 KB/s)
+# دیکود فقط یک جدول 256 خانه‌ای است: هر بایت -> یک int16، بدون وضعیت و بدون بلوک
+# بایت‌ها در نیمه دوم همان بافر خوانده و در جای خودش به 16 بیت باز می‌شوند،
+# پس در حلقه پخش هیچ حافظه‌ای اختصاص داده نمی‌شود
+
+from machine import I2S, Pin
+import array
+import gc
+import micropython
+import os
+import time
+
+from adpcm_player import read_wav_header, _decode_block, _STEPS
+
+
+WAVE_FORMAT_ALAW = 6
+WAVE_FORMAT_MULAW = 7
+
+CHUNK_SIZE = 8192  # بایت PCM خروجی در هر write (نصفش از SD خوانده می‌شود)
+
+
+# ================ جدول‌ها ==================
+def _ulaw(b):
+    b = ~b & 0xFF
+    t = (((b & 0x0F) << 3) + 0x84) << ((b >> 4) & 7)
+    return 0x84 - t if b & 0x80 else t - 0x84
+
+
+def _alaw(b):
+    b ^= 0x55
+    t = (b & 0x0F) << 4
+    seg = (b >> 4) & 7
+    if seg == 0:
+        t += 8
+    else:
+        t = (t + 0x108) << (seg - 1)
+    return t if b & 0x80 else -t
+
+
+_TABLES = {}
+
+
+def expand_table(fmt):
+    """جدول 256 خانه‌ای بایت -> int16 (یک بار ساخته و نگه داشته می‌شود)"""
+    lut = _TABLES.get(fmt)
+    if lut is None:
+        decode = _ulaw if fmt == WAVE_FORMAT_MULAW else _alaw
+        lut = array.array('h', (decode(b) for b in range(256)))
+        _TABLES[fmt] = lut
+    return lut
+
+
+@micropython.viper
+def _expand(src: ptr8, dst: ptr16, offset: int, n: int, lut: ptr16):
+    """
+    dst[i] = lut[src[offset + i]]
+    src و dst می‌توانند یک بافر باشند اگر داده خام در نیمه دوم باشد (offset = نصف طول):
+    نمونه i بایت‌های 2i و 2i+1 را می‌نویسد که قبلاً خوانده شده‌اند
+    """
+    i = 0
+    while i < n:
+        dst[i] = lut[src[offset + i]]
+        i += 1
+
+
+# ================ پخش ==================
+def play_companded(f, audio_out, size, fmt, buf):
+    """
+    پخش size بایت μ-law/A-law از موقعیت فعلی فایل با بافر buf
+    (pack_player.play_entry هم از همین استفاده می‌کند)
+    """
+    lut = expand_table(fmt)
+    half = len(buf) // 2
+    mv = memoryview(buf)
+    raw = mv[half:]
+    remaining = size
+
+    while remaining > 0:
+        n = f.readinto(raw[:min(half, remaining)])
+        if not n:
+            break
+        remaining -= n
+        _expand(buf, buf, half, n, lut)
+        audio_out.write(mv[:n * 2])
+
+
+def play_g711(path, sck=26, ws=25, sd=22, ibuf=20480):
+    """پخش یک فایل با تنظیم خودکار I2S از روی هدر"""
+
+    print(f"\n{'='*50}")
+    print(f"🎵 Playing: {path}")
+    print(f"{'='*50}")
+
+    gc.collect()
+
+    try:
+        f = open(path, "rb")
+        info = read_wav_header(f)
+    except Exception as e:
+        print(f"✗ Cannot read file: {e}")
+        return False
+
+    if info['format'] not in (WAVE_FORMAT_MULAW, WAVE_FORMAT_ALAW):
+        print("✗ Not a μ-law / A-law file")
+        f.close()
+        return False
+
+    channels = info['channels']
+    rate = info['sample_rate']
+    name = 'μ-law' if info['format'] == WAVE_FORMAT_MULAW else 'A-law'
+    print(f"📊 {rate}Hz, {channels}ch, 8bit {name}")
+
+    audio_out = I2S(
+        0,
+        sck=Pin(sck),
+        ws=Pin(ws),
+        sd=Pin(sd),
+        mode=I2S.TX,
+        bits=16,
+        format=I2S.MONO if channels == 1 else I2S.STEREO,
+        rate=rate,
+        ibuf=ibuf
+    )
+
+    start = time.ticks_ms()
+    try:
+        play_companded(f, audio_out, info['data_size'], info['format'], bytearray(CHUNK_SIZE))
+        elapsed = time.ticks_diff(time.ticks_ms(), start) / 1000
+        print(f"\n✓ Finished in {elapsed:.1f}s")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import sys
+        sys.print_exception(e)
+        return False
+
+    finally:
+        f.close()
+        audio_out.deinit()
+
+
+# ================ بنچمارک دیکود ==================
+def benchmark(rate=44100, channels=2, path=None, seconds=1):
+    """
+    هزینه CPU دیکود μ-law در مقابل ADPCM برای همان مقدار صدا، در مقایسه با مهلت I2S
+    مهلت هر write = مدت صدایی که آن بافر پخش می‌کند؛ اگر دیکود + خواندن SD
+    از آن بیشتر شود I2S خالی می‌ماند و صدا می‌لرزد
+    path: اگر داده شود زمان خواندن SD هم (با همان اندازه تکه) اندازه گرفته می‌شود
+    """
+
+    print("\n" + "="*50)
+    print(f"🔬 Decode benchmark: {rate}Hz, {channels}ch, {seconds}s of audio")
+    print("="*50)
+    gc.collect()
+
+    frames_per_chunk = CHUNK_SIZE // 2 // channels
+    deadline_us = frames_per_chunk * 1000000 // rate
+    chunks = rate * seconds // frames_per_chunk
+
+    # --- μ-law: جدول ---
+    buf = bytearray(os.urandom(CHUNK_SIZE))
+    lut = expand_table(WAVE_FORMAT_MULAW)
+    half = CHUNK_SIZE // 2
+    total = 0
+    worst = 0
+    for _ in range(chunks):
+        t = time.ticks_us()
+        _expand(buf, buf, half, half, lut)
+        dt = time.ticks_diff(time.ticks_us(), t)
+        total += dt
+        worst = max(worst, dt)
+    ulaw_ms = total / 1000 / seconds
+    print(f"  μ-law LUT:  {ulaw_ms:6.1f} ms per second "
+          f"(worst chunk {worst} us of {deadline_us} us deadline)")
+
+    # --- ADPCM: همان دیکودر viper برای مقایسه ---
+    block_align = 512 * channels
+    block = bytearray(os.urandom(block_align))
+    for ch in range(channels):
+        block[ch * 4 + 2] = block[ch * 4 + 2] % 89
+    spb = (block_align - 4 * channels) * 2 // channels + 1
+    pcm = bytearray(spb * channels * 2)
+    blocks = rate * seconds // spb
+    total = 0
+    worst = 0
+    for _ in range(blocks):
+        t = time.ticks_us()
+        _decode_block(block, pcm, block_align, channels, _STEPS)
+        dt = time.ticks_diff(time.ticks_us(), t)
+        total += dt
+        worst = max(worst, dt)
+    adpcm_ms = total / 1000 / seconds
+    print(f"  IMA-ADPCM:  {adpcm_ms:6.1f} ms per second "
+          f"(worst block {worst} us of {spb * 1000000 // rate} us deadline)")
+
+    # --- خواندن SD (اختیاری) ---
+    read_ms = 0
+    if path:
+        with open(path, "rb") as f:
+            info = read_wav_header(f)
+            raw = memoryview(buf)[half:]
+            total = 0
+            got = 0
+            for _ in range(chunks):
+                t = time.ticks_us()
+                n = f.readinto(raw)
+                total += time.ticks_diff(time.ticks_us(), t)
+                if not n:
+                    break
+                got += n
+        if got:
+            # به ازای یک ثانیه صدای μ-law (rate * channels بایت)
+            read_ms = total / 1000 * (rate * channels) / got
+            print(f"  SD read:    {read_ms:6.1f} ms per second of μ-law audio")
+
+    load = (ulaw_ms + read_ms) / 10
+    print(f"  CPU load (μ-law): {load:.1f}% of realtime, "
+          f"{adpcm_ms / max(ulaw_ms, 0.001):.1f}x cheaper than ADPCM")
+    if load > 80:
+        print("  ⚠️  Too close to realtime!")
+    else:
+        print("  ✓ Enough headroom for I2S")
+
+    return ulaw_ms, adpcm_ms
+
+
+# ================ تابع اصلی ==================
+def main():
+    import sdcard
+    from machine import SPI
+
+    spi = SPI(1,
+              baudrate=20000000,
+              polarity=0,
+              phase=0,
+              sck=Pin(18),
+              mosi=Pin(23),
+              miso=Pin(19))
+
+    sd = sdcard.SDCard(spi, Pin(5))
+    try:
+        os.umount("/sd")
+    except:
+        pass
+    os.mount(sd, "/sd")
+
+    file_path = "/sd/LastNight_44100_2_ulaw.wav"
+
+    benchmark(44100, 2, file_path)
+    play_g711(file_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# library.py - index کتابخانه روی SD (library.idx، ساخته‌شده با library_index.py یا همین‌جا)
+# به جای stat کردن همه فایل‌ها و باز کردن هدر هر WAV در هر boot:
+#   - فهرست کامل با یک read از library.idx خوانده می‌شود
+#   - os.ilistdir (نام + حجم بدون stat جدا) با index مقایسه می‌شود
+#     و فقط هدر فایل‌های جدید یا تغییرکرده خوانده می‌شود
+#   - index فقط وقتی چیزی عوض شده باشد دوباره نوشته می‌شود
+#
+# رکورد: (name, file_size, data_offset, data_size, frames, rate, format,
+#         channels, bits, block_align, samples_per_block)
+
+import os
+import struct
+
+from adpcm_player import read_wav_header
+
+
+INDEX_NAME = "library.idx"
+INDEX_MAGIC = b"WLIB"
+INDEX_VERSION = 1
+HEADER_FMT = "<4sBBHI"
+HEADER_SIZE = 12
+ENTRY_FMT = "<IIIIIHBBHHB"
+ENTRY_SIZE = 29
+
+
+def load(folder="/sd"):
+    """خواندن index با یک read -> لیست رکوردها (نبود یا خراب: [])"""
+    try:
+        with open(f"{folder}/{INDEX_NAME}", "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+    if len(data) < HEADER_SIZE:
+        return []
+    magic, version, _, count, _ = struct.unpack_from(HEADER_FMT, data)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION:
+        return []
+
+    entries = []
+    pos = HEADER_SIZE
+    for _ in range(count):
+        values = struct.unpack_from(ENTRY_FMT, data, pos)
+        pos += ENTRY_SIZE
+        name = str(data[pos:pos + values[10]], "utf-8")
+        pos += values[10]
+        entries.append((name,) + values[:10])
+    return entries
+
+
+def save(folder, entries):
+    """نوشتن index (اول فایل موقت، بعد جایگزینی)"""
+    path = f"{folder}/{INDEX_NAME}"
+    with open(path + ".tmp", "wb") as f:
+        f.write(struct.pack(HEADER_FMT, INDEX_MAGIC, INDEX_VERSION, 0, len(entries), 0))
+        for rec in entries:
+            raw = rec[0].encode()
+            f.write(struct.pack(ENTRY_FMT, *rec[1:], len(raw)))
+            f.write(raw)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    os.rename(path + ".tmp", path)
+
+
+def _scan(path, size):
+    """خواندن هدر یک WAV -> رکورد (بدون نام)"""
+    with open(path, "rb") as f:
+        info = read_wav_header(f)
+    return (size, info["data_offset"], info["data_size"],
+            info.get("frames", info["data_size"] // info["block_align"]),
+            info["sample_rate"], info["format"], info["channels"], info["bit_depth"],
+            info["block_align"], info.get("samples_per_block", 0))
+
+
+def update(folder="/sd"):
+    """
+    به‌روزرسانی تدریجی index با os.ilistdir
+    خروجی: لیست رکوردها به ترتیب نام
+    """
+    old = {rec[0]: rec for rec in load(folder)}
+    entries = []
+    changed = False
+
+    for item in os.ilistdir(folder):
+        name = item[0]
+        if item[1] != 0x8000 or not name.lower().endswith(".wav"):
+            continue
+        path = f"{folder}/{name}"
+        size = item[3] if len(item) > 3 else os.stat(path)[6]
+
+        rec = old.pop(name, None)
+        if rec is None or rec[1] != size:
+            try:
+                rec = (name,) + _scan(path, size)
+            except (OSError, ValueError):
+                continue  # فایل ناقص (مثلاً دانلود نیمه‌کاره)
+            changed = True
+        entries.append(rec)
+
+    if old:
+        changed = True  # فایل‌هایی که دیگر روی کارت نیستند
+    entries.sort()
+    if changed:
+        save(folder, entries)
+    return entries
+
+
+def duration(rec):
+    return rec[4] / rec[5] if rec[5] else 0
+
+
+def as_entry(rec):
+    """رکورد index -> entry برای pack_player.play_entry (بدون خواندن دوباره هدر)"""
+    return (rec[2], rec[3], rec[4], rec[5], rec[6], rec[7], rec[8], rec[9], rec[10], rec[0])
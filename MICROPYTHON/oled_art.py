@@ -0,0 +1,73 @@
+# oled_art.py - نمایش عنوان و کاور از پیش رسم‌شده (فایل .art ساخته‌شده با artwork.py روی PC)
+# bitmap ها همان چیدمان MONO_VLSB حافظه SSD1306 را دارند، پس مستقیم framebuf می‌شوند
+# و در هر فریم فقط blit می‌شوند (بدون oled.text و رسم حرف به حرف)
+# blit خودش به اندازه صفحه clip می‌کند: از نوار عنوان فقط 128 ستون دیده‌شده کپی می‌شود
+
+import framebuf
+
+
+ART_MAGIC = b"OART"
+HEADER_SIZE = 16
+
+
+class Artwork:
+    """
+    title: framebuf نوار عنوان (title_width x title_height)
+    cover: framebuf کاور (cover_size x cover_size) یا None
+    """
+
+    def __init__(self, title, title_width, title_height, cover=None, cover_size=0):
+        self.title = title
+        self.title_width = title_width
+        self.title_height = title_height
+        self.cover = cover
+        self.cover_size = cover_size
+
+    def draw_title(self, oled, scroll_x, y=0, gap=20):
+        """نوار عنوان با اسکرول چرخشی (مثل دو oled.text قبلی)"""
+        oled.blit(self.title, -scroll_x, y)
+        if self.title_width + gap - scroll_x < oled.width:
+            oled.blit(self.title, -scroll_x + self.title_width + gap, y)
+
+    def draw_cover(self, oled):
+        """صفحه شروع آهنگ: کاور سمت چپ، ابتدای عنوان سمت راست"""
+        oled.fill(0)
+        x = 0
+        if self.cover is not None:
+            oled.blit(self.cover, 0, (oled.height - self.cover_size) // 2)
+            x = self.cover_size + 2
+        oled.blit(self.title, x, (oled.height - self.title_height) // 2)
+        oled.show()
+
+
+def art_path(wav_path):
+    return wav_path.rsplit(".", 1)[0] + ".art"
+
+
+def load(wav_path):
+    """خواندن فایل .art کنار WAV -> Artwork، یا None اگر نبود"""
+    try:
+        f = open(art_path(wav_path), "rb")
+    except OSError:
+        return None
+
+    with f:
+        header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[0:4] != ART_MAGIC:
+            return None
+        width = int.from_bytes(header[6:8], "little")
+        height = header[8]
+        size = header[9]
+
+        # هر بافر یک بار با readinto پر می‌شود (بدون کپی اضافه)
+        title_buf = bytearray((height + 7) // 8 * width)
+        f.readinto(title_buf)
+        title = framebuf.FrameBuffer(title_buf, width, height, framebuf.MONO_VLSB)
+
+        cover = None
+        if size:
+            cover_buf = bytearray((size + 7) // 8 * size)
+            f.readinto(cover_buf)
+            cover = framebuf.FrameBuffer(cover_buf, size, size, framebuf.MONO_VLSB)
+
+    return Artwork(title, width, height, cover, size)
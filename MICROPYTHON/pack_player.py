@@ -0,0 +1,172 @@
+# pack_player.py - پخش playlist از یک فایل .pak (ساخته‌شده با playlist_pack.py روی PC)
+# به جای listdir + stat + open برای هر آهنگ:
+#   فایل یک بار باز می‌شود، index یک بار خوانده می‌شود،
+#   و عوض کردن آهنگ فقط یک seek است
+# داده هر آهنگ روی مرز 512 بایت است، پس خواندن‌ها با سکتورهای SD هم‌راستا هستند
+
+from machine import I2S, Pin
+import gc
+import time
+
+from adpcm_player import _decode_block, _STEPS, BLOCKS_PER_READ, WAVE_FORMAT_IMA_ADPCM
+from g711_player import play_companded, WAVE_FORMAT_ALAW, WAVE_FORMAT_MULAW
+
+
+PACK_MAGIC = b'WPAK'
+ENTRY_SIZE = 64
+CHUNK_SIZE = 8192
+
+
+# ================ خواندن index ==================
+def read_index(f):
+    """
+    هدر + index کامل (یک خواندن)
+    هر رکورد: (offset, size, frames, rate, format, channels, bits,
+              block_align, samples_per_block, name)
+    """
+    f.seek(0)
+    header = f.read(16)
+    if header[0:4] != PACK_MAGIC:
+        raise ValueError("Not a playlist pack")
+    count = int.from_bytes(header[6:8], 'little')
+
+    raw = f.read(count * ENTRY_SIZE)
+    entries = []
+    for i in range(count):
+        e = raw[i * ENTRY_SIZE:(i + 1) * ENTRY_SIZE]
+        entries.append((
+            int.from_bytes(e[0:4], 'little'),
+            int.from_bytes(e[4:8], 'little'),
+            int.from_bytes(e[8:12], 'little'),
+            int.from_bytes(e[12:16], 'little'),
+            int.from_bytes(e[16:18], 'little'),
+            e[18],
+            e[19],
+            int.from_bytes(e[20:22], 'little'),
+            int.from_bytes(e[22:24], 'little'),
+            bytes(e[24:64]).rstrip(b'\x00').decode(),
+        ))
+    return entries
+
+
+# ================ پخش یک آهنگ ==================
+def play_entry(f, audio_out, entry, buf):
+    """پخش یک رکورد از فایل باز (فقط seek، بدون open)"""
+    offset, size, frames, rate, fmt, channels, bits, block_align, spb, name = entry
+    f.seek(offset)
+    remaining = size
+    mv = memoryview(buf)
+
+    if fmt == WAVE_FORMAT_MULAW or fmt == WAVE_FORMAT_ALAW:
+        # μ-law/A-law: باز کردن با جدول در همان بافر
+        play_companded(f, audio_out, size, fmt, buf)
+        return
+
+    if fmt != WAVE_FORMAT_IMA_ADPCM:
+        while remaining > 0:
+            n = f.readinto(mv[:min(len(buf), remaining)])
+            if not n:
+                break
+            audio_out.write(mv[:n])
+            remaining -= n
+        return
+
+    # ADPCM: همان دیکودر viper در adpcm_player.py
+    raw_mv = mv[:block_align * BLOCKS_PER_READ]
+    blocks = [raw_mv[i * block_align:] for i in range(BLOCKS_PER_READ)]
+    pcm = bytearray(spb * channels * 2)
+    pcm_mv = memoryview(pcm)
+    frames_left = frames
+
+    while remaining > 0 and frames_left > 0:
+        n = f.readinto(raw_mv[:min(len(raw_mv), remaining)])
+        if not n:
+            break
+        remaining -= n
+
+        i = 0
+        while (i + 1) * block_align <= n and frames_left > 0:
+            decoded = _decode_block(blocks[i], pcm, block_align, channels, _STEPS)
+            frames_left -= decoded
+            if frames_left >= 0:
+                audio_out.write(pcm)
+            else:
+                audio_out.write(pcm_mv[:(decoded + frames_left) * channels * 2])
+            i += 1
+
+
+# ================ پخش کل pack ==================
+def play_pack(path, start=0, sck=26, ws=25, sd=22, ibuf=20480):
+    """
+    پخش آهنگ‌ها به ترتیب index
+    I2S فقط وقتی فرمت عوض شود دوباره ساخته می‌شود، پس بین آهنگ‌های هم‌فرمت فاصله نیست
+    """
+    gc.collect()
+    f = open(path, "rb")
+    audio_out = None
+    current = None
+
+    try:
+        entries = read_index(f)
+        print(f"\n🎵 Pack: {len(entries)} songs")
+        buf = bytearray(CHUNK_SIZE)
+
+        for i in range(start, len(entries)):
+            entry = entries[i]
+            rate, channels = entry[3], entry[5]
+            print(f"[{i + 1}/{len(entries)}] {entry[9]} ({rate}Hz, {channels}ch)")
+
+            if current != (rate, channels):
+                if audio_out:
+                    audio_out.deinit()
+                audio_out = I2S(
+                    0,
+                    sck=Pin(sck),
+                    ws=Pin(ws),
+                    sd=Pin(sd),
+                    mode=I2S.TX,
+                    bits=16,
+                    format=I2S.MONO if channels == 1 else I2S.STEREO,
+                    rate=rate,
+                    ibuf=ibuf
+                )
+                current = (rate, channels)
+
+            t = time.ticks_ms()
+            play_entry(f, audio_out, entry, buf)
+            print(f"  ✓ {time.ticks_diff(time.ticks_ms(), t) / 1000:.1f}s")
+
+        print("\n✓ Playlist complete!")
+
+    finally:
+        f.close()
+        if audio_out:
+            audio_out.deinit()
+
+
+# ================ تابع اصلی ==================
+def main():
+    import os
+    import sdcard
+    from machine import SPI
+
+    spi = SPI(1,
+              baudrate=20000000,
+              polarity=0,
+              phase=0,
+              sck=Pin(18),
+              mosi=Pin(23),
+              miso=Pin(19))
+
+    sd = sdcard.SDCard(spi, Pin(5))
+    try:
+        os.umount("/sd")
+    except:
+        pass
+    os.mount(sd, "/sd")
+
+    play_pack("/sd/music.pak")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+# segment_player.py - دانلود و پخش هم‌زمان آهنگ‌های تکه‌شده (segments.py روی PC)
+# یک thread تکه‌ها را به ترتیب از flask_server.py می‌گیرد و روی SD می‌نویسد،
+# و پخش به محض کامل شدن تکه اول شروع می‌شود
+# اگر WiFi قطع شود فقط همان تکه (چند ثانیه صدا) دوباره دانلود می‌شود
+# هر تکه با sha256 داخل index چک می‌شود: هم بعد از دانلود، هم تکه‌ای که از قبل روی SD مانده
+#
+# روی سرور:  LastNight.seg/index , LastNight.seg/000.wav , ...
+
+from machine import I2S, Pin
+import _thread
+import binascii
+import gc
+import hashlib
+import os
+import time
+import urequests
+
+from adpcm_player import read_wav_header
+from pack_player import play_entry
+
+
+RETRIES = 5
+CHUNK_SIZE = 4096
+
+
+def url_quote(name):
+    """کد کردن نام برای URL (مثل download_music.py)"""
+    out = ""
+    for b in name.encode():
+        c = chr(b)
+        if b < 128 and (c.isalpha() or c.isdigit() or c in "-_.~/"):
+            out += c
+        else:
+            out += "%%%02X" % b
+    return out
+
+
+def file_size(path):
+    try:
+        return os.stat(path)[6]
+    except OSError:
+        return -1
+
+
+def hex_digest(h):
+    return binascii.hexlify(h.digest()).decode()
+
+
+def file_sha256(path, buf):
+    """هش تکه‌ای که روی SD است (sha256 در ESP32 سخت‌افزاری است)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(memoryview(buf)[:n])
+    return hex_digest(h)
+
+
+# ================ دانلود ==================
+def fetch(url, path, buf):
+    """دانلود یک فایل کوچک با بافر ثابت؛ خروجی: (تعداد بایت، sha256)"""
+    r = urequests.get(url, stream=True)
+    try:
+        if r.status_code != 200:
+            raise OSError(f"HTTP {r.status_code}")
+        got = 0
+        h = hashlib.sha256()
+        with open(path, "wb") as f:
+            while True:
+                n = r.raw.readinto(buf)
+                if not n:
+                    break
+                chunk = memoryview(buf)[:n]
+                f.write(chunk)
+                h.update(chunk)
+                got += n
+        return got, hex_digest(h)
+    finally:
+        r.close()
+
+
+def fetch_index(base_url, name, folder):
+    """index تکه‌ها -> (rate, channels, لیست (file, size, frames, sha256))؛ index نسخه 1 هش ندارد"""
+    path = f"{folder}/index"
+    buf = bytearray(CHUNK_SIZE)
+    for attempt in range(RETRIES):
+        try:
+            fetch(f"{base_url}/{url_quote(name)}.seg/index", path, buf)
+            break
+        except Exception as e:
+            print(f"⚠️  index attempt {attempt + 1}: {e}")
+            time.sleep(1)
+    else:
+        raise OSError("Can't download segment index")
+
+    with open(path) as f:
+        head = f.readline().rstrip("\n").split("\t")
+        if head[0] != "SEG":
+            raise ValueError("Not a segment index")
+        segments = []
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) >= 3:
+                digest = parts[3] if len(parts) > 3 else None
+                segments.append((parts[0], int(parts[1]), int(parts[2]), digest))
+    return int(head[2]), int(head[3]), segments
+
+
+class Downloader:
+    """
+    دانلود تکه‌ها در thread جدا
+    ready[i] = True وقتی تکه i کامل و با حجم و هش درست روی SD است
+    """
+
+    def __init__(self, base_url, name, folder, segments):
+        self.base_url = base_url
+        self.name = name
+        self.folder = folder
+        self.segments = segments
+        self.ready = [False] * len(segments)
+        self.failed = False
+        self.stop = False
+
+    def start(self):
+        _thread.start_new_thread(self._run, ())
+
+    def _run(self):
+        buf = bytearray(CHUNK_SIZE)
+        for i, (seg, size, _, digest) in enumerate(self.segments):
+            path = f"{self.folder}/{seg}"
+            # از دانلود قبلی مانده؛ هم‌حجم بودن کافی نیست (تبدیل دوباره همان حجم را می‌دهد)
+            if file_size(path) == size and (digest is None or file_sha256(path, buf) == digest):
+                self.ready[i] = True
+                continue
+
+            for attempt in range(RETRIES):
+                if self.stop:
+                    return
+                try:
+                    got, got_digest = fetch(f"{self.base_url}/{url_quote(self.name)}.seg/{seg}",
+                                            path + ".part", buf)
+                    if got != size:
+                        raise OSError(f"got {got} of {size} bytes")
+                    if digest is not None and got_digest != digest:
+                        raise OSError("sha256 mismatch")
+                    if file_size(path) >= 0:
+                        os.remove(path)
+                    os.rename(path + ".part", path)
+                    self.ready[i] = True
+                    break
+                except Exception as e:
+                    print(f"⚠️  {seg} attempt {attempt + 1}: {e}")
+                    gc.collect()
+                    time.sleep(1)
+            else:
+                self.failed = True
+                return
+
+
+# ================ پخش ==================
+def play_segmented(base_url, name, folder="sd", sck=26, ws=25, sd=22, ibuf=20480):
+    """
+    دانلود + پخش آهنگ name (بدون پسوند) از سرور
+    تکه‌ها در folder/name.seg ذخیره می‌شوند و دفعه بعد دوباره دانلود نمی‌شوند
+    """
+    seg_folder = f"{folder}/{name}.seg"
+    try:
+        os.mkdir(seg_folder)
+    except OSError:
+        pass
+
+    gc.collect()
+    rate, channels, segments = fetch_index(base_url, name, seg_folder)
+    print(f"\n🎵 {name}: {len(segments)} segments, {rate}Hz {channels}ch")
+
+    downloader = Downloader(base_url, name, seg_folder, segments)
+    downloader.start()
+
+    audio_out = I2S(
+        0,
+        sck=Pin(sck),
+        ws=Pin(ws),
+        sd=Pin(sd),
+        mode=I2S.TX,
+        bits=16,
+        format=I2S.MONO if channels == 1 else I2S.STEREO,
+        rate=rate,
+        ibuf=ibuf
+    )
+    buf = bytearray(8192)
+
+    try:
+        for i, (seg, size, frames, _) in enumerate(segments):
+            # صبر تا تکه i دانلود شود (I2S از بافر خودش پخش می‌کند)
+            waited = False
+            while not downloader.ready[i]:
+                if downloader.failed:
+                    print(f"❌ Segment {seg} failed after {RETRIES} attempts")
+                    return False
+                if not waited:
+                    print(f"⏳ Waiting for {seg}...")
+                    waited = True
+                time.sleep_ms(50)
+
+            with open(f"{seg_folder}/{seg}", "rb") as f:
+                info = read_wav_header(f)
+                entry = (info['data_offset'], info['data_size'], info.get('frames', frames),
+                         info['sample_rate'], info['format'], info['channels'],
+                         info['bit_depth'], info['block_align'],
+                         info.get('samples_per_block', 0), seg)
+                play_entry(f, audio_out, entry, buf)
+            print(f"  ▶️  {i + 1}/{len(segments)}")
+
+        print("\n✓ Finished!")
+        return True
+
+    finally:
+        downloader.stop = True
+        audio_out.deinit()
+
+
+# ================ تابع اصلی ==================
+def main():
+    # WiFi و SD مثل download_music.py
+    SERVER = "http://10.173.27.197:8000"
+    play_segmented(SERVER, "LastNight3")
+
+
+if __name__ == '__main__':
+    main()
@@ -25,8 +25,7 @@ audio = I2S(
     rate=16000,
     ibuf=40000
 )
-import struct
-import math
+import testsignals
 
 if 1:
     import machine, os
@@ -47,35 +46,8 @@ if 1:
     print("Files:", os.listdir("/sd"))
 
 def create_wav(filename="tone.wav", seconds=2, freq=440):
-    rate = 16000
-    amp = 10000
-    samples = int(rate * seconds)
-
-    # header ساختن
-    with open(filename, "wb") as f:
-        # RIFF header
-        f.write(b"RIFF")
-        f.write(struct.pack("<I", 36 + samples*2))
-        f.write(b"WAVE")
-
-        # fmt chunk
-        f.write(b"fmt ")
-        f.write(struct.pack("<I", 16))
-        f.write(struct.pack("<H", 1))     # PCM
-        f.write(struct.pack("<H", 1))     # MONO
-        f.write(struct.pack("<I", rate))  # sample rate
-        f.write(struct.pack("<I", rate*2))
-        f.write(struct.pack("<H", 2))
-        f.write(struct.pack("<H", 16))    # bits
-
-        # data chunk
-        f.write(b"data")
-        f.write(struct.pack("<I", samples * 2))
-
-        # نوشتن نمونه‌ها
-        for n in range(samples):
-            sample = int(amp * math.sin(2 * math.pi * freq * (n / rate)))
-            f.write(struct.pack("<h", sample))
+    # ساخت بلوکی با testsignals.py (هر بلوک یک write)
+    testsignals.create(filename, "sine", seconds=seconds, rate=16000, freq=freq, amp=10000)
 
 # create_wav()
 # print("tone.wav ساخته شد!")
@@ -1,6 +1,8 @@
 from machine import I2S, Pin, I2C
-import time, struct, math, os, machine, sdcard, random
+import time, os, machine, sdcard, random
+import testsignals
 import ssd1306
+import oled_art
 
 # ----------------------------------------
 # OLED SSD1306 init (128x64)
@@ -8,11 +10,11 @@ import ssd1306
 i2c = I2C(0, scl=Pin(22), sda=Pin(21))
 oled = ssd1306.SSD1306_I2C(128, 64, i2c)
 
-def draw_screen(song_name):
+def draw_screen(song_name, levels=None, art=None):
     """
     این تابع صفحه را آپدیت می‌کند:
-    - اسکرول اسم آهنگ در 1/3 بالا
-    - نمودار فرکانسی فیک در پایین
+    - اسکرول اسم آهنگ در 1/3 بالا (art از فایل .art: فقط blit، بدون oled.text)
+    - نمودار فرکانسی در پایین (levels از فایل .spec، در غیر این صورت فیک)
     """
     global scroll_x, text_len
 
@@ -20,8 +22,11 @@ def draw_screen(song_name):
 
     # --- 1/3 بالا — اسکرول اسم آهنگ ---
     gap = 20
-    oled.text(song_name, -scroll_x, 0)
-    oled.text(song_name, -scroll_x + text_len + gap, 0)
+    if art:
+        art.draw_title(oled, scroll_x, 0, gap)
+    else:
+        oled.text(song_name, -scroll_x, 0)
+        oled.text(song_name, -scroll_x + text_len + gap, 0)
 
     scroll_x += 2
     if scroll_x > text_len + gap:
@@ -31,9 +36,15 @@ def draw_screen(song_name):
     graph_height = 44
     bars = 18
     bar_w = 7
+    if levels:
+        # فایل .spec تعداد باند خودش را دارد (هدر)؛ با باند کمتر از 18 بیرون آرایه نخواند
+        bars = min(len(levels), bars)
 
     for i in range(bars):
-        h = random.randint(5, graph_height)
+        if levels:
+            h = 2 + levels[i] * (graph_height - 2) // 255
+        else:
+            h = random.randint(5, graph_height)
         x = i * bar_w
         y = 64 - h
         oled.fill_rect(x, y, bar_w - 2, h, 1)
@@ -44,6 +55,8 @@ def draw_screen(song_name):
 # ----------------------------------------
 # I2S setup
 # ----------------------------------------
+IBUF = 65536  # بافر داخلی I2S (صدا با این مقدار تأخیر از write پخش می‌شود)
+
 audio = I2S(
     0,
     sck=Pin(26),   # BCK
@@ -53,7 +66,7 @@ audio = I2S(
     bits=16,
     format=I2S.MONO,
     rate=44100,
-    ibuf=65536
+    ibuf=IBUF
 )
 
 # ----------------------------------------
@@ -76,28 +89,57 @@ print("SD mounted:", os.listdir("/sd"))
 # WAV creator (اختیاری)
 # ----------------------------------------
 def create_wav(filename="tone.wav", seconds=2, freq=440):
-    rate = 16000
-    amp = 10000
-    samples = int(rate * seconds)
-
-    with open(filename, "wb") as f:
-        f.write(b"RIFF")
-        f.write(struct.pack("<I", 36 + samples*2))
-        f.write(b"WAVE")
-        f.write(b"fmt ")
-        f.write(struct.pack("<I", 16))
-        f.write(struct.pack("<H", 1))
-        f.write(struct.pack("<H", 1))
-        f.write(struct.pack("<I", rate))
-        f.write(struct.pack("<I", rate*2))
-        f.write(struct.pack("<H", 2))
-        f.write(struct.pack("<H", 16))
-        f.write(b"data")
-        f.write(struct.pack("<I", samples * 2))
-
-        for n in range(samples):
-            sample = int(amp * math.sin(2*math.pi*freq*(n/rate)))
-            f.write(struct.pack("<h", sample))
+    # ساخت بلوکی با testsignals.py (هر بلوک یک write)
+    testsignals.create(filename, "sine", seconds=seconds, rate=16000, freq=freq, amp=10000)
+
+
+# ----------------------------------------
+# طیف از پیش حساب‌شده (فایل .spec ساخته‌شده با spectrum.py روی PC)
+# ----------------------------------------
+def open_spectrum(filename):
+    """
+    باز کردن فایل .spec کنار WAV
+    خروجی: (فایل، bands، fps، frames) یا None اگر فایل نبود
+    """
+    path = filename.rsplit(".", 1)[0] + ".spec"
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+
+    header = f.read(16)
+    if header[0:4] != b"SPEC":
+        f.close()
+        return None
+
+    bands = header[5]
+    fps = int.from_bytes(header[6:8], "little")
+    frames = int.from_bytes(header[8:12], "little")
+    return f, bands, fps, frames
+
+
+# ----------------------------------------
+# پیدا کردن داده WAV
+# ----------------------------------------
+def seek_data(f):
+    """
+    پیمایش chunk ها تا chunk ـه data (به جای فرض هدر 44 بایتی)
+    فایل‌های ساخته‌شده با --align یک JUNK دارند و داده روی مرز 512 شروع می‌شود
+    خروجی: (byte_rate، اندازه داده)
+    """
+    f.seek(12)
+    byte_rate = 0
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            raise ValueError("No data chunk")
+        size = int.from_bytes(chunk[4:8], "little")
+        if chunk[0:4] == b"data":
+            return byte_rate, size
+        if chunk[0:4] == b"fmt ":
+            byte_rate = int.from_bytes(f.read(size)[8:12], "little")
+        else:
+            f.seek(size + (size & 1), 1)
 
 
 # ----------------------------------------
@@ -111,22 +153,47 @@ def play_wav(filename):
     text_len = len(song_name) * 8
     show_it = 0
 
+    # عنوان و کاور از پیش رسم‌شده (artwork.py روی PC)
+    art = oled_art.load(filename)
+    if art:
+        text_len = art.title_width
+        art.draw_cover(oled)
+
+    # هر فریم ویژوالایزر فقط bands بایت از SD است؛ هیچ FFT روی ESP32 نیست
+    spec = open_spectrum(filename)
+    levels = None
+    if spec:
+        spec_f, bands, fps, frames = spec
+        levels = bytearray(bands)
+
     with open(filename, "rb") as f:
-        f.read(44)  # skip header
+        byte_rate, remaining = seek_data(f)
+        played = 0
 
-        while True:
-            data = f.read(1024)
+        while remaining > 0:
+            data = f.read(min(1024, remaining))
             if not data:
                 break
+            remaining -= len(data)
 
             audio.write(data)
+            played += len(data)
 
             # آپدیت صفحه در حین پخش
             if show_it == 7:
-                draw_screen(song_name)
+                if spec:
+                    # فریم هم‌زمان با صدایی که الان شنیده می‌شود (نه آخرین write)
+                    frame = max(0, played - IBUF) * fps // byte_rate
+                    if frame < frames:
+                        spec_f.seek(16 + frame * bands)
+                        spec_f.readinto(levels)
+                draw_screen(song_name, levels, art)
                 show_it = 0
             show_it+=1
 
+    if spec:
+        spec_f.close()
+
 
 # ----------------------------------------
 # اجرای برنامه
@@ -95,26 +95,20 @@ def play_wav_smooth(audio_out, path):
     
     try:
         with open(path, "rb") as f:
-            # رد شدن از هدر
-            header = f.read(44)
-            
-            # استخراج اطلاعات
-            if len(header) >= 44:
-                sample_rate = int.from_bytes(header[24:28], 'little')
-                channels = int.from_bytes(header[22:24], 'little')
-                bit_depth = int.from_bytes(header[34:36], 'little')
-                
-                print(f"📊 {sample_rate}Hz, {channels}ch, {bit_depth}bit")
-                
-                if sample_rate != 44100 or channels != 2:
-                    print(f"⚠️  Warning: File format mismatch!")
+            # پیمایش chunk ها تا داده (فایل‌های --align داده را روی مرز 512 شروع می‌کنند)
+            sample_rate, channels, bit_depth, data_size = find_data_chunk(f)
+            print(f"📊 {sample_rate}Hz, {channels}ch, {bit_depth}bit, data @ {f.tell()}")
+
+            if sample_rate != 44100 or channels != 2:
+                print(f"⚠️  Warning: File format mismatch!")
             
             # 🔥 پیش‌بارگذاری بافر (Pre-buffering)
             # این خیلی مهمه! قبل از شروع پخش، بافر I2S رو پر می‌کنیم
             print("⏳ Pre-buffering...")
             prebuffer_size = 16384  # 16KB
-            prebuffer = f.read(prebuffer_size)
+            prebuffer = f.read(min(prebuffer_size, data_size))
             audio_out.write(prebuffer)
+            remaining = data_size - len(prebuffer)
             print("✓ Buffer ready")
             
             # 🔥 اندازه chunk بزرگ‌تر = خواندن کمتر از SD = روان‌تر
@@ -128,10 +122,11 @@ def play_wav_smooth(audio_out, path):
             
             while True:
                 # خواندن chunk بزرگ
-                data = f.read(CHUNK_SIZE)
+                data = f.read(min(CHUNK_SIZE, remaining))
                 
                 if not data:
                     break
+                remaining -= len(data)
                 
                 # نوشتن به I2S (بدون delay!)
                 audio_out.write(data)
@@ -197,6 +192,76 @@ def play_playlist_smooth(audio_out, folder="/sd"):
     print("\n✓ Playlist complete!")
 
 
+# ================ Playlist بدون فاصله (gapless) ================
+def find_data_chunk(f):
+    """
+    پیمایش chunk های WAV تا chunk ـه data
+    خروجی: (rate, channels, bits, اندازه data) و فایل روی ابتدای داده است
+    فایل‌های --trim طول دقیق دارند و بعد از داده chunk اضافه (trim/loud) دارند،
+    پس نباید تا آخر فایل خواند
+    """
+    header = f.read(12)
+    if header[0:4] != b'RIFF' or header[8:12] != b'WAVE':
+        raise ValueError("Not a WAV file")
+
+    rate = channels = bits = 0
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            raise ValueError("No data chunk")
+        size = int.from_bytes(chunk[4:8], 'little')
+        if chunk[0:4] == b'data':
+            return rate, channels, bits, size
+        if chunk[0:4] == b'fmt ':
+            fmt = f.read(size)
+            channels = int.from_bytes(fmt[2:4], 'little')
+            rate = int.from_bytes(fmt[4:8], 'little')
+            bits = int.from_bytes(fmt[14:16], 'little')
+        else:
+            f.seek(size + (size & 1), 1)
+
+
+def play_playlist_gapless(audio_out, folder="/sd", rate=44100, channels=2):
+    """
+    پخش پشت سر هم بدون sleep و بدون pre-buffer دوباره
+    بافر داخلی I2S هنوز پر است که فایل بعدی باز می‌شود، پس صدا قطع نمی‌شود
+    فقط فایل‌های هم‌فرمت با I2S پخش می‌شوند
+    """
+    files = sorted(f for f in os.listdir(folder) if f.endswith('.wav'))
+    if not files:
+        print(f"✗ No WAV files in {folder}")
+        return
+
+    print(f"\n🎵 Gapless playlist: {len(files)} songs")
+
+    CHUNK_SIZE = 8192
+    buf = bytearray(CHUNK_SIZE)
+    mv = memoryview(buf)
+    gc.collect()
+
+    for i, filename in enumerate(files, 1):
+        with open(f"{folder}/{filename}", "rb") as f:
+            try:
+                file_rate, file_channels, bits, remaining = find_data_chunk(f)
+            except ValueError as e:
+                print(f"✗ {filename}: {e}")
+                continue
+
+            if (file_rate, file_channels, bits) != (rate, channels, 16):
+                print(f"⚠️  Skipping {filename}: {file_rate}Hz {file_channels}ch {bits}bit")
+                continue
+
+            print(f"[{i}/{len(files)}] {filename}")
+            while remaining > 0:
+                n = f.readinto(mv[:min(CHUNK_SIZE, remaining)])
+                if not n:
+                    break
+                audio_out.write(mv[:n])
+                remaining -= n
+
+    print("\n✓ Playlist complete!")
+
+
 # ================ حالت Debug ================
 def play_wav_debug(audio_out, path):
     """
@@ -286,6 +351,9 @@ def main():
     
     # === حالت 3: Playlist ===
     # play_playlist_smooth(audio_out, "/sd")
+
+    # === حالت 4: Playlist بدون فاصله (خروجی batch_convert.py --trim) ===
+    # play_playlist_gapless(audio_out, "/sd")
     
     print("\n✓ All done!")
 
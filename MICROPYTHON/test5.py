@@ -5,6 +5,7 @@ from machine import I2S, Pin, SPI
 import time
 import os
 import gc
+import library
 
 print("\n" + "="*50)
 print("Simple Stable Player")
@@ -37,12 +38,11 @@ try:
     print("✓ SD mounted at 10MHz")
     
     # نمایش فایل‌ها
-    files = os.listdir("/sd")
-    print(f"  Files: {len(files)}")
-    for f in files:
-        if f.endswith('.wav'):
-            size = os.stat(f"/sd/{f}")[6]
-            print(f"    🎵 {f} ({size/1024:.0f}KB)")
+    # نمایش فایل‌ها (از library.idx، بدون stat جدا برای هر فایل)
+    entries = library.update("/sd")
+    print(f"  Files: {len(entries)}")
+    for rec in entries:
+        print(f"    🎵 {rec[0]} ({rec[1]/1024:.0f}KB)")
     
 except Exception as e:
     print(f"✗ SD Error: {e}")
@@ -3,6 +3,7 @@
 from machine import I2S, Pin, SPI
 import os
 import gc
+import library
 
 print("\n" + "="*50)
 print("Smart Audio Player")
@@ -168,7 +169,8 @@ def play_smart(path):
 def play_playlist(folder="/sd"):
     """پخش تمام فایل‌های WAV با تنظیمات خودکار"""
     
-    files = [f for f in os.listdir(folder) if f.endswith('.wav')]
+    # فهرست از library.idx (فقط فایل‌های جدید باز می‌شوند)
+    files = [rec[0] for rec in library.update(folder)]
     
     if not files:
         print("✗ No WAV files found")
@@ -196,25 +198,18 @@ def list_files(folder="/sd"):
     print("📁 Available files:")
     print("="*50)
     
-    files = [f for f in os.listdir(folder) if f.endswith('.wav')]
+    # یک read از library.idx به جای stat + باز کردن هدر هر فایل
+    entries = library.update(folder)
     
-    if not files:
+    if not entries:
         print("  (no WAV files)")
         return
     
-    for filename in files:
-        filepath = f"{folder}/{filename}"
-        
-        try:
-            size = os.stat(filepath)[6]
-            info = get_wav_info(filepath)
-            
-            if info:
-                print(f"\n🎵 {filename}")
-                print(f"   Size: {size/1024:.0f}KB")
-                print(f"   {info['sample_rate']}Hz, {info['channels']}ch, {info['bit_depth']}bit")
-        except:
-            print(f"\n? {filename}")
+    for rec in entries:
+        name, size, rate, channels, bits = rec[0], rec[1], rec[5], rec[7], rec[8]
+        print(f"\n🎵 {name}")
+        print(f"   Size: {size/1024:.0f}KB, {library.duration(rec):.0f}s")
+        print(f"   {rate}Hz, {channels}ch, {bits}bit")
     
     print("\n" + "="*50 + "\n")
 
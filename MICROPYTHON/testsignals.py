@@ -0,0 +1,178 @@
+# testsignals.py - ساخت سریع فایل‌های WAV تست روی ESP32 (نسخه دستگاه signals.py)
+# روش قدیمی (create_tiny.py): برای هر نمونه یک math.sin + struct.pack + f.write
+# اینجا: هدر با یک struct.pack، نمونه‌ها در array('h') بلوکی و هر بلوک با یک write
+#   sine      یک دوره کامل یک بار حساب و بعد فقط تکرار می‌شود (بدون محاسبه)
+#   multitone / sweep   جدول sine + phase accumulator اعداد صحیح (@micropython.native)
+#   impulse   بلوک صفر + چند نمونه
+#   noise     os.urandom مستقیم در array
+#
+# مثال:
+#   import testsignals
+#   testsignals.create("/sd/tone.wav", "sine", seconds=10, freq=440)
+#   testsignals.create("/sd/sweep.wav", "sweep", seconds=5, rate=44100)
+
+import array
+import math
+import os
+import struct
+
+try:
+    from micropython import const, native
+except ImportError:  # اجرا روی PC برای تست
+    const = lambda x: x
+    native = lambda f: f
+
+
+BLOCK = const(2048)        # نمونه در هر write (4 KB)
+TABLE_SIZE = const(1024)
+MAX_PERIOD = const(8192)   # طولانی‌تر از این -> جدول به جای تکرار دوره
+
+
+def wav_header(rate, frames, channels=1):
+    """هدر 44 بایتی PCM 16 بیت با یک struct.pack"""
+    data_size = frames * channels * 2
+    return struct.pack("<4sI4s4sIHHIIHH4sI",
+                       b"RIFF", 36 + data_size, b"WAVE",
+                       b"fmt ", 16, 1, channels, rate, rate * channels * 2, channels * 2, 16,
+                       b"data", data_size)
+
+
+def _gcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+
+def sine_table(amp):
+    table = array.array("h", bytes(TABLE_SIZE * 2))
+    for i in range(TABLE_SIZE):
+        table[i] = int(amp * math.sin(2 * math.pi * i / TABLE_SIZE))
+    return table
+
+
+# ================ حلقه‌های native ==================
+# phase و inc اعداد 24 بیتی (small int روی ESP32، بدون تخصیص حافظه)؛ 10 بیت بالا = اندیس جدول
+@native
+def _add_tone(buf, n, table, phase, inc):
+    for i in range(n):
+        buf[i] += table[phase >> 14]
+        phase = (phase + inc) & 0xFFFFFF
+    return phase
+
+
+@native
+def _clear(buf, n):
+    for i in range(n):
+        buf[i] = 0
+
+
+@native
+def _scale(buf, n, amp):
+    for i in range(n):
+        buf[i] = (buf[i] * amp) >> 15
+
+
+def _inc(freq, rate):
+    return int(freq * 16777216 / rate) & 0xFFFFFF
+
+
+# ================ سیگنال‌ها (generator بلوک‌ها) ==================
+# هر generator بلوک‌های bytes-like تا مجموعاً frames نمونه می‌دهد
+def sine(frames, rate, freq=440, amp=10000):
+    freq = int(freq)
+    period = rate // _gcd(rate, freq)  # کوتاه‌ترین طول با تعداد دوره کامل
+    if period > MAX_PERIOD:
+        yield from multitone(frames, rate, (freq,), amp)
+        return
+
+    one = array.array("h", bytes(period * 2))
+    for n in range(period):
+        one[n] = int(amp * math.sin(2 * math.pi * freq * n / rate))
+    # بلوک = چند دوره کامل پشت سر هم (فقط کپی بایت)
+    block = bytes(one) * max(1, BLOCK // period)
+    step = len(block) // 2
+    while frames >= step:
+        yield block
+        frames -= step
+    if frames:
+        yield memoryview(block)[:frames * 2]
+
+
+def multitone(frames, rate, freqs=(100, 440, 1000, 5000), amp=10000):
+    table = sine_table(amp // len(freqs))
+    incs = [_inc(f, rate) for f in freqs]
+    phases = [0] * len(freqs)
+    buf = array.array("h", bytes(BLOCK * 2))
+    while frames > 0:
+        n = min(BLOCK, frames)
+        _clear(buf, n)
+        for t in range(len(freqs)):
+            phases[t] = _add_tone(buf, n, table, phases[t], incs[t])
+        yield memoryview(buf)[:n]
+        frames -= n
+
+
+def sweep(frames, rate, f0=20, f1=None, amp=10000):
+    """sweep نمایی؛ فرکانس در هر بلوک 256 نمونه‌ای به‌روز می‌شود"""
+    f1 = f1 or rate * 0.45
+    table = sine_table(amp)
+    step = 256
+    ratio = math.exp(math.log(f1 / f0) * step / max(1, frames))
+    freq = f0
+    phase = 0
+    buf = array.array("h", bytes(BLOCK * 2))
+    while frames > 0:
+        n = min(BLOCK, frames)
+        _clear(buf, n)
+        for start in range(0, n, step):
+            part = memoryview(buf)[start:]
+            phase = _add_tone(part, min(step, n - start), table, phase, _inc(freq, rate))
+            freq *= ratio
+        yield memoryview(buf)[:n]
+        frames -= n
+
+
+def impulse(frames, rate, interval=1.0, amp=10000):
+    """یک نمونه غیرصفر هر interval ثانیه"""
+    every = max(1, int(interval * rate))
+    buf = array.array("h", bytes(BLOCK * 2))
+    pos = 0
+    while frames > 0:
+        n = min(BLOCK, frames)
+        _clear(buf, n)
+        first = -pos % every
+        for i in range(first, n, every):
+            buf[i] = amp
+        yield memoryview(buf)[:n]
+        pos += n
+        frames -= n
+
+
+def noise(frames, rate, amp=10000):
+    """نویز سفید از os.urandom (بدون random.getrandbits برای هر نمونه)"""
+    while frames > 0:
+        n = min(BLOCK, frames)
+        buf = array.array("h", os.urandom(n * 2))
+        _scale(buf, n, amp)
+        yield buf
+        frames -= n
+
+
+SIGNALS = {
+    "sine": sine,
+    "multitone": multitone,
+    "sweep": sweep,
+    "impulse": impulse,
+    "noise": noise,
+}
+
+
+# ================ نوشتن فایل ==================
+def create(filename, kind="sine", seconds=2, rate=16000, **params):
+    """ساخت WAV مونو 16 بیت؛ خروجی: تعداد نمونه"""
+    frames = int(rate * seconds)
+    with open(filename, "wb") as f:
+        f.write(wav_header(rate, frames))
+        for block in SIGNALS[kind](frames, rate, **params):
+            f.write(block)
+    return frames
@@ -0,0 +1,198 @@
+# variants.py - انتخاب خودکار بهترین نسخه آهنگ‌ها برای این کارت و این برد
+# روی PC: python batch_convert.py MUSIC /media/sd/music --variants stereo44k,stereo44k_adpcm,mono16k
+# اینجا سرعت پایدار خواندن SD و حافظه آزاد اندازه گرفته می‌شود و بالاترین کیفیتی که
+# بدون لرزش پخش می‌شود انتخاب می‌شود (همان بررسی 172 KB/s در diagnose_problem، ولی خودکار)
+# نتیجه در ROOT/.variant روی خود کارت ذخیره می‌شود (برای هر برد یک خط)،
+# پس اندازه‌گیری فقط بار اول یا با remeasure=True انجام می‌شود
+
+from machine import I2S, Pin
+import gc
+import machine
+import os
+import time
+import ubinascii
+
+import library
+from pack_player import play_entry
+
+
+VARIANTS_NAME = "variants.txt"
+CHOICE_NAME = ".variant"
+SAFETY_MARGIN = 0.8       # مثل profiles.py: حداکثر 80% سرعت پایدار SD
+MEASURE_BYTES = 256 * 1024
+CHUNK_SIZE = 8192
+
+
+def load_variants(root):
+    """variants.txt -> لیست (name, byte_rate, rate, channels, format, heap)، بهترین اول"""
+    variants = []
+    with open(f"{root}/{VARIANTS_NAME}") as f:
+        if not f.readline().startswith("VAR\t"):
+            raise ValueError("Not a variants manifest")
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) == 6:
+                variants.append((parts[0], int(parts[1]), int(parts[2]), int(parts[3]),
+                                 parts[4], int(parts[5])))
+    return variants
+
+
+def unit_id():
+    return ubinascii.hexlify(machine.unique_id()).decode()
+
+
+# ================ اندازه‌گیری ==================
+def measure_speed(folder, nbytes=MEASURE_BYTES, chunk=CHUNK_SIZE):
+    """
+    سرعت خواندن پشت سر هم از بزرگ‌ترین WAV پوشه (KB/s)
+    با همان اندازه بافر پلیر و readinto (بدون تخصیص حافظه در حلقه)
+    """
+    entries = library.update(folder)
+    if not entries:
+        return None
+    rec = max(entries, key=lambda r: r[1])
+
+    buf = bytearray(chunk)
+    got = 0
+    with open(f"{folder}/{rec[0]}", "rb") as f:
+        f.seek(rec[2])
+        start = time.ticks_us()
+        while got < nbytes:
+            n = f.readinto(buf)
+            if not n:
+                break
+            got += n
+        elapsed = time.ticks_diff(time.ticks_us(), start)
+    if got == 0 or elapsed <= 0:
+        return None
+    return got / 1024 / (elapsed / 1000000)
+
+
+def load_choices(root):
+    """ROOT/.variant -> {unit_id: (name, speed)}"""
+    choices = {}
+    try:
+        with open(f"{root}/{CHOICE_NAME}") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 3:
+                    choices[parts[0]] = (parts[1], float(parts[2]))
+    except OSError:
+        pass
+    return choices
+
+
+def save_choices(root, choices):
+    path = f"{root}/{CHOICE_NAME}"
+    with open(path + ".tmp", "w") as f:
+        for unit, (name, speed) in choices.items():
+            f.write(f"{unit}\t{name}\t{speed:.0f}\n")
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    os.rename(path + ".tmp", path)
+
+
+def choose_variant(root="/sd/music", remeasure=False, margin=SAFETY_MARGIN):
+    """
+    بالاترین کیفیتی که سرعت SD و heap آزاد برایش کافی است
+    خروجی: (پوشه نسخه، نام نسخه)
+    """
+    variants = load_variants(root)
+    names = [v[0] for v in variants]
+    unit = unit_id()
+    choices = load_choices(root)
+
+    cached = choices.get(unit)
+    if cached and cached[0] in names and not remeasure:
+        print(f"💾 Variant {cached[0]} (measured {cached[1]:.0f} KB/s)")
+        return f"{root}/{cached[0]}", cached[0]
+
+    # سنگین‌ترین نسخه برای اندازه‌گیری (فایل‌های بزرگ‌تر = اندازه‌گیری دقیق‌تر)
+    heaviest = max(variants, key=lambda v: v[1])[0]
+    speed = measure_speed(f"{root}/{heaviest}") or 0
+    gc.collect()
+    heap = gc.mem_free()
+    print(f"📊 SD: {speed:.0f} KB/s, free heap: {heap // 1024} KB")
+
+    chosen = variants[-1][0]  # هیچ‌کدام جا نشد: سبک‌ترین
+    for name, byte_rate, rate, channels, fmt, need in variants:
+        if byte_rate / 1024 <= speed * margin and need <= heap:
+            chosen = name
+            break
+        print(f"  ✗ {name}: needs {byte_rate / 1024:.0f} KB/s, {need // 1024} KB heap")
+    print(f"✓ Variant {chosen}")
+
+    choices[unit] = (chosen, speed)
+    save_choices(root, choices)
+    return f"{root}/{chosen}", chosen
+
+
+# ================ پخش ==================
+def play_best(root="/sd/music", remeasure=False, sck=26, ws=25, sd=22, ibuf=20480):
+    """پخش همه آهنگ‌های نسخه انتخاب‌شده (PCM یا ADPCM) به ترتیب نام"""
+    folder, _ = choose_variant(root, remeasure)
+    entries = library.update(folder)
+    print(f"\n🎵 {len(entries)} songs in {folder}")
+
+    gc.collect()
+    buf = bytearray(CHUNK_SIZE)
+    audio_out = None
+    current = None
+    try:
+        for i, rec in enumerate(entries, 1):
+            entry = library.as_entry(rec)
+            rate, channels = entry[3], entry[5]
+            print(f"[{i}/{len(entries)}] {rec[0]} ({rate}Hz, {channels}ch)")
+
+            if current != (rate, channels):
+                if audio_out:
+                    audio_out.deinit()
+                audio_out = I2S(
+                    0,
+                    sck=Pin(sck),
+                    ws=Pin(ws),
+                    sd=Pin(sd),
+                    mode=I2S.TX,
+                    bits=16,
+                    format=I2S.MONO if channels == 1 else I2S.STEREO,
+                    rate=rate,
+                    ibuf=ibuf
+                )
+                current = (rate, channels)
+
+            with open(f"{folder}/{rec[0]}", "rb") as f:
+                play_entry(f, audio_out, entry, buf)
+
+        print("\n✓ Playlist complete!")
+    finally:
+        if audio_out:
+            audio_out.deinit()
+
+
+# ================ تابع اصلی ==================
+def main():
+    import sdcard
+    from machine import SPI
+
+    spi = SPI(1,
+              baudrate=20000000,
+              polarity=0,
+              phase=0,
+              sck=Pin(18),
+              mosi=Pin(23),
+              miso=Pin(19))
+
+    sd = sdcard.SDCard(spi, Pin(5))
+    try:
+        os.umount("/sd")
+    except:
+        pass
+    os.mount(sd, "/sd")
+
+    play_best("/sd/music")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+# adpcm.py - انکودر IMA-ADPCM (فشرده‌سازی 4:1) برای WAV
+# هر نمونه 16bit به 4bit تبدیل می‌شود؛ SD و WiFi یک‌چهارم داده می‌خوانند
+# دیکودر سمت دستگاه: MICROPYTHON/adpcm_player.py
+#
+# ساختار هر بلوک (استاندارد WAV / فرمت 0x11):
+#   برای هر کانال 4 بایت هدر: نمونه اول (int16)، step index، صفر
+#   سپس داده‌ها در گروه‌های 4 بایتی (8 نمونه) یکی در میان برای هر کانال
+#   در هر بایت اول nibble پایین و بعد nibble بالا
+
+import array
+import audioop  # از پایتون 3.13 حذف شده؛ آنجا پکیج audioop-lts (pyproject.toml) همین ماژول است
+import struct
+
+from wav_writer import WavWriter, WAVE_FORMAT_IMA_ADPCM
+
+
+# بلوک‌ها مضرب 512 هستند تا با سکتورهای SD هم‌راستا باشند
+BLOCK_ALIGN = {1: 512, 2: 1024}
+
+STEP_TABLE = (
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31,
+    34, 37, 41, 45, 50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143,
+    157, 173, 190, 209, 230, 253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658,
+    724, 796, 876, 963, 1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024,
+    3327, 3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442, 11487, 12635, 13899,
+    15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794, 32767,
+)
+
+# audioop اول nibble بالا را می‌نویسد، WAV اول nibble پایین را
+_SWAP_NIBBLES = bytes(((b & 0x0F) << 4) | (b >> 4) for b in range(256))
+
+
+def samples_per_block(channels, block_align=None):
+    """تعداد فریم در هر بلوک (برای 512/1024 بایت = 1017)"""
+    block_align = block_align or BLOCK_ALIGN[channels]
+    return (block_align - 4 * channels) * 2 // channels + 1
+
+
+def byte_rate(rate, channels):
+    """بایت در ثانیه روی SD برای این فرمت"""
+    block_align = BLOCK_ALIGN[channels]
+    return rate * block_align // samples_per_block(channels)
+
+
+# ================ انکودر ==================
+class AdpcmEncoder:
+    """
+    انکودر stream: PCM شانزده‌بیتی interleaved می‌گیرد و بلوک کامل برمی‌گرداند
+    وضعیت (step index) بین بلوک‌ها حفظ می‌شود
+    """
+
+    def __init__(self, channels):
+        self.channels = channels
+        self.block_align = BLOCK_ALIGN[channels]
+        self.frames_per_block = samples_per_block(channels)
+        self.block_pcm_bytes = self.frames_per_block * channels * 2
+        self.index = [0] * channels
+        self.pending = bytearray()
+
+    def encode(self, pcm):
+        """اضافه کردن PCM و برگرداندن (بلوک‌های کامل، تعداد فریم)"""
+        self.pending += pcm
+        full = len(self.pending) // self.block_pcm_bytes
+        if not full:
+            return b'', 0
+
+        size = full * self.block_pcm_bytes
+        chunk = bytes(self.pending[:size])
+        del self.pending[:size]
+
+        out = bytearray()
+        for i in range(full):
+            start = i * self.block_pcm_bytes
+            out += self.encode_block(chunk[start:start + self.block_pcm_bytes])
+        return bytes(out), full * self.frames_per_block
+
+    def flush(self):
+        """بلوک آخر (ناقص) با سکوت پر می‌شود؛ تعداد فریم واقعی برگردانده می‌شود"""
+        if not self.pending:
+            return b'', 0
+        frames = len(self.pending) // (2 * self.channels)
+        block = bytes(self.pending) + bytes(self.block_pcm_bytes - len(self.pending))
+        self.pending = bytearray()
+        return self.encode_block(block), frames
+
+    def encode_block(self, pcm):
+        """یک بلوک کامل PCM -> یک بلوک ADPCM"""
+        header = bytearray()
+        bodies = []
+
+        for ch in range(self.channels):
+            if self.channels == 1:
+                mono = pcm
+            else:
+                factors = [0.0] * self.channels
+                factors[ch] = 1.0
+                mono = audioop.tomono(pcm, 2, *factors)
+
+            first = struct.unpack_from('<h', mono, 0)[0]
+            header += struct.pack('<hBB', first, self.index[ch], 0)
+
+            data, (_, self.index[ch]) = audioop.lin2adpcm(mono[2:], 2, (first, self.index[ch]))
+            bodies.append(data.translate(_SWAP_NIBBLES))
+
+        if self.channels == 1:
+            return bytes(header) + bodies[0]
+
+        # interleave گروه‌های 4 بایتی کانال‌ها
+        words = array.array('I', bytes(len(bodies[0]) * self.channels))
+        for ch, body in enumerate(bodies):
+            words[ch::self.channels] = array.array('I', body)
+        return bytes(header) + words.tobytes()
+
+
+class AdpcmWriter:
+    """
+    همان رابط WavWriter، ولی PCM ورودی را به ADPCM تبدیل می‌کند:
+        with AdpcmWriter("out.wav", 44100, 2) as w:
+            w.write(pcm_bytes)
+    """
+
+    def __init__(self, path, rate, channels, sample_width=2, align=0):
+        if sample_width != 2:
+            raise ValueError("IMA-ADPCM needs 16-bit input")
+        self.encoder = AdpcmEncoder(channels)
+        spb = self.encoder.frames_per_block
+        self.wav = WavWriter(path, rate, channels,
+                             format_tag=WAVE_FORMAT_IMA_ADPCM,
+                             bits=4,
+                             block_align=self.encoder.block_align,
+                             byte_rate=byte_rate(rate, channels),
+                             fmt_extra=struct.pack('<H', spb),
+                             align=align)
+
+    @property
+    def frames(self):
+        return self.wav.frames
+
+    def add_chunk(self, cid, payload):
+        self.wav.add_chunk(cid, payload)
+
+    def write(self, pcm):
+        data, frames = self.encoder.encode(pcm)
+        if data:
+            self.wav.write(data, frames)
+
+    def close(self):
+        if self.wav.f is None:
+            return
+        data, frames = self.encoder.flush()
+        if data:
+            self.wav.write(data, frames)
+        self.wav.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ================ دیکودر مرجع ==================
+def decode_block(block, channels):
+    """
+    دیکود یک بلوک به PCM شانزده‌بیتی interleaved
+    همان الگوریتم دیکودر viper در MICROPYTHON/adpcm_player.py (برای تست روی PC)
+    """
+    spb = (len(block) - 4 * channels) * 2 // channels + 1
+    out = array.array('h', bytes(spb * channels * 2))
+
+    for ch in range(channels):
+        pred, index = struct.unpack_from('<hB', block, ch * 4)
+        out[ch] = pred
+        pos = channels * 4 + ch * 4
+        frame = 1
+
+        while pos < len(block):
+            for byte in block[pos:pos + 4]:
+                for code in (byte & 0x0F, byte >> 4):
+                    step = STEP_TABLE[index]
+                    diff = step >> 3
+                    if code & 4:
+                        diff += step
+                    if code & 2:
+                        diff += step >> 1
+                    if code & 1:
+                        diff += step >> 2
+                    pred = pred - diff if code & 8 else pred + diff
+                    pred = max(-32768, min(32767, pred))
+
+                    index += -1 if code & 7 < 4 else ((code & 7) - 3) * 2
+                    index = max(0, min(88, index))
+
+                    out[frame * channels + ch] = pred
+                    frame += 1
+            pos += channels * 4
+
+    return out.tobytes()
@@ -0,0 +1,296 @@
+# artwork.py - عنوان و کاور آهنگ به صورت bitmap آماده برای OLED (SSD1306 128x64)
+# ESP32 در هر فریم اسم آهنگ را دو بار با oled.text رسم می‌کرد و فقط اسم فایل را داشت؛
+# اینجا تگ‌های فایل (عنوان، خواننده، کاور) یک بار روی PC خوانده و به bitmap یک‌بیتی
+# تبدیل می‌شوند و در یک فایل کوچک کنار WAV ذخیره می‌شوند (LastNight.wav -> LastNight.art)
+# دستگاه فقط bitmap را در framebuf می‌گذارد و blit می‌کند (MICROPYTHON/oled_art.py)
+#
+# فرمت فایل .art:
+#   هدر 16 بایت: b'OART', version (u8), 0 (u8), strip_width (u16), strip_height (u8),
+#                cover_size (u8، 0 = بدون کاور), 0 (u16), 0 (u32)
+#   سپس نوار عنوان و بعد کاور، هر دو با چیدمان MONO_VLSB (همان حافظه خود SSD1306):
+#   برای هر ردیف 8 پیکسلی (page)، یک بایت برای هر ستون، بیت 0 = بالاترین پیکسل
+
+import os
+import struct
+import subprocess
+import unicodedata
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, features
+
+
+ART_MAGIC = b'OART'
+ART_VERSION = 1
+ART_HEADER = struct.Struct('<4sBBHBBHI')
+
+STRIP_HEIGHT = 16     # بالای صفحه، بالای ویژوالایزر (64 - 44 = 20 پیکسل)
+STRIP_MAX_WIDTH = 2048
+FONT_SIZE = 12
+FONT_NAMES = ('DejaVuSans.ttf', 'arial.ttf')
+COVER_SIZE = 64       # نیمه چپ صفحه
+
+# عنوان‌های فارسی/عربی: Pillow بدون libraqm حروف را جدا و از چپ به راست می‌چیند
+# با raqm همان کار را خود Pillow می‌کند؛ بدون آن _shape_rtl شکل چسبیده هر حرف
+# (Presentation Forms یونیکد) و ترتیب نمایش راست به چپ را می‌سازد
+# (کافی برای عنوان آهنگ؛ علامت‌های کنترل bidi و متن‌های چندخطی پشتیبانی نمی‌شوند)
+RAQM = features.check('raqm')
+
+
+def artwork_path(wav_path):
+    """مسیر فایل sidecar کنار WAV"""
+    return os.path.splitext(wav_path)[0] + '.art'
+
+
+# ================ خواندن تگ‌ها ==================
+def read_tags(input_path):
+    """
+    تگ‌های فایل با ffmpeg (ID3 در mp3، Vorbis comment در flac/ogg، ...)
+    خروجی: دیکشنری با کلیدهای حروف کوچک
+    """
+    proc = subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-nostdin', '-i', input_path, '-f', 'ffmetadata', 'pipe:1'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    tags = {}
+    if proc.returncode != 0:
+        return tags
+
+    for line in proc.stdout.decode('utf-8', 'replace').splitlines():
+        if not line or line.startswith((';', '[')) or '=' not in line:
+            continue
+        key, value = line.split('=', 1)
+        # ffmetadata کاراکترهای = ; # \ را با \ escape می‌کند
+        value = value.replace('\\=', '=').replace('\\;', ';').replace('\\#', '#').replace('\\\\', '\\')
+        tags.setdefault(key.lower(), value.strip())
+    return tags
+
+
+def read_cover(input_path, size=COVER_SIZE):
+    """
+    کاور (تصویر ضمیمه فایل) به صورت آرایه خاکستری (size, size) uint8 با ffmpeg
+    تصویر با حفظ نسبت کوچک و وسط صفحه سیاه گذاشته می‌شود؛ بدون کاور: None
+    """
+    fit = (f'scale={size}:{size}:force_original_aspect_ratio=decrease,'
+           f'pad={size}:{size}:(ow-iw)/2:(oh-ih)/2')
+    proc = subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-nostdin', '-i', input_path,
+         '-map', '0:v:0', '-frames:v', '1', '-vf', fit,
+         '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    if proc.returncode != 0 or len(proc.stdout) < size * size:
+        return None
+    return np.frombuffer(proc.stdout[:size * size], dtype=np.uint8).reshape(size, size)
+
+
+# ================ رسم ==================
+def _load_font(size=FONT_SIZE):
+    layout = ImageFont.Layout.RAQM if RAQM else ImageFont.Layout.BASIC
+    for name in FONT_NAMES:
+        try:
+            return ImageFont.truetype(name, size, layout_engine=layout)
+        except OSError:
+            continue
+    return ImageFont.load_default(size)
+
+
+def _presentation_forms():
+    """حرف عربی/فارسی -> {'isolated'/'initial'/'medial'/'final': کاراکتر}"""
+    forms = {}
+    for code in [*range(0xFB50, 0xFE00), *range(0xFE70, 0xFF00)]:
+        parts = unicodedata.decomposition(chr(code)).split()
+        if len(parts) == 2 and parts[0] in ('<isolated>', '<initial>', '<medial>', '<final>'):
+            forms.setdefault(chr(int(parts[1], 16)), {}).setdefault(parts[0][1:-1], chr(code))
+    return forms
+
+
+FORMS = _presentation_forms()
+# لام + الف یک لیگاتور اجباری است: (تنها، چسبیده به قبل)
+LAM_ALEF = {'\u0627': '\uFEFB\uFEFC', '\u0622': '\uFEF5\uFEF6',
+            '\u0623': '\uFEF7\uFEF8', '\u0625': '\uFEF9\uFEFA'}
+MIRROR = str.maketrans('()[]{}<>«»', ')(][}{><»«')
+BRACKETS = {'(': ')', '[': ']', '{': '}', '«': '»'}
+
+
+def _is_rtl(ch):
+    return unicodedata.bidirectional(ch) in ('R', 'AL')
+
+
+def _join_shapes(text):
+    """هر حرف با شکل اول/وسط/آخر/تنها بسته به حرف‌های کناری (اعراب Mn شفاف هستند)"""
+    letters = [i for i, ch in enumerate(text) if unicodedata.category(ch) != 'Mn']
+    out = list(text)
+    merged = set()
+    for k, i in enumerate(letters):
+        ch = text[i]
+        if i in merged or ch not in FORMS:
+            continue
+        prev = text[letters[k - 1]] if k > 0 else None
+        after = text[letters[k + 1]] if k + 1 < len(letters) else None
+        joins_prev = prev in FORMS and 'medial' in FORMS[prev]
+        if ch == '\u0644' and after in LAM_ALEF:
+            out[i] = LAM_ALEF[after][1 if joins_prev else 0]
+            out[letters[k + 1]] = ''
+            merged.add(letters[k + 1])
+            continue
+        forms = FORMS[ch]
+        joins_next = 'initial' in forms and after in FORMS and 'final' in FORMS[after]
+        if joins_prev and joins_next:
+            form = 'medial'
+        elif joins_prev:
+            form = 'final'
+        elif joins_next:
+            form = 'initial'
+        else:
+            form = 'isolated'
+        out[i] = forms.get(form, forms.get('isolated', ch))
+    return ''.join(out)
+
+
+def _visual_order(text):
+    """
+    ترتیب منطقی -> ترتیب نمایش (نسخه ساده الگوریتم bidi برای یک خط):
+    تکه‌های راست‌به‌چپ برعکس می‌شوند، اعداد و لاتین داخلشان چپ‌به‌راست می‌مانند
+    """
+    strong = ['R' if _is_rtl(ch) else 'L' if unicodedata.bidirectional(ch) in ('L', 'EN', 'AN')
+              else None for ch in text]
+    base = next((d for d in strong if d), 'L')
+
+    # جفت پرانتزها یک جهت دارند: جهت پاراگراف، مگر داخل و قبلشان هر دو جهت مخالف باشند
+    stack = []
+    for i, ch in enumerate(text):
+        if ch in BRACKETS:
+            stack.append((BRACKETS[ch], i))
+        elif stack and ch == stack[-1][0]:
+            _, start = stack.pop()
+            inside = {d for d in strong[start + 1:i] if d}
+            if inside and base not in inside:
+                before = next((x for x in reversed(strong[:start]) if x), base)
+                strong[start] = strong[i] = before
+            elif inside:
+                strong[start] = strong[i] = base
+
+    # خنثی‌ها (فاصله، خط تیره) جهت دو طرف را می‌گیرند اگر یکی باشد، وگرنه جهت پاراگراف
+    resolved = []
+    for i, d in enumerate(strong):
+        if d is None:
+            before = next((x for x in reversed(strong[:i]) if x), base)
+            after = next((x for x in strong[i + 1:] if x), base)
+            d = before if before == after else base
+        resolved.append(d)
+
+    runs = []
+    for ch, d in zip(text, resolved):
+        if runs and runs[-1][0] == d:
+            runs[-1][1].append(ch)
+        else:
+            runs.append((d, [ch]))
+    pieces = [''.join(reversed(chars)).translate(MIRROR) if d == 'R' else ''.join(chars)
+              for d, chars in runs]
+    return ''.join(reversed(pieces) if base == 'R' else pieces)
+
+
+def _shape_rtl(text):
+    """متن برای layout ساده Pillow؛ متن بدون حرف راست‌به‌چپ دست نمی‌خورد"""
+    if RAQM or not any(_is_rtl(ch) for ch in text):
+        return text
+    return _visual_order(_join_shapes(text))
+
+
+def title_text(input_path, tags):
+    """'عنوان - خواننده'، یا اسم فایل اگر تگ عنوان نبود"""
+    title = tags.get('title') or os.path.splitext(os.path.basename(input_path))[0]
+    artist = tags.get('artist') or tags.get('album_artist')
+    return f"{title} - {artist}" if artist else title
+
+
+def render_strip(text, height=STRIP_HEIGHT, font=None):
+    """نوار عنوان یک‌بیتی: آرایه bool (height, width)"""
+    font = font or _load_font()
+    text = _shape_rtl(text)
+    left, top, right, bottom = font.getbbox(text)
+    width = max(1, min(STRIP_MAX_WIDTH, right))
+    image = Image.new('L', (width, height), 0)
+    # وسط عمودی نوار
+    ImageDraw.Draw(image).text((0, (height - (bottom + top)) // 2), text, fill=255, font=font)
+    return np.asarray(image) >= 128
+
+
+def dither(gray):
+    """Floyd-Steinberg: خاکستری uint8 -> آرایه bool (True = پیکسل روشن)"""
+    img = gray.astype(np.float32)
+    h, w = img.shape
+    out = np.zeros((h, w), dtype=bool)
+    for y in range(h):
+        row = img[y]
+        for x in range(w):
+            old = row[x]
+            on = old >= 128
+            out[y, x] = on
+            err = old - (255.0 if on else 0.0)
+            if x + 1 < w:
+                row[x + 1] += err * 7 / 16
+            if y + 1 < h:
+                below = img[y + 1]
+                if x > 0:
+                    below[x - 1] += err * 3 / 16
+                below[x] += err * 5 / 16
+                if x + 1 < w:
+                    below[x + 1] += err * 1 / 16
+    return out
+
+
+def pack_vlsb(bits):
+    """آرایه bool (h, w) -> بایت‌های MONO_VLSB (ارتفاع به مضرب 8 گرد می‌شود)"""
+    h, w = bits.shape
+    pages = -(-h // 8)
+    padded = np.zeros((pages * 8, w), dtype=bool)
+    padded[:h] = bits
+    return np.packbits(padded.reshape(pages, 8, w), axis=1, bitorder='little').tobytes()
+
+
+def render(input_path, font=None):
+    """
+    ساخت bitmap ها از فایل ورودی
+    خروجی: (نوار عنوان bool، کاور bool یا None)
+    """
+    tags = read_tags(input_path)
+    strip = render_strip(title_text(input_path, tags), font=font)
+    cover = read_cover(input_path)
+    return strip, (dither(cover) if cover is not None else None)
+
+
+# ================ فایل .art ==================
+def write_sidecar(path, strip, cover=None):
+    """
+    نوشتن فایل .art
+    اول در فایل موقت و بعد replace؛ فایل قبلی ممکن است hardlink به کش باشد
+    """
+    height, width = strip.shape
+    size = cover.shape[0] if cover is not None else 0
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(ART_HEADER.pack(ART_MAGIC, ART_VERSION, 0, width, height, size, 0, 0))
+        f.write(pack_vlsb(strip))
+        if cover is not None:
+            f.write(pack_vlsb(cover))
+    os.replace(tmp, path)
+    return path
+
+
+def read_sidecar(path):
+    """خواندن فایل .art -> (نوار عنوان bool، کاور bool یا None)"""
+    with open(path, 'rb') as f:
+        magic, version, _, width, height, size, _, _ = ART_HEADER.unpack(f.read(ART_HEADER.size))
+        if magic != ART_MAGIC:
+            raise ValueError("Not an artwork sidecar")
+        data = f.read()
+
+    def unpack(raw, h, w):
+        pages = -(-h // 8)
+        bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8).reshape(pages, 1, w),
+                             axis=1, bitorder='little')
+        return bits.reshape(pages * 8, w)[:h].astype(bool)
+
+    strip_bytes = -(-height // 8) * width
+    strip = unpack(data[:strip_bytes], height, width)
+    cover = unpack(data[strip_bytes:], size, size) if size else None
+    return strip, cover
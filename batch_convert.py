@@ -0,0 +1,410 @@
+# batch_convert.py - تبدیل دسته‌ای کل کتابخانه با استفاده از همه هسته‌های CPU
+# استفاده:
+#   python batch_convert.py MUSIC_DIR OUTPUT_DIR --workers 8
+
+import argparse
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import converter
+from catalog import AUDIO_EXTENSIONS, open_catalog, record_conversions, scan, stale_outputs
+from converter import ENGINES, INLINE_ANALYSIS, convert_fanout, convert_track
+from library_index import INDEX_NAME, update_index
+from profiles import DEFAULT_PROFILE, PROFILES, check_budget, describe, get_profile
+from transcode_cache import TranscodeCache
+from variants import parse_variants, write_manifest
+from wav_writer import SECTOR_SIZE
+
+
+# ================ پیدا کردن فایل‌ها ==================
+def find_tracks(source_dir, dest_dir, extensions=AUDIO_EXTENSIONS):
+    """
+    پیمایش درخت پوشه‌ها و ساخت لیست (ورودی، خروجی)
+    ساختار پوشه‌ها در مقصد حفظ می‌شود
+    """
+    jobs = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(extensions):
+                continue
+            src = os.path.join(root, name)
+            rel = os.path.relpath(src, source_dir)
+            dst = os.path.join(dest_dir, os.path.splitext(rel)[0] + '.wav')
+            jobs.append((src, dst))
+    return jobs
+
+
+# ================ کار هر پروسس ==================
+def _convert_job(src, dst, options, cache_dir=None, cache_bytes=0):
+    """اجرا در پروسس کارگر - خطا را برمی‌گرداند تا کل دسته متوقف نشود"""
+    try:
+        os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+        if cache_dir:
+            cache = TranscodeCache(cache_dir, cache_bytes)
+            return cache.convert(convert_track, src, dst, **options)
+
+        # خروجی قبلی ممکن است hardlink به کش باشد؛ اول حذفش کن
+        if os.path.exists(dst):
+            os.remove(dst)
+        return convert_track(src, dst, **options)
+    except Exception as e:
+        return {'input': src, 'output': dst, 'error': str(e)}
+
+
+def _fanout_job(src, outputs, cache_dir=None, cache_bytes=0):
+    """چند خروجی از یک منبع با یک دیکود (convert_fanout)؛ خروجی: لیست نتیجه‌ها"""
+    try:
+        for dst, _ in outputs:
+            os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+        if cache_dir:
+            cache = TranscodeCache(cache_dir, cache_bytes)
+            results = cache.convert_many(convert_fanout, src, outputs)
+        else:
+            for dst, _ in outputs:
+                if os.path.exists(dst):
+                    os.remove(dst)
+            results = convert_fanout(src, outputs)
+        for result in results:
+            result.setdefault('fanout', len(outputs))
+        return results
+    except Exception as e:
+        return [{'input': src, 'output': dst, 'error': str(e)} for dst, _ in outputs]
+
+
+def _detach_worker():
+    """
+    initializer کارگر: Ctrl+C ترمینال به کل process group فرستاده می‌شود؛
+    کارگر و ffmpeg های آن (pydub و ffmpeg-python هم) در session جدا هستند و SIGINT را
+    نادیده می‌گیرند، پس فقط پروسس اصلی تصمیم می‌گیرد کارها تمام شوند یا نه
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(os, 'setsid'):
+        os.setsid()
+
+
+def _init_worker(detach, ranges):
+    """
+    initializer کارگر: موتور parallel در هر کارگر فقط سهم خودش از هسته‌ها را
+    بازه‌بندی می‌کند، وگرنه workers کارگر هر کدام cpu_count پروسس ffmpeg می‌ساختند
+    """
+    converter.PARALLEL_RANGES = ranges
+    if detach:
+        _detach_worker()
+
+
+def _make_executor(workers, detach=False):
+    """
+    Pool با تعداد کارگر مشخص
+    در پایتون 3.11+ هر کارگر بعد از چند فایل بازسازی می‌شود تا حافظه آزاد شود
+    detach: کارگرها با Ctrl+C نمی‌میرند (watch_convert کارهای در حال اجرا را تمام می‌کند)
+    """
+    kwargs = {'max_workers': workers,
+              'initializer': _init_worker,
+              'initargs': (detach, max(1, (os.cpu_count() or 1) // workers))}
+    if sys.version_info >= (3, 11):
+        kwargs['max_tasks_per_child'] = 16
+    return ProcessPoolExecutor(**kwargs)
+
+
+# ================ گزارش ==================
+def format_result(index, total, result, source_dir, dest_dir=None):
+    """یک خط گزارش برای هر فایل"""
+    rel = os.path.relpath(result['input'], source_dir)
+    if result.get('fanout') and dest_dir:
+        # چند خروجی از یک ورودی: کدام نسخه
+        rel += f" -> {os.path.relpath(result['output'], dest_dir)}"
+
+    if 'error' in result:
+        return f"✗ [{index}/{total}] {rel}: {result['error']}"
+
+    if result.get('cached'):
+        return f"⚡ [{index}/{total}] {rel} (cached, {result['elapsed']:.2f}s)"
+
+    elapsed = result['elapsed'] or 1e-9
+    realtime = result['duration'] / elapsed
+    speed = result['bytes_in'] / elapsed / 1024 / 1024
+    line = (f"✓ [{index}/{total}] {rel} "
+            f"({result['duration']:.1f}s audio in {elapsed:.2f}s, "
+            f"{realtime:.1f}x realtime, {speed:.2f} MB/s)")
+
+    stats = result.get('loudness')
+    if stats:
+        line += f" | {stats['lufs']:.1f} LUFS, peak {stats['peak']:.1f} dB, gain {stats['gain']:+.1f} dB"
+
+    trimmed = result.get('trimmed')
+    if trimmed and any(trimmed):
+        line += f" | trimmed {trimmed[0]:.2f}s + {trimmed[1]:.2f}s"
+    return line
+
+
+def print_summary(results, wall_time, workers):
+    """آمار کلی تبدیل"""
+    done = [r for r in results if 'error' not in r]
+    failed = len(results) - len(done)
+    cached = sum(1 for r in done if r.get('cached'))
+
+    audio_seconds = sum(r['duration'] for r in done)
+    bytes_in = sum(r['bytes_in'] for r in done)
+    bytes_out = sum(r['bytes_out'] for r in done)
+    cpu_time = sum(r['elapsed'] for r in done)
+
+    wall_time = wall_time or 1e-9
+
+    print("\n" + "=" * 60)
+    print("📊 Summary")
+    print("=" * 60)
+    print(f"  Files:       {len(done)} converted, {failed} failed, {cached} from cache")
+    print(f"  Workers:     {workers}")
+    print(f"  Wall time:   {wall_time:.1f}s")
+    print(f"  Audio:       {audio_seconds / 60:.1f} min")
+    print(f"  Realtime:    {audio_seconds / wall_time:.1f}x")
+    print(f"  Input:       {bytes_in / 1024 / 1024:.1f} MB ({bytes_in / wall_time / 1024 / 1024:.2f} MB/s)")
+    print(f"  Output:      {bytes_out / 1024 / 1024:.1f} MB")
+    if cpu_time > 0:
+        # نزدیک به تعداد کارگرها یعنی مقیاس‌پذیری خطی
+        print(f"  Parallelism: {cpu_time / wall_time:.2f} of {workers} workers busy")
+    print("=" * 60)
+
+
+# ================ اجرای دسته‌ای ==================
+def run_batch(jobs, workers, source_dir, cache_dir=None, cache_bytes=0, dest_dir=None):
+    """
+    اجرای تبدیل‌ها روی Pool؛ هر کار (ورودی، لیست (خروجی، options))
+    کاری که چند خروجی دارد با یک دیکود ساخته می‌شود (fan-out)
+    فقط workers*2 کار همزمان در صف است تا حافظه محدود بماند
+    """
+    results = []
+    total = sum(len(outputs) for _, outputs in jobs)
+    pending = set()
+    queue = iter(jobs)
+    max_in_flight = workers * 2
+
+    start = time.perf_counter()
+
+    with _make_executor(workers) as pool:
+        while True:
+            # پر کردن صف تا سقف مجاز
+            while len(pending) < max_in_flight:
+                job = next(queue, None)
+                if job is None:
+                    break
+                src, outputs = job
+                if len(outputs) == 1:
+                    dst, options = outputs[0]
+                    pending.add(pool.submit(_convert_job, src, dst, options,
+                                             cache_dir, cache_bytes))
+                else:
+                    pending.add(pool.submit(_fanout_job, src, outputs,
+                                             cache_dir, cache_bytes))
+
+            if not pending:
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done = future.result()
+                for result in done if isinstance(done, list) else [done]:
+                    results.append(result)
+                    print(format_result(len(results), total, result, source_dir, dest_dir))
+
+    return results, time.perf_counter() - start
+
+
+def update_indexes(folders):
+    """به‌روزرسانی library.idx در پوشه‌های خروجی (فقط فایل‌های جدید/تغییرکرده خوانده می‌شوند)"""
+    for folder in folders:
+        if not os.path.isdir(folder):
+            continue
+        try:
+            entries, scanned, removed = update_index(folder)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  {os.path.join(folder, INDEX_NAME)}: {e}")
+            continue
+        print(f"📇 {os.path.join(folder, INDEX_NAME)}: {len(entries)} tracks "
+              f"({scanned} updated, {removed} removed)")
+
+
+def add_conversion_args(parser):
+    """تنظیمات تبدیل مشترک بین batch_convert و watch_convert"""
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: all cores)")
+    parser.add_argument('--profile', default=DEFAULT_PROFILE, choices=sorted(PROFILES),
+                        help="named output format (see profiles.py)")
+    parser.add_argument('--card-speed', type=float,
+                        help="measured sustained SD read speed in KB/s (from test_speed.py)")
+    parser.add_argument('--strict', action='store_true',
+                        help="refuse to convert if the profile exceeds the card speed budget")
+    parser.add_argument('--engine', default='pydub', choices=sorted(ENGINES),
+                        help="pydub decodes whole tracks in RAM, stream keeps memory constant, "
+                             "parallel splits one long track across all cores")
+    parser.add_argument('--quality', default='standard', choices=('fast', 'standard', 'best'),
+                        help="resampler preset for the numpy engine")
+    parser.add_argument('--spectrum', action='store_true',
+                        help="write a .spec sidecar with precomputed visualizer bars")
+    parser.add_argument('--artwork', action='store_true',
+                        help="write an .art sidecar with the title and cover as OLED bitmaps")
+    parser.add_argument('--normalize', type=float, nargs='?', const=-16.0, metavar='LUFS',
+                        help="bake loudness gain into the output (numpy engine, default target -16 LUFS)")
+    parser.add_argument('--trim', action='store_true',
+                        help="cut leading/trailing silence for gapless playlists (numpy engine)")
+    parser.add_argument('--align', type=int, nargs='?', const=SECTOR_SIZE, default=0, metavar='BYTES',
+                        help="start the audio data on a sector (512) or cluster boundary")
+    parser.add_argument('--cache-dir', help="content-addressed transcode cache directory")
+    parser.add_argument('--cache-size', type=int, default=2048,
+                        help="maximum cache size in MB (least recently used files are evicted)")
+
+
+def check_conversion_args(parser, args):
+    if args.normalize is not None and args.engine != 'numpy':
+        parser.error("--normalize needs --engine numpy")
+    if args.trim and args.engine != 'numpy':
+        parser.error("--trim needs --engine numpy")
+    if args.align % SECTOR_SIZE:
+        parser.error(f"--align must be a multiple of {SECTOR_SIZE}")
+
+
+def conversion_options(args):
+    """آرگومان‌های CLI -> options برای convert_track (همین‌ها کلید کش هم هستند)"""
+    options = {'engine': args.engine, 'spectrum': args.spectrum, **get_profile(args.profile)}
+    if args.engine == 'numpy':
+        options['quality'] = args.quality
+        options['normalize'] = args.normalize
+        options['trim'] = args.trim
+    if args.align:
+        options['align'] = args.align
+    if args.artwork:
+        options['artwork'] = True
+    return options
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert a music library to ESP32-friendly WAV files in parallel")
+    parser.add_argument('source', help="source directory (scanned recursively)")
+    parser.add_argument('dest', help="output directory (folder structure is mirrored)")
+    add_conversion_args(parser)
+    parser.add_argument('--overwrite', action='store_true',
+                        help="convert again even if the output already exists")
+    parser.add_argument('--index', action='store_true',
+                        help=f"update {INDEX_NAME} in every output folder for fast listing on the ESP32")
+    parser.add_argument('--catalog', metavar='DB',
+                        help="SQLite catalog (catalog.py): also reconvert outputs whose source "
+                             "changed, and record every conversion")
+    parser.add_argument('--variants', metavar='PROFILES',
+                        help="comma separated profiles to build side by side in DEST/<profile>/; "
+                             "the ESP32 picks the best one its card can play")
+    args = parser.parse_args(argv)
+    check_conversion_args(parser, args)
+    if args.variants:
+        if args.card_speed:
+            parser.error("--card-speed can't be used with --variants (the device measures its card)")
+        try:
+            args.variants = parse_variants(args.variants)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = conversion_options(args)
+
+    # با --variants هر پروفایل پوشه خودش را دارد: DEST/stereo44k/Song.wav ...
+    # و همه نسخه‌های یک آهنگ با یک دیکود ساخته می‌شوند (fan-out)
+    if args.variants:
+        targets = [(name, os.path.join(args.dest, name)) for name in args.variants]
+        if args.engine not in INLINE_ANALYSIS:
+            # شاخه‌های fan-out از resampler خود ffmpeg رد می‌شوند، یعنی خروجی موتور stream
+            if args.engine != 'stream':
+                print(f"⚠️  --variants decodes each track once in ffmpeg: --engine {args.engine} "
+                      f"is replaced by --engine stream (use --engine numpy for the numpy resampler)")
+            options['engine'] = 'stream'
+    else:
+        targets = [(args.profile, args.dest)]
+
+    # ورودی -> لیست (خروجی، options) برای همه پروفایل‌ها
+    grouped = {}
+    for name, dest in targets:
+        job_options = {**options, **get_profile(name)}
+        for src, dst in find_tracks(args.source, dest):
+            grouped.setdefault(src, []).append((dst, job_options))
+    folders = sorted({os.path.dirname(dst) for outputs in grouped.values() for dst, _ in outputs})
+
+    catalog = None
+    stale = set()
+    if args.catalog:
+        catalog = open_catalog(args.catalog)
+        total, scanned, removed, _ = scan(catalog, args.source, 'source', args.workers)
+        # قدیمی = منبع عوض شده، یا با options دیگری (مثلاً --profile جدید) ساخته شده
+        current = {dst: o for outputs in grouped.values() for dst, o in outputs}
+        stale = set(stale_outputs(catalog, current))
+        print(f"📇 {args.catalog}: {total} sources ({scanned} new or changed, {removed} removed), "
+              f"{len(stale)} outputs out of date")
+
+    if not args.overwrite:
+        grouped = {src: [(dst, o) for dst, o in outputs
+                         if not os.path.exists(dst) or os.path.abspath(dst) in stale]
+                   for src, outputs in grouped.items()}
+    jobs = [(src, outputs) for src, outputs in grouped.items() if outputs]
+
+    if not jobs:
+        print("✓ Nothing to convert")
+        finish(args, folders, catalog)
+        return 0
+
+    profile = get_profile(args.profile)
+    if args.card_speed:
+        try:
+            check_budget(profile, args.card_speed, strict=args.strict)
+        except ValueError as e:
+            print(f"⛔ {e}")
+            return 2
+
+    workers = max(1, min(args.workers, len(jobs)))
+
+    print("=" * 60)
+    outputs = sum(len(o) for _, o in jobs)
+    if outputs > len(jobs):
+        print(f"🎵 Converting {len(jobs)} tracks to {outputs} files "
+              f"(one decode per track) with {workers} workers")
+    else:
+        print(f"🎵 Converting {len(jobs)} tracks with {workers} workers")
+    for name, _ in targets:
+        print(f"   {name}: {describe(get_profile(name))}")
+    if options['engine'] == 'parallel':
+        ranges = max(1, (os.cpu_count() or 1) // workers)
+        print(f"   parallel engine: up to {ranges} ranges per track "
+              f"({workers} workers x {ranges} ffmpeg <= {os.cpu_count() or 1} cores)")
+    print("=" * 60 + "\n")
+
+    results, wall_time = run_batch(jobs, workers, args.source,
+                                   args.cache_dir, args.cache_size * 1024 * 1024, args.dest)
+    print_summary(results, wall_time, workers)
+    if catalog:
+        options_for = {dst: o for _, outputs in jobs for dst, o in outputs}
+        record_conversions(catalog, [(r['input'], r['output'], options_for[r['output']])
+                                     for r in results if 'error' not in r])
+    finish(args, folders, catalog)
+
+    return 1 if any('error' in r for r in results) else 0
+
+
+def finish(args, folders, catalog=None):
+    """فایل‌های کمکی دستگاه: variants.txt و library.idx، و خروجی‌ها در کاتالوگ"""
+    if args.variants:
+        path = write_manifest(args.dest, args.variants)
+        print(f"📋 {path}: {', '.join(args.variants)}")
+    if args.index:
+        update_indexes(folders)
+    if catalog:
+        total, scanned, removed, _ = scan(catalog, args.dest, 'output', args.workers)
+        print(f"📇 {args.catalog}: {total} outputs ({scanned} new or changed, {removed} removed)")
+        catalog.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
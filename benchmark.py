@@ -0,0 +1,255 @@
+# benchmark.py - بنچمارک سرعت تبدیل روی PC
+# برای هر (موتور، پروفایل، ورودی): زمان، ضریب realtime و بیشترین RAM پروسس تبدیل
+# (RAM خود ffmpeg جدا و تقریباً ثابت است و اندازه‌گیری نمی‌شود)
+# ورودی‌های مصنوعی با numpy + ffmpeg ساخته می‌شوند، پس اینترنت و فایل آهنگ لازم نیست
+#
+# مثال:
+#   python benchmark.py --output before.json
+#   ... تغییر در converter.py ...
+#   python benchmark.py --output after.json --compare before.json
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from converter import ENGINES, convert_track
+from profiles import get_profile
+
+
+BENCH_PROFILES = ('mono16k', 'mono32k', 'stereo44k')
+DEFAULT_LENGTHS = (10, 60, 300)  # ثانیه
+SOURCE_RATE = 44100
+SOURCE_BITRATE = '192k'
+
+
+# ================ ورودی مصنوعی ==================
+def synth_music(seconds, rate=SOURCE_RATE, seed=0):
+    """
+    سیگنال شبیه موسیقی (آکورد با پوش + نویز) به صورت استریو float32
+    نویز باعث می‌شود انکودر MP3 مثل آهنگ واقعی کار کند (نه سکوت)
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate), dtype=np.float32) / rate
+    left = np.zeros_like(t)
+    for freq in (110.0, 220.0, 277.18, 329.63, 440.0, 1760.0):
+        left += np.sin(2 * np.pi * freq * t, dtype=np.float32) / 8
+    beat = 0.6 + 0.4 * np.abs(np.sin(np.pi * 2 * t, dtype=np.float32))
+    left *= beat
+    right = np.roll(left, rate // 100)
+    noise = rng.standard_normal((2, len(t)), dtype=np.float32) * 0.03
+    return np.stack([left + noise[0], right + noise[1]], axis=1)
+
+
+def make_test_mp3(path, seconds, rate=SOURCE_RATE, seed=0):
+    """ساخت MP3 مصنوعی با ffmpeg (PCM float از stdin)"""
+    samples = synth_music(seconds, rate, seed)
+    proc = subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-nostdin', '-y',
+         '-f', 'f32le', '-ar', str(rate), '-ac', '2', '-i', 'pipe:0',
+         '-codec:a', 'libmp3lame', '-b:a', SOURCE_BITRATE, path],
+        input=samples.tobytes(), stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {proc.stderr.decode(errors='replace').strip()}")
+    return path
+
+
+# ================ اجرای یک مورد ==================
+def peak_rss_kb():
+    """
+    بیشترین RAM همین پروسس (KB)
+    VmHWM بعد از exec از صفر شروع می‌شود؛ ru_maxrss حافظه پروسس والد را هم به ارث می‌برد
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run_case(input_path, output_path, engine, profile):
+    """در پروسس جدا اجرا می‌شود تا RAM هر مورد جدا اندازه‌گیری شود"""
+    baseline = peak_rss_kb()
+    start = time.perf_counter()
+    result = convert_track(input_path, output_path, engine=engine, profile=profile)
+    wall = time.perf_counter() - start
+    return {
+        'wall': wall,
+        'duration': result['duration'],
+        'bytes_out': result['bytes_out'],
+        'peak_rss_kb': peak_rss_kb(),
+        'baseline_rss_kb': baseline,
+    }
+
+
+def run_case(input_path, output_path, engine, profile, repeat=3):
+    """
+    هر تکرار در یک پروسس تازه (spawn، بدون حافظه ارث‌رسیده از والد)
+    خروجی: میانه زمان و بیشترین RAM بین تکرارها
+    """
+    ctx = multiprocessing.get_context('spawn')
+    runs = []
+    for _ in range(repeat):
+        with ctx.Pool(1) as pool:
+            runs.append(pool.apply(_run_case, (input_path, output_path, engine, profile)))
+
+    wall = statistics.median(r['wall'] for r in runs)
+    duration = runs[0]['duration']
+    return {
+        'wall': wall,
+        'wall_min': min(r['wall'] for r in runs),
+        'realtime': duration / wall if wall else 0.0,
+        'duration': duration,
+        'bytes_out': runs[0]['bytes_out'],
+        'peak_rss_mb': max(r['peak_rss_kb'] for r in runs) / 1024,
+        'delta_rss_mb': max(r['peak_rss_kb'] - r['baseline_rss_kb'] for r in runs) / 1024,
+    }
+
+
+def case_id(case):
+    return f"{case['engine']}/{case['profile']}/{case['input']}"
+
+
+# ================ مقایسه ==================
+def compare(results, baseline_path, threshold=0.10):
+    """
+    مقایسه با اجرای قبلی؛ تغییر بیشتر از threshold علامت‌گذاری می‌شود
+    خروجی: تعداد مواردی که کندتر شده‌اند
+    """
+    with open(baseline_path) as f:
+        old = {case_id(c): c for c in json.load(f)['results'] if 'error' not in c}
+
+    print(f"\n📊 Compared with {baseline_path}:")
+    slower = 0
+    for case in results:
+        prev = old.get(case_id(case))
+        if prev is None or 'error' in case:
+            continue
+        change = case['wall'] / prev['wall'] - 1
+        rss = case['peak_rss_mb'] - prev['peak_rss_mb']
+        mark = '  '
+        if change > threshold:
+            mark = '⚠️'
+            slower += 1
+        elif change < -threshold:
+            mark = '⚡'
+        print(f"  {mark} {case_id(case):40s} {change * 100:+6.1f}% time, {rss:+7.1f} MB RSS")
+    return slower
+
+
+# ================ CLI ==================
+def environment():
+    """اطلاعات ماشین برای مقایسه منصفانه بین اجراها"""
+    try:
+        ffmpeg = subprocess.run(['ffmpeg', '-version'], capture_output=True,
+                                text=True).stdout.split('\n', 1)[0]
+    except OSError:
+        ffmpeg = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'ffmpeg': ffmpeg,
+        'commit': commit or None,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MP3 -> ESP32 WAV conversion.")
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help=f"comma separated engines (default: {','.join(ENGINES)})")
+    parser.add_argument('--profiles', default=','.join(BENCH_PROFILES),
+                        help=f"comma separated profiles (default: {','.join(BENCH_PROFILES)})")
+    parser.add_argument('--lengths', default=','.join(map(str, DEFAULT_LENGTHS)),
+                        help="synthetic input lengths in seconds (default: 10,60,300)")
+    parser.add_argument('--input', action='append', default=[],
+                        help="also benchmark this real MP3 (can repeat)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per case, median is kept")
+    parser.add_argument('--output', help="write JSON results here")
+    parser.add_argument('--compare', help="previous JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="percent slowdown that counts as a regression (default 10)")
+    args = parser.parse_args(argv)
+
+    args.engines = args.engines.split(',')
+    args.profiles = args.profiles.split(',')
+    args.lengths = [float(x) for x in args.lengths.split(',') if x]
+    for engine in args.engines:
+        if engine not in ENGINES:
+            parser.error(f"unknown engine: {engine}")
+    for name in args.profiles:
+        try:
+            get_profile(name)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix='esp32-bench-') as tmp:
+        inputs = []
+        for i, seconds in enumerate(args.lengths):
+            name = f"synth_{seconds:g}s.mp3"
+            print(f"🎵 Generating {name}")
+            inputs.append((name, make_test_mp3(os.path.join(tmp, name), seconds, seed=i)))
+        for path in args.input:
+            inputs.append((os.path.basename(path), path))
+
+        output = os.path.join(tmp, 'out.wav')
+        total = len(args.engines) * len(args.profiles) * len(inputs)
+        index = 0
+
+        for engine in args.engines:
+            for profile in args.profiles:
+                for name, path in inputs:
+                    index += 1
+                    case = {'engine': engine, 'profile': profile, 'input': name,
+                            'bytes_in': os.path.getsize(path)}
+                    try:
+                        case.update(run_case(path, output, engine, profile, args.repeat))
+                    except Exception as e:
+                        case['error'] = f"{type(e).__name__}: {e}"
+                        print(f"✗ [{index}/{total}] {case_id(case)}: {case['error']}")
+                    else:
+                        print(f"✓ [{index}/{total}] {case_id(case)}: "
+                              f"{case['wall']:.2f}s, {case['realtime']:.1f}x realtime, "
+                              f"peak {case['peak_rss_mb']:.0f} MB "
+                              f"(+{case['delta_rss_mb']:.0f} MB over imports)")
+                    results.append(case)
+
+    report = {'environment': environment(), 'repeat': args.repeat, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results saved: {args.output}")
+
+    if args.compare:
+        if compare(results, args.compare, args.threshold / 100):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,402 @@
+# catalog.py - کاتالوگ SQLite همه آهنگ‌های منبع و تبدیل‌شده روی PC
+# تنها فهرست فعلی send_file_list در flask_server است (listdir + getsize در هر درخواست)؛
+# اینجا تگ‌ها، مدت، فرمت، هش و وضعیت تبدیل هر فایل یک بار خوانده و نگه داشته می‌شوند
+# و سؤال‌هایی مثل «از دیروز چه عوض شده» یا «کدام خروجی‌ها از منبعشان قدیمی‌ترند»
+# روی ده‌ها هزار فایل با یک query (چند میلی‌ثانیه) جواب داده می‌شوند
+#
+# اسکن تدریجی است: فقط فایل‌هایی که حجم یا mtime آن‌ها عوض شده دوباره خوانده می‌شوند،
+# و از هر فایل فقط هدر (WAV: chunk ها، بقیه: ffmpeg -i بدون دیکود) در چند thread
+# فایل‌های حذف‌شده پاک نمی‌شوند بلکه علامت deleted می‌گیرند تا ابزار همگام‌سازی هم ببیند
+#
+# مثال:
+#   python catalog.py scan MUSIC_DIR
+#   python catalog.py scan /media/sd/music --kind output
+#   python catalog.py changed --since 3600
+#   python catalog.py pending
+#   python batch_convert.py MUSIC_DIR /media/sd/music --catalog catalog.db
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from playlist_pack import read_wav_info
+from transcode_cache import hash_file
+from wav_writer import WAVE_FORMAT_ALAW, WAVE_FORMAT_IMA_ADPCM, WAVE_FORMAT_MULAW, WAVE_FORMAT_PCM
+
+
+CATALOG_NAME = 'catalog.db'
+CATALOG_VERSION = 1
+
+AUDIO_EXTENSIONS = ('.mp3', '.flac', '.ogg', '.m4a', '.wav')
+
+# format tag هدر WAV -> همان نام‌های profiles.py
+WAV_FORMATS = {
+    WAVE_FORMAT_PCM: 'pcm',
+    WAVE_FORMAT_IMA_ADPCM: 'adpcm',
+    WAVE_FORMAT_MULAW: 'ulaw',
+    WAVE_FORMAT_ALAW: 'alaw',
+}
+
+# ستون‌هایی که از هدر هر فایل پر می‌شوند
+HEADER_FIELDS = ('format', 'duration', 'rate', 'channels', 'bits', 'bitrate',
+                 'title', 'artist', 'album')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path      TEXT PRIMARY KEY,
+    root      TEXT NOT NULL,
+    kind      TEXT NOT NULL,          -- source / output
+    size      INTEGER NOT NULL,
+    mtime_ns  INTEGER NOT NULL,
+    updated   REAL NOT NULL,          -- زمان آخرین تغییر این ردیف (برای changed_since)
+    deleted   INTEGER NOT NULL DEFAULT 0,
+    format    TEXT,
+    duration  REAL,
+    rate      INTEGER,
+    channels  INTEGER,
+    bits      INTEGER,
+    bitrate   INTEGER,
+    title     TEXT,
+    artist    TEXT,
+    album     TEXT,
+    sha256    TEXT
+);
+CREATE INDEX IF NOT EXISTS files_root ON files (root, kind);
+CREATE INDEX IF NOT EXISTS files_updated ON files (updated);
+
+CREATE TABLE IF NOT EXISTS conversions (
+    output          TEXT PRIMARY KEY,
+    source          TEXT NOT NULL,
+    options         TEXT NOT NULL,    -- JSON همان options کلید کش
+    source_size     INTEGER NOT NULL,
+    source_mtime_ns INTEGER NOT NULL,
+    converted       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversions_source ON conversions (source);
+"""
+
+COMMIT_EVERY = 500  # ردیف؛ اسکن قطع‌شده کار انجام‌شده را از دست ندهد
+
+
+def open_catalog(path=CATALOG_NAME):
+    """باز کردن (یا ساختن) کاتالوگ؛ ردیف‌ها sqlite3.Row هستند"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    # WAL: سرور و ابزارها می‌توانند همزمان با اسکن بخوانند
+    conn.execute('PRAGMA journal_mode=WAL')
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version not in (0, CATALOG_VERSION):
+        conn.close()
+        raise ValueError(f"{path}: catalog version {version}, expected {CATALOG_VERSION}")
+    conn.executescript(SCHEMA)
+    conn.execute(f'PRAGMA user_version = {CATALOG_VERSION}')
+    return conn
+
+
+def open_reader(path=CATALOG_NAME):
+    """
+    اتصال فقط‌خواندنی برای سرور (هر thread یکی)؛ با WAL همزمان با اسکن کار می‌کند
+    کاتالوگ باید از قبل ساخته شده باشد
+    """
+    conn = sqlite3.connect(f'file:{quote(os.path.abspath(path))}?mode=ro', uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# ================ خواندن هدر ==================
+def read_wav_header(path):
+    """WAV: فقط chunk های ابتدای فایل (بدون پروسس جدا)"""
+    with open(path, 'rb') as f:
+        info = read_wav_info(f)
+    rate = info['rate']
+    return {
+        'format': WAV_FORMATS.get(info['format'], str(info['format'])),
+        'duration': info['frames'] / rate if rate else None,
+        'rate': rate,
+        'channels': info['channels'],
+        'bits': info['bits'],
+        'bitrate': info['byte_rate'] * 8,
+    }
+
+
+_TAG = re.compile(r'^    (\w+)\s*: (.*)$')
+_DURATION = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+_BITRATE = re.compile(r'bitrate: (\d+) kb/s')
+_STREAM = re.compile(r'Stream #\d+:\d+.*?: Audio: (\w+)[^,]*, (\d+) Hz, ([^,]+)(?:, (\w+))?')
+_LAYOUTS = {'mono': 1, 'stereo': 2}
+
+
+def probe_header(path):
+    """
+    بقیه فرمت‌ها: ffmpeg -i بدون خروجی فقط هدر و تگ‌ها را می‌خواند
+    (مدت MP3 بدون هدر Xing از روی bitrate تخمین زده می‌شود)
+    """
+    proc = subprocess.run(['ffmpeg', '-hide_banner', '-nostdin', '-i', path],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    text = proc.stderr.decode('utf-8', 'replace')
+    if 'Input #0' not in text:
+        raise ValueError(text.strip().splitlines()[-1] if text.strip() else "ffmpeg failed")
+
+    info = dict.fromkeys(HEADER_FIELDS)
+    # تگ‌های container (چهار فاصله)، قبل از Duration؛ تگ‌های stream عمیق‌تر هستند
+    for line in text.split('Duration:', 1)[0].splitlines():
+        match = _TAG.match(line)
+        if match:
+            key = match.group(1).lower()
+            if key in ('title', 'artist', 'album') and not info[key]:
+                info[key] = match.group(2).strip()
+
+    match = _DURATION.search(text)
+    if match:
+        h, m, sec = match.groups()
+        info['duration'] = int(h) * 3600 + int(m) * 60 + float(sec)
+    match = _BITRATE.search(text)
+    if match:
+        info['bitrate'] = int(match.group(1)) * 1000
+    match = _STREAM.search(text)
+    if match:
+        codec, rate, layout, sample_fmt = match.groups()
+        info['format'] = codec
+        info['rate'] = int(rate)
+        layout = layout.strip()
+        channels = re.match(r'(\d+) channels', layout)
+        info['channels'] = _LAYOUTS.get(layout) or (int(channels.group(1)) if channels else None)
+        bits = re.match(r'[su](\d+)', sample_fmt or '')
+        info['bits'] = int(bits.group(1)) if bits else None
+    return info
+
+
+def read_header(path, with_hash=False):
+    """هدر یک فایل (در thread کارگر)؛ خطا به جای exception در نتیجه برمی‌گردد"""
+    try:
+        if path.lower().endswith('.wav'):
+            try:
+                info = read_wav_header(path)
+            except ValueError:
+                info = probe_header(path)  # WAV با فرمت غیرعادی
+        else:
+            info = probe_header(path)
+        if with_hash:
+            info['sha256'] = hash_file(path)
+        return info
+    except (OSError, ValueError) as e:
+        return {'error': str(e)}
+
+
+# ================ اسکن ==================
+def under(root, column='path'):
+    """
+    شرط SQL برای مسیرهای زیر root، با پیشوند مسیر و نه ستون root:
+    پوشه‌های تودرتو (lib و lib/sub، یا منبع batch_convert و پوشه سرور) ردیف‌های هم را
+    عوض می‌کنند، ولی هر فایل همیشه زیر همه پوشه‌های بالای خودش است
+    خروجی: (شرط، پارامترها)؛ روی کلید اصلی path یک جستجوی بازه‌ای است
+    """
+    prefix = os.path.join(os.path.abspath(root), '')
+    upper = prefix[:-1] + chr(ord(os.sep) + 1)
+    return f'{column} >= ? AND {column} < ?', (prefix, upper)
+
+
+def walk_files(root, extensions=AUDIO_EXTENSIONS):
+    """
+    (مسیر مطلق، حجم، mtime_ns) برای همه فایل‌های صوتی زیر root، بدون دنبال کردن لینک پوشه
+    extensions=None: همه فایل‌ها
+    """
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                for item in it:
+                    if item.is_dir(follow_symlinks=False):
+                        stack.append(item.path)
+                    elif ((extensions is None or item.name.lower().endswith(extensions))
+                          and item.is_file()):
+                        st = item.stat()
+                        yield item.path, st.st_size, st.st_mtime_ns
+        except OSError:
+            continue  # پوشه حذف شد یا دسترسی نداریم
+
+
+def scan(conn, root, kind='source', workers=None, with_hash=False, extensions=AUDIO_EXTENSIONS):
+    """
+    به‌روزرسانی تدریجی کاتالوگ برای یک پوشه
+    فقط فایل‌های جدید یا با حجم/mtime تغییرکرده (یا بدون هش وقتی with_hash) خوانده می‌شوند
+    خروجی: (تعداد فایل‌ها، تعداد خوانده‌شده، تعداد حذف‌شده، تعداد خطا)
+    """
+    root = os.path.abspath(root)
+    where, params = under(root)
+    known = {row['path']: row for row in conn.execute(
+        f'SELECT path, size, mtime_ns, deleted, sha256 FROM files WHERE {where}', params)}
+
+    seen = set()
+    todo = []
+    for path, size, mtime_ns in walk_files(root, extensions):
+        seen.add(path)
+        row = known.get(path)
+        if (row and not row['deleted'] and row['size'] == size and row['mtime_ns'] == mtime_ns
+                and (row['sha256'] or not with_hash)):
+            continue
+        todo.append((path, size, mtime_ns))
+
+    now = time.time()
+    errors = 0
+    # ffmpeg و خواندن دیسک بیرون از GIL هستند؛ thread ها کافی‌اند
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        headers = pool.map(lambda item: read_header(item[0], with_hash), todo)
+        for i, ((path, size, mtime_ns), info) in enumerate(zip(todo, headers), 1):
+            if 'error' in info:
+                print(f"⚠️  {path}: {info['error']}")
+                errors += 1
+                info = {}
+            values = [info.get(k) for k in HEADER_FIELDS]
+            conn.execute(
+                f"INSERT OR REPLACE INTO files (path, root, kind, size, mtime_ns, updated, deleted, "
+                f"{', '.join(HEADER_FIELDS)}, sha256) "
+                f"VALUES (?, ?, ?, ?, ?, ?, 0, {', '.join('?' * len(HEADER_FIELDS))}, ?)",
+                [path, root, kind, size, mtime_ns, now, *values, info.get('sha256')])
+            if i % COMMIT_EVERY == 0:
+                conn.commit()
+
+    gone = [path for path, row in known.items() if path not in seen and not row['deleted']]
+    conn.executemany('UPDATE files SET deleted = 1, updated = ? WHERE path = ?',
+                     [(now, path) for path in gone])
+    conn.commit()
+    return len(seen), len(todo), len(gone), errors
+
+
+# ================ تبدیل‌ها ==================
+def record_conversions(conn, conversions):
+    """
+    ثبت تبدیل‌های موفق: لیست (source، output، options)
+    حجم و mtime منبع در همان لحظه ذخیره می‌شود تا تغییر بعدی منبع دیده شود
+    """
+    now = time.time()
+    rows = []
+    for source, output, options in conversions:
+        st = os.stat(source)
+        rows.append((os.path.abspath(output), os.path.abspath(source),
+                     json.dumps(options, sort_keys=True), st.st_size, st.st_mtime_ns, now))
+    conn.executemany('INSERT OR REPLACE INTO conversions VALUES (?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+
+
+def stale_outputs(conn, current=None):
+    """
+    خروجی‌هایی که منبعشان بعد از تبدیل عوض یا حذف شده (بر اساس آخرین scan)
+    current: {output: options} کار فعلی؛ خروجی‌ای که با options دیگری ساخته شده
+    (پروفایل، موتور، normalize، ...) هم قدیمی است
+    """
+    stale = {row['output'] for row in conn.execute(
+        'SELECT c.output FROM conversions c JOIN files f ON f.path = c.source '
+        'WHERE f.deleted = 1 OR f.size != c.source_size OR f.mtime_ns != c.source_mtime_ns')}
+    if current:
+        wanted = {os.path.abspath(output): json.dumps(options, sort_keys=True)
+                  for output, options in current.items()}
+        for row in conn.execute('SELECT output, options FROM conversions'):
+            if wanted.get(row['output'], row['options']) != row['options']:
+                stale.add(row['output'])
+    return sorted(stale)
+
+
+def pending_sources(conn, root=None):
+    """منبع‌هایی که هیچ تبدیلی ندارند یا بعد از تبدیل عوض شده‌اند"""
+    query = ('SELECT f.path FROM files f LEFT JOIN conversions c ON c.source = f.path '
+             "WHERE f.kind = 'source' AND f.deleted = 0")
+    params = []
+    if root:
+        where, prefix = under(root, 'f.path')
+        query += ' AND ' + where
+        params.extend(prefix)
+    query += (' GROUP BY f.path HAVING COUNT(c.output) = 0 '
+              'OR SUM(f.size != c.source_size OR f.mtime_ns != c.source_mtime_ns) > 0 '
+              'ORDER BY f.path')
+    return [row['path'] for row in conn.execute(query, params)]
+
+
+def changed_since(conn, since, kind=None):
+    """ردیف‌هایی که بعد از زمان since (epoch) اضافه، عوض یا حذف شده‌اند"""
+    query = 'SELECT * FROM files WHERE updated > ?'
+    params = [since]
+    if kind:
+        query += ' AND kind = ?'
+        params.append(kind)
+    return conn.execute(query + ' ORDER BY updated, path', params).fetchall()
+
+
+def folder_files(conn, root):
+    """فایل‌های موجود زیر پوشه root، به ترتیب مسیر (لیست فایل سرور)"""
+    where, params = under(root)
+    return conn.execute(f'SELECT * FROM files WHERE {where} AND deleted = 0 ORDER BY path',
+                        params).fetchall()
+
+
+# ================ CLI ==================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Persistent SQLite catalog of source and converted tracks")
+    parser.add_argument('--db', default=CATALOG_NAME, help=f"catalog file (default: {CATALOG_NAME})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('scan', help="add new and changed files under the given folders")
+    p.add_argument('folders', nargs='+')
+    p.add_argument('--kind', default='source', choices=('source', 'output'))
+    p.add_argument('--workers', type=int, help="header reader threads")
+    p.add_argument('--hash', action='store_true', help="also store the SHA-256 of every file")
+
+    p = commands.add_parser('changed', help="files added, changed or removed recently")
+    p.add_argument('--since', type=float, default=24 * 3600, metavar='SECONDS',
+                   help="look back this many seconds (default: one day)")
+    p.add_argument('--kind', choices=('source', 'output'))
+
+    p = commands.add_parser('pending', help="sources that were never converted or changed since")
+    p.add_argument('--root', help="only sources under this scanned folder")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        conn = open_catalog(args.db)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"✗ {args.db}: {e}")
+        return 1
+
+    with conn:
+        if args.command == 'scan':
+            for folder in args.folders:
+                start = time.perf_counter()
+                total, scanned, removed, errors = scan(conn, folder, args.kind,
+                                                       args.workers, args.hash)
+                print(f"✓ {folder}: {total} files, {scanned} read, {removed} removed, "
+                      f"{errors} failed ({time.perf_counter() - start:.2f}s)")
+
+        elif args.command == 'changed':
+            start = time.perf_counter()
+            rows = changed_since(conn, time.time() - args.since, args.kind)
+            elapsed = time.perf_counter() - start
+            for row in rows:
+                mark = '🗑️ ' if row['deleted'] else '•'
+                print(f"  {mark} {row['path']}")
+            print(f"📋 {len(rows)} changed ({elapsed * 1000:.1f} ms)")
+
+        elif args.command == 'pending':
+            start = time.perf_counter()
+            paths = pending_sources(conn, args.root)
+            elapsed = time.perf_counter() - start
+            for path in paths:
+                print(f"  • {path}")
+            print(f"📋 {len(paths)} pending ({elapsed * 1000:.1f} ms)")
+
+    conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,691 @@
+# converter.py - هسته تبدیل MP3 به WAV سازگار با ESP32
+# این تابع توسط ابزارهای دسته‌ای (batch_convert.py) و اسکریپت‌های تکی استفاده می‌شود
+
+import math
+import os
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ffmpeg
+import numpy as np
+from pydub import AudioSegment
+
+import dsp
+import loudness
+import artwork as art
+import spectrum as spec
+from adpcm import AdpcmWriter
+from g711 import AlawWriter, MulawWriter
+from profiles import check_budget, get_profile
+from wav_writer import WavWriter
+
+
+STREAM_BLOCK = 64 * 1024  # اندازه هر بلوک خواندن از ffmpeg
+
+# موتور parallel: هر بازه از PARALLEL_PAD ثانیه قبل دیکود و آن قسمت دور ریخته می‌شود
+# (bit reservoir فریم‌های MP3 و گرم شدن resampler)؛ با ≥1 ثانیه خروجی بیت به بیت
+# برابر دیکود یک‌تکه است. بازه‌ها مضرب کامل ثانیه هستند تا مرزها روی نمونه دقیق بیفتند
+PARALLEL_PAD = 2
+PARALLEL_MIN_SECONDS = 30
+
+# تعداد بازه‌های همزمان موتور parallel وقتی workers داده نشده؛ None = همه هسته‌ها
+# batch_convert در هر کارگر Pool سهم همان کارگر از هسته‌ها را می‌گذارد (workers × بازه ≤ هسته)
+PARALLEL_RANGES = None
+
+# فرمت خروجی خام ffmpeg برای هر sample width (WAV هشت‌بیتی unsigned است)
+PCM_FORMATS = {1: 'u8', 2: 's16le', 3: 's24le', 4: 's32le'}
+
+# فرمت فایل خروجی -> کلاس نویسنده (همه write(pcm) و close() دارند)
+WRITERS = {
+    'pcm': WavWriter,
+    'adpcm': AdpcmWriter,
+    'ulaw': MulawWriter,
+    'alaw': AlawWriter,
+}
+
+
+def open_writer(output_wav, rate, channels, sample_width=2, format='pcm', align=0):
+    """
+    نویسنده WAV برای فرمت خواسته‌شده؛ ورودی همیشه PCM خام است
+    align: شروع داده روی مرز 512 بایت (سکتور SD) یا cluster؛ 0 = هدر معمولی
+    """
+    return WRITERS[format](output_wav, rate, channels, sample_width, align=align)
+
+
+def _discard(*paths):
+    """
+    حذف خروجی نیمه‌کاره بعد از خطا؛ هدر WAV از اول نوشته شده و فایل سالم به نظر می‌رسد،
+    و batch_convert فایل موجود را دوباره تبدیل نمی‌کند
+    """
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def convert_mp3_for_esp32(input_mp3, output_wav, rate=16000, channels=1, sample_width=2,
+                          format='pcm', align=0):
+    """
+    تبدیل یک فایل MP3 به WAV استاندارد PCM
+    خروجی: دیکشنری آمار تبدیل (مدت آهنگ، حجم‌ها، زمان صرف‌شده)
+    """
+    start = time.perf_counter()
+
+    # MP3 را بخوان
+    audio = AudioSegment.from_file(input_mp3)
+
+    # تنظیمات سازگار با ESP32
+    audio = audio.set_frame_rate(rate)          # نرخ نمونه‌برداری
+    audio = audio.set_channels(channels)        # مونو / استریو
+    audio = audio.set_sample_width(sample_width)  # 2 bytes = 16bit
+
+    if format == 'pcm' and not align:
+        # خروجی WAV استاندارد PCM
+        audio.export(output_wav, format="wav")
+    else:
+        with open_writer(output_wav, rate, channels, sample_width, format, align) as wav:
+            wav.write(audio.raw_data)
+
+    return {
+        'input': input_mp3,
+        'output': output_wav,
+        'duration': len(audio) / 1000,
+        'bytes_in': os.path.getsize(input_mp3),
+        'bytes_out': os.path.getsize(output_wav),
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def open_pcm_stream(input_path, rate, channels, sample_width=2, start=0, length=None):
+    """
+    اجرای ffmpeg که PCM خام را روی stdout می‌ریزد
+    start / length: فقط یک بازه (ثانیه)؛ seek دقیق ffmpeg (بعد از دیکود)
+    خروجی: پروسس (خواندن از proc.stdout)
+    """
+    fmt = PCM_FORMATS[sample_width]
+    input_args = {'ss': start} if start else {}
+    output_args = {'t': length} if length else {}
+    return (
+        ffmpeg
+        .input(input_path, **input_args)
+        .output('pipe:', format=fmt, acodec='pcm_' + fmt, ac=channels, ar=rate, **output_args)
+        .global_args('-loglevel', 'error', '-nostdin')
+        .run_async(pipe_stdout=True)
+    )
+
+
+def convert_streaming(input_mp3, output_wav, rate=16000, channels=1, sample_width=2,
+                      format='pcm', block_size=STREAM_BLOCK, align=0):
+    """
+    تبدیل با حافظه ثابت:
+    ffmpeg خروجی PCM را تکه‌تکه می‌دهد و همان را مستقیم در WAV می‌نویسیم
+    مصرف RAM به طول آهنگ بستگی ندارد (فقط یک بافر block_size)
+    """
+    start = time.perf_counter()
+
+    proc = open_pcm_stream(input_mp3, rate, channels, sample_width)
+    buf = bytearray(block_size)
+    view = memoryview(buf)
+
+    try:
+        with open_writer(output_wav, rate, channels, sample_width, format, align) as wav:
+            while True:
+                n = proc.stdout.readinto(buf)
+                if not n:
+                    break
+                wav.write(view[:n])
+    except BaseException:
+        _discard(output_wav)
+        raise
+    finally:
+        proc.stdout.close()
+        code = proc.wait()
+
+    if code != 0:
+        _discard(output_wav)
+        raise RuntimeError(f"ffmpeg failed with exit code {code}: {input_mp3}")
+
+    return {
+        'input': input_mp3,
+        'output': output_wav,
+        'duration': wav.frames / rate,
+        'bytes_in': os.path.getsize(input_mp3),
+        'bytes_out': os.path.getsize(output_wav),
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def convert_numpy(input_mp3, output_wav, rate=16000, channels=1, sample_width=2,
+                  format='pcm', quality='standard', dither=True, spectrum=False,
+                  normalize=None, trim=False, align=0):
+    """
+    تبدیل با موتور NumPy (dsp.py):
+    downmix + resample چندفازی + TPDF dither در یک مسیر، بدون کپی‌های میانی pydub
+    دیکود تکه‌تکه است (dsp.FloatDecoder) و هر تکه تا نویسنده WAV می‌رود
+    quality: fast / standard / best
+    spectrum: فایل .spec برای ویژوالایزر از همین نمونه‌ها ساخته شود
+    normalize: هدف بلندی (LUFS)؛ gain قبل از dither اعمال و مقادیر در chunk 'loud' ذخیره می‌شود
+    trim: حذف سکوت/padding ابتدا و انتها؛ طول واقعی در chunk 'trim' ذخیره می‌شود
+    (این دو کل آهنگ را لازم دارند، پس فقط خروجی resample شده در حافظه جمع می‌شود)
+    """
+    start = time.perf_counter()
+    options = dict(rate=rate, channels=channels, sample_width=sample_width, format=format,
+                   quality=quality, dither=dither, spectrum=spectrum,
+                   normalize=normalize, trim=trim, align=align)
+    return _fanout_numpy(input_mp3, [(output_wav, options)], start)[0]
+
+
+class _NumpyBranch:
+    """
+    یک خروجی موتور numpy روی تکه‌های دیکود: downmix -> resample -> dither -> نویسنده
+    """
+
+    def __init__(self, input_mp3, output_wav, src_rate, rate=16000, channels=1,
+                 sample_width=2, format='pcm', quality='standard', dither=True,
+                 spectrum=False, normalize=None, trim=False, align=0):
+        if sample_width != 2:
+            raise ValueError("numpy engine only writes 16-bit samples")
+        self.input_mp3 = input_mp3
+        self.output_wav = output_wav
+        self.rate = rate
+        self.channels = channels
+        self.dither = dither
+        self.resampler = None
+        if src_rate != rate:
+            self.resampler = dsp.PolyphaseResampler(src_rate, rate, channels, quality)
+
+        # normalize/trim: تکه‌های float جمع و آخر کار به _encode_numpy داده می‌شوند
+        self.whole = normalize is not None or trim
+        self.encode = dict(format=format, dither=dither, spectrum=spectrum,
+                           normalize=normalize, trim=trim, align=align)
+        self.blocks = []
+
+        self.wav = None
+        self.analyzer = None
+        if not self.whole:
+            # یک Generator برای کل آهنگ تا نویز dither بین تکه‌ها تکرار نشود
+            self.rng = np.random.default_rng()
+            self.analyzer = spectrum and spec.SpectrumAnalyzer(rate)
+            self.wav = open_writer(output_wav, rate, channels, 2, format, align)
+
+    def feed(self, block):
+        x = dsp.downmix(block, self.channels)
+        if self.resampler is not None:
+            x = self.resampler.process(x)
+        self._write(x)
+
+    def _write(self, x):
+        if self.whole:
+            self.blocks.append(x)
+            return
+        pcm = dsp.to_int16(x, self.dither, self.rng)
+        self.wav.write(pcm.tobytes())
+        if self.analyzer:
+            mono = dsp.downmix(pcm.astype(np.float32), 1)[:, 0]
+            self.analyzer.feed(mono * np.float32(1 / 32768))
+
+    def finish(self, start):
+        if self.resampler is not None:
+            self._write(self.resampler.flush())
+
+        if self.whole:
+            x = np.concatenate(self.blocks) if self.blocks else np.zeros((0, self.channels), np.float32)
+            self.blocks = []
+            return _encode_numpy(x, self.input_mp3, self.output_wav, start,
+                                 self.rate, self.channels, **self.encode)
+
+        self.wav.close()
+        sidecars = []
+        if self.analyzer:
+            levels = self.analyzer.finish()
+            sidecars.append(spec.write_sidecar(spec.spectrum_path(self.output_wav), levels, self.rate))
+        return {
+            'input': self.input_mp3,
+            'output': self.output_wav,
+            'duration': self.wav.frames / self.rate,
+            'bytes_in': os.path.getsize(self.input_mp3),
+            'bytes_out': os.path.getsize(self.output_wav),
+            'elapsed': time.perf_counter() - start,
+            'sidecars': sidecars,
+            'loudness': None,
+            'trimmed': None,
+        }
+
+    def abort(self):
+        if self.wav is not None:
+            self.wav.close()
+        _discard(self.output_wav)
+
+
+def _fanout_numpy(input_path, targets, start):
+    """
+    یک دیکود float و یک _NumpyBranch برای هر خروجی؛ با چند خروجی هر تکه
+    همزمان در چند thread پردازش می‌شود (ضرب ماتریس و FFT بیرون از GIL هستند)
+    """
+    branches = []
+    pool = ThreadPoolExecutor(max_workers=len(targets)) if len(targets) > 1 else None
+
+    def each(fn):
+        if pool is None:
+            return [fn(branch) for branch in branches]
+        return list(pool.map(fn, branches))
+
+    try:
+        with dsp.FloatDecoder(input_path) as decoder:
+            for output_wav, options in targets:
+                branches.append(_NumpyBranch(input_path, output_wav, decoder.rate, **options))
+            for block in decoder.blocks():
+                each(lambda branch: branch.feed(block))
+        return each(lambda branch: branch.finish(start))
+    except BaseException:
+        for branch in branches:
+            branch.abort()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def _encode_numpy(x, input_mp3, output_wav, start, rate, channels, format='pcm',
+                  dither=True, spectrum=False, normalize=None, trim=False, align=0):
+    """
+    بقیه مسیر numpy روی آرایه downmix/resample شده (x درجا تغییر می‌کند)
+    fan-out همین را برای هر خروجی روی یک دیکود مشترک صدا می‌زند
+    """
+    trimmed = None
+    if trim:
+        # روی نرخ خروجی تا برش دقیقاً روی نمونه‌هایی باشد که دستگاه پخش می‌کند
+        x, lead, tail = dsp.trim_silence(x)
+        trimmed = (lead, tail)
+
+    stats = None
+    if normalize is not None:
+        # اندازه‌گیری روی همان چیزی که دستگاه پخش می‌کند (بعد از downmix/resample)
+        stats = loudness.measure(x, rate)
+        stats['gain'] = loudness.gain_for(stats, normalize)
+        x = loudness.apply_gain(x, stats['gain'])
+
+    pcm = dsp.to_int16(x, dither)
+    del x
+
+    with open_writer(output_wav, rate, channels, 2, format, align) as wav:
+        wav.write(pcm.tobytes())
+        if stats is not None:
+            wav.add_chunk(loudness.LOUDNESS_CHUNK,
+                          loudness.pack_chunk(stats, stats['gain'], normalize))
+        if trimmed is not None:
+            wav.add_chunk(dsp.TRIM_CHUNK, dsp.TRIM_STRUCT.pack(len(pcm), *trimmed))
+
+    sidecars = []
+    if spectrum:
+        levels = spec.analyze(pcm.astype(np.float32) / 32768, rate)
+        sidecars.append(spec.write_sidecar(spec.spectrum_path(output_wav), levels, rate))
+
+    return {
+        'input': input_mp3,
+        'output': output_wav,
+        'duration': len(pcm) / rate,
+        'bytes_in': os.path.getsize(input_mp3),
+        'bytes_out': os.path.getsize(output_wav),
+        'elapsed': time.perf_counter() - start,
+        'sidecars': sidecars,
+        'loudness': stats,
+        'trimmed': trimmed and (trimmed[0] / rate, trimmed[1] / rate),
+    }
+
+
+# ================ موتور parallel (یک فایل خیلی بلند روی همه هسته‌ها) ==================
+def probe_duration(input_path):
+    """مدت فایل (ثانیه) از خروجی ffmpeg -i؛ اگر معلوم نبود None"""
+    proc = subprocess.run(['ffmpeg', '-hide_banner', '-nostdin', '-i', input_path],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    match = re.search(rb'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)', proc.stderr)
+    if not match:
+        return None
+    h, m, sec = match.groups()
+    return int(h) * 3600 + int(m) * 60 + float(sec)
+
+
+def _decode_range(input_path, part_path, rate, channels, sample_width, start, length):
+    """
+    دیکود یک بازه در یک پروسس ffmpeg جدا و نوشتن PCM خام در part_path
+    دقیقاً length * rate فریم از ثانیه start نوشته می‌شود (length=None: تا آخر فایل)
+    خروجی: تعداد فریم
+    """
+    pad = min(start, PARALLEL_PAD)
+    frame_bytes = channels * sample_width
+    skip = pad * rate * frame_bytes
+    keep = length * rate * frame_bytes if length else None
+
+    proc = open_pcm_stream(input_path, rate, channels, sample_width,
+                           start - pad, length and length + pad + 1)
+    buf = bytearray(STREAM_BLOCK)
+    view = memoryview(buf)
+    written = 0
+    try:
+        with open(part_path, 'wb') as out:
+            while True:
+                n = proc.stdout.readinto(buf)
+                if not n:
+                    break
+                chunk = view[:n]
+                if skip:
+                    drop = min(skip, n)
+                    skip -= drop
+                    chunk = chunk[drop:]
+                if keep is not None:
+                    chunk = chunk[:keep - written]
+                out.write(chunk)
+                written += len(chunk)
+    finally:
+        proc.stdout.close()
+        code = proc.wait()
+
+    if code != 0:
+        raise RuntimeError(f"ffmpeg failed with exit code {code}: {input_path} @ {start}s")
+    return written // frame_bytes
+
+
+def convert_parallel(input_mp3, output_wav, rate=16000, channels=1, sample_width=2,
+                     format='pcm', align=0, workers=None):
+    """
+    تبدیل یک فایل بلند (مثلاً میکس سه‌ساعته) با همه هسته‌ها:
+    فایل به بازه‌های زمانی تقسیم می‌شود، هر بازه در یک پروسس ffmpeg جدا دیکود و
+    resample می‌شود و نتیجه‌ها به ترتیب و بدون نمونه اضافه/کم پشت سر هم در WAV نوشته می‌شوند
+    فایل‌های کوتاه (یا با مدت نامعلوم) مثل موتور stream تبدیل می‌شوند
+    """
+    workers = workers or PARALLEL_RANGES or os.cpu_count() or 1
+    duration = probe_duration(input_mp3)
+    if duration is None or workers < 2 or duration < 2 * PARALLEL_MIN_SECONDS:
+        return convert_streaming(input_mp3, output_wav, rate, channels, sample_width,
+                                 format, align=align)
+
+    start = time.perf_counter()
+    length = max(PARALLEL_MIN_SECONDS, math.ceil(duration / workers))
+    starts = list(range(0, math.ceil(duration), length))
+    parts = [f"{output_wav}.part{i}" for i in range(len(starts))]
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(workers, len(starts))) as pool:
+            futures = [pool.submit(_decode_range, input_mp3, part, rate, channels, sample_width,
+                                   t, None if i == len(starts) - 1 else length)
+                       for i, (t, part) in enumerate(zip(starts, parts))]
+            frames = [future.result() for future in futures]
+
+        # هر بازه به جز آخری باید کامل باشد، وگرنه بعدی‌ها جابه‌جا می‌شدند
+        for i, n in enumerate(frames[:-1]):
+            if n != length * rate and any(frames[i + 1:]):
+                raise RuntimeError(f"Range {i} of {input_mp3} is short ({n} frames)")
+
+        buf = bytearray(STREAM_BLOCK)
+        try:
+            with open_writer(output_wav, rate, channels, sample_width, format, align) as wav:
+                for part in parts:
+                    with open(part, 'rb') as f:
+                        while True:
+                            n = f.readinto(buf)
+                            if not n:
+                                break
+                            wav.write(memoryview(buf)[:n])
+        except BaseException:
+            _discard(output_wav)
+            raise
+    finally:
+        for part in parts:
+            if os.path.exists(part):
+                os.remove(part)
+
+    return {
+        'input': input_mp3,
+        'output': output_wav,
+        'duration': wav.frames / rate,
+        'bytes_in': os.path.getsize(input_mp3),
+        'bytes_out': os.path.getsize(output_wav),
+        'elapsed': time.perf_counter() - start,
+        'ranges': len(starts),
+    }
+
+
+# موتورهای تبدیل قابل انتخاب
+ENGINES = {
+    'pydub': convert_mp3_for_esp32,
+    'stream': convert_streaming,
+    'numpy': convert_numpy,
+    'parallel': convert_parallel,
+}
+
+
+# موتورهایی که تحلیل‌ها را روی آرایه دیکودشده خودشان انجام می‌دهند
+INLINE_ANALYSIS = {'numpy'}
+
+
+def convert_track(input_path, output_wav, engine='pydub', profile=None,
+                  card_speed=None, strict=False, spectrum=False, normalize=None, trim=False,
+                  artwork=False, **options):
+    """
+    تبدیل با موتور انتخاب‌شده:
+    pydub = کل فایل در RAM، stream = حافظه ثابت، numpy = resample با کیفیت بالا
+    profile: اسم یکی از پروفایل‌های profiles.py (تنظیمات صریح اولویت دارند)
+    card_speed: سرعت پایدار SD به KB/s برای بررسی بودجه
+    spectrum: ساخت فایل .spec کنار WAV برای ویژوالایزر OLED
+    artwork: ساخت فایل .art کنار WAV (عنوان و کاور به صورت bitmap برای OLED)
+    normalize: هدف بلندی به LUFS (فقط موتورهای INLINE_ANALYSIS)
+    trim: حذف سکوت ابتدا و انتها (فقط موتورهای INLINE_ANALYSIS)
+    """
+    options = _resolve_options(profile, card_speed, strict, options)
+
+    if engine in INLINE_ANALYSIS:
+        result = ENGINES[engine](input_path, output_wav, spectrum=spectrum,
+                                 normalize=normalize, trim=trim, **options)
+        return _add_artwork(result, input_path, output_wav, artwork)
+
+    if normalize is not None:
+        raise ValueError(f"Loudness normalisation needs the numpy engine, not {engine}")
+    if trim:
+        raise ValueError(f"Silence trimming needs the numpy engine, not {engine}")
+
+    result = ENGINES[engine](input_path, output_wav, **options)
+    result['sidecars'] = []
+
+    if spectrum:
+        # یک دیکود جداگانه (stream) فقط برای تحلیل طیف
+        rate = options.get('rate', 16000)
+        levels = spec.analyze_file(input_path, rate)
+        result['sidecars'].append(spec.write_sidecar(spec.spectrum_path(output_wav), levels, rate))
+
+    return _add_artwork(result, input_path, output_wav, artwork)
+
+
+def _resolve_options(profile, card_speed, strict, options):
+    """پروفایل + تنظیمات صریح (صریح‌ها اولویت دارند)، و بررسی بودجه SD"""
+    if profile is not None:
+        options = {**get_profile(profile), **options}
+    if card_speed:
+        check_budget(options, card_speed, strict=strict)
+    return options
+
+
+def _add_artwork(result, input_path, output_wav, artwork):
+    """تگ‌ها و کاور مستقل از صدا هستند؛ برای همه موتورها همین‌جا ساخته می‌شوند"""
+    if artwork:
+        strip, cover = art.render(input_path)
+        result['sidecars'].append(art.write_sidecar(art.artwork_path(output_wav), strip, cover))
+    return result
+
+
+# ================ fan-out (یک دیکود، چند خروجی) ==================
+def _fanout_ffmpeg(input_path, branches, block_size=STREAM_BLOCK):
+    """
+    یک پروسس ffmpeg که ورودی را یک بار دیکود می‌کند و برای هر شاخه یک خروجی
+    (resample/downmix جدا) روی یک pipe جدا می‌ریزد
+    branches: لیست (آرگومان‌های خروجی ffmpeg، sink)؛ sink(chunk) در thread همان شاخه
+    همه pipe ها همزمان خوانده می‌شوند، وگرنه ffmpeg پشت pipe پرشده گیر می‌کند
+    """
+    cmd = ['ffmpeg', '-loglevel', 'error', '-nostdin', '-i', input_path]
+    readers = []
+    writers = []
+    try:
+        for args, _ in branches:
+            r, w = os.pipe()
+            readers.append(r)
+            writers.append(w)
+            cmd += ['-map', '0:a:0', *args, f'pipe:{w}']
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, pass_fds=writers)
+    except BaseException:
+        for fd in readers:
+            os.close(fd)
+        raise
+    finally:
+        # نسخه پدر بسته می‌شود تا با تمام شدن ffmpeg هر pipe به EOF برسد
+        for fd in writers:
+            os.close(fd)
+
+    def drain(fd, sink):
+        buf = bytearray(block_size)
+        view = memoryview(buf)
+        with open(fd, 'rb', buffering=0) as pipe:
+            try:
+                while True:
+                    n = pipe.readinto(buf)
+                    if not n:
+                        break
+                    sink(view[:n])
+            except BaseException:
+                # بقیه شاخه‌ها منتظر ffmpeg نمانند
+                proc.kill()
+                raise
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(branches)) as pool:
+            futures = [pool.submit(drain, fd, sink) for fd, (_, sink) in zip(readers, branches)]
+            for future in futures:
+                future.result()
+    finally:
+        code = proc.wait()
+
+    if code != 0:
+        raise RuntimeError(f"ffmpeg failed with exit code {code}: {input_path}")
+
+
+def _spectrum_sink(analyzer):
+    """sink برای شاخه f32le مونو؛ تکه‌ها ممکن است وسط یک نمونه بریده شوند"""
+    leftover = bytearray()
+
+    def sink(chunk):
+        leftover.extend(chunk)
+        usable = len(leftover) - len(leftover) % 4
+        analyzer.feed(np.frombuffer(bytes(leftover[:usable]), dtype='<f4'))
+        del leftover[:usable]
+
+    return sink
+
+
+def _fanout_stream(input_path, targets, start):
+    """شاخه‌های ffmpeg (موتورهای pydub/stream/parallel): همه خروجی‌ها در یک پروسس"""
+    branches = []
+    outputs = []
+    done = False
+    try:
+        for output_wav, options in targets:
+            rate = options.get('rate', 16000)
+            channels = options.get('channels', 1)
+            sample_width = options.get('sample_width', 2)
+            fmt = PCM_FORMATS[sample_width]
+            wav = open_writer(output_wav, rate, channels, sample_width,
+                              options.get('format', 'pcm'), options.get('align', 0))
+            outputs.append(wav)
+            branches.append((['-f', fmt, '-acodec', 'pcm_' + fmt,
+                              '-ac', str(channels), '-ar', str(rate)], wav.write))
+
+        # طیف هم شاخه همان دیکود است (به جای دیکود جداگانه analyze_file)
+        analyzers = {}
+        for output_wav, options in targets:
+            if options.get('spectrum'):
+                rate = options.get('rate', 16000)
+                analyzers[output_wav] = spec.SpectrumAnalyzer(rate)
+                branches.append((['-f', 'f32le', '-acodec', 'pcm_f32le',
+                                  '-ac', '1', '-ar', str(rate)],
+                                 _spectrum_sink(analyzers[output_wav])))
+
+        _fanout_ffmpeg(input_path, branches)
+        done = True
+    finally:
+        for wav in outputs:
+            wav.close()
+        if not done:
+            _discard(*(output_wav for output_wav, _ in targets[:len(outputs)]))
+
+    results = []
+    for (output_wav, options), wav in zip(targets, outputs):
+        rate = options.get('rate', 16000)
+        sidecars = []
+        if output_wav in analyzers:
+            levels = analyzers[output_wav].finish()
+            sidecars.append(spec.write_sidecar(spec.spectrum_path(output_wav), levels, rate))
+        results.append({
+            'input': input_path,
+            'output': output_wav,
+            'duration': wav.frames / rate,
+            'bytes_in': os.path.getsize(input_path),
+            'bytes_out': os.path.getsize(output_wav),
+            'elapsed': time.perf_counter() - start,
+            'sidecars': sidecars,
+        })
+    return results
+
+
+def convert_fanout(input_path, targets):
+    """
+    یک ورودی، چند خروجی (مثلاً همان آهنگ با 16kHz مونو، 32kHz مونو و 44.1kHz استریو):
+    دیکود MP3 گران‌ترین مرحله است، پس فقط یک بار انجام می‌شود و PCM آن همزمان به
+    شاخه‌های resample/encode هر خروجی می‌رود؛ همه فایل‌ها در یک گذر نوشته می‌شوند
+    targets: لیست (output_wav, options) - options همان آرگومان‌های convert_track
+    موتورهای pydub/stream/parallel همه از resampler خود ffmpeg رد می‌شوند (خروجی مثل stream)؛
+    موتور numpy یک دیکود float مشترک دارد
+    خروجی: لیست نتیجه‌ها به ترتیب targets؛ elapsed هر کدام سهم آن از کل زمان است
+    """
+    start = time.perf_counter()
+
+    groups = {'numpy': [], 'stream': []}
+    artwork = False
+    for output_wav, options in targets:
+        options = dict(options)
+        engine = options.pop('engine', 'pydub')
+        artwork = options.pop('artwork', False) or artwork
+        options = _resolve_options(options.pop('profile', None), options.pop('card_speed', None),
+                                   options.pop('strict', False), options)
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        if engine in INLINE_ANALYSIS:
+            groups['numpy'].append((output_wav, options))
+            continue
+        if options.get('normalize') is not None:
+            raise ValueError(f"Loudness normalisation needs the numpy engine, not {engine}")
+        if options.get('trim'):
+            raise ValueError(f"Silence trimming needs the numpy engine, not {engine}")
+        options.pop('normalize', None)
+        options.pop('trim', None)
+        groups['stream'].append((output_wav, options))
+
+    results = {}
+    for name, fanout in (('numpy', _fanout_numpy), ('stream', _fanout_stream)):
+        if groups[name]:
+            for result in fanout(input_path, groups[name], start):
+                results[result['output']] = result
+
+    # تگ و کاور فقط یک بار خوانده و رسم می‌شوند
+    if artwork:
+        strip, cover = art.render(input_path)
+    ordered = []
+    elapsed = time.perf_counter() - start
+    for output_wav, options in targets:
+        result = results[output_wav]
+        if artwork and options.get('artwork'):
+            result['sidecars'].append(art.write_sidecar(art.artwork_path(output_wav), strip, cover))
+        result['elapsed'] = elapsed / len(targets)
+        result['fanout'] = len(targets)
+        ordered.append(result)
+    return ordered
@@ -0,0 +1,320 @@
+# dsp.py - موتور تبدیل برداری با NumPy
+# به جای زنجیره set_frame_rate / set_channels / set_sample_width در pydub
+# (که هر مرحله یک کپی کامل با audioop می‌سازد) همه کارها روی آرایه float انجام می‌شود:
+#   downmix -> resample (polyphase) -> TPDF dither -> int16
+
+import math
+import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# ================ پریست‌های کیفیت resample ==================
+# taps: طول فیلتر برای هر فاز، beta: پنجره Kaiser، rolloff: کسری از Nyquist که عبور می‌کند
+QUALITY = {
+    'fast': {'taps': 16, 'beta': 5.0, 'rolloff': 0.90},
+    'standard': {'taps': 32, 'beta': 8.0, 'rolloff': 0.94},
+    'best': {'taps': 64, 'beta': 10.0, 'rolloff': 0.97},
+}
+
+
+# ================ دیکود ==================
+# دیکود تکه‌تکه: کل آهنگ هیچ‌وقت به صورت float در RAM نیست (4 دقیقه استریو = 85 MB)،
+# و ffmpeg در پروسس خودش همزمان با پردازش NumPy تکه بعدی را دیکود می‌کند
+BLOCK_FRAMES = 1 << 18   # فریم در هر تکه (~6 ثانیه در 44.1kHz)
+
+
+def read_wav_header(stream):
+    """
+    هدر WAV خروجی ffmpeg روی pipe تا ابتدای داده (حجم data روی pipe معلوم نیست)
+    خروجی: (rate، channels، format_tag، bits)؛ stream روی اولین نمونه است
+    """
+    riff = stream.read(12)
+    if riff[0:4] != b'RIFF' or riff[8:12] != b'WAVE':
+        raise ValueError("Not a WAV stream")
+
+    fmt = None
+    while True:
+        head = stream.read(8)
+        if len(head) < 8:
+            raise ValueError("No data chunk")
+        cid = head[0:4]
+        size = struct.unpack('<I', head[4:8])[0]
+        if cid == b'data':
+            if fmt is None:
+                raise ValueError("data chunk before fmt chunk")
+            format_tag, channels, rate, _, _, bits = fmt
+            return rate, channels, format_tag, bits
+        body = stream.read(size + (size & 1))
+        if cid == b'fmt ':
+            fmt = struct.unpack_from('<HHIIHH', body)
+
+
+class FloatDecoder:
+    """
+    ffmpeg -> تکه‌های float32 با شکل (frames, channels) با rate و کانال‌های اصلی فایل
+        with FloatDecoder("song.mp3") as dec:
+            for block in dec.blocks():
+                ...
+    هر تکه یک آرایه تازه است (مصرف‌کننده می‌تواند نگهش دارد)
+    """
+
+    def __init__(self, input_path, block_frames=BLOCK_FRAMES):
+        self.input_path = input_path
+        self.block_frames = block_frames
+        self.proc = subprocess.Popen(
+            ['ffmpeg', '-loglevel', 'error', '-nostdin', '-i', input_path,
+             '-f', 'wav', '-acodec', 'pcm_f32le', 'pipe:1'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            self.rate, self.channels, _, _ = read_wav_header(self.proc.stdout)
+        except ValueError:
+            self.close()
+            raise RuntimeError(f"ffmpeg failed: {self.error or self.input_path}")
+
+    def _read_block(self):
+        """یک تکه از pipe؛ None در پایان داده"""
+        block = np.empty((self.block_frames, self.channels), dtype='<f4')
+        raw = memoryview(block).cast('B')
+        got = 0
+        while got < len(raw):
+            n = self.proc.stdout.readinto(raw[got:])
+            if not n:
+                break
+            got += n
+        frames = got // (4 * self.channels)
+        return block[:frames] if frames else None
+
+    def blocks(self):
+        # تکه بعدی در یک thread خوانده می‌شود (readinto بیرون از GIL)؛ بدون آن ffmpeg
+        # پشت بافر 64KB پایپ منتظر می‌ماند تا پردازش تکه فعلی تمام شود
+        with ThreadPoolExecutor(max_workers=1) as reader:
+            pending = reader.submit(self._read_block)
+            while True:
+                block = pending.result()
+                if block is None:
+                    break
+                pending = reader.submit(self._read_block)
+                yield block
+        self.close()
+
+    @property
+    def error(self):
+        return self.proc.stderr.read().decode(errors='replace').strip()
+
+    def close(self):
+        """خروجی: کد خروج ffmpeg؛ اگر خطا بود RuntimeError"""
+        if self.proc.returncode is not None:
+            return self.proc.returncode
+        self.proc.stdout.close()
+        message = self.error
+        self.proc.stderr.close()
+        code = self.proc.wait()
+        if code != 0:
+            raise RuntimeError(f"ffmpeg failed: {message}")
+        return code
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.proc.returncode is None:
+            self.proc.kill()
+            self.proc.stdout.close()
+            self.proc.stderr.close()
+            self.proc.wait()
+
+
+def decode_float(input_path):
+    """
+    دیکود کامل فایل به float32 با همان rate و تعداد کانال اصلی (برای تحلیل و تست)
+    خروجی: (آرایه (frames, channels)، rate)
+    """
+    with FloatDecoder(input_path) as dec:
+        blocks = list(dec.blocks())
+        if not blocks:
+            return np.zeros((0, dec.channels), dtype=np.float32), dec.rate
+        return np.concatenate(blocks), dec.rate
+
+
+# ================ تبدیل کانال ==================
+def downmix(x, channels):
+    """(frames, C) -> (frames, channels)؛ مونو = میانگین کانال‌ها"""
+    if x.shape[1] == channels:
+        return x
+    if channels == 1:
+        # جمع ستون‌ها؛ mean روی محور کوچک axis=1 ده برابر کندتر است
+        y = x[:, 0] + x[:, 1] if x.shape[1] > 1 else x[:, 0].copy()
+        for c in range(2, x.shape[1]):
+            y += x[:, c]
+        y *= np.float32(1 / x.shape[1])
+        return y[:, None]
+    if x.shape[1] == 1:
+        return np.repeat(x, channels, axis=1)
+    raise ValueError(f"Cannot convert {x.shape[1]} channels to {channels}")
+
+
+# ================ Resample چندفازی ==================
+def design_filter(up, down, quality='standard'):
+    """
+    فیلتر پایین‌گذر windowed-sinc برای نرخ up*src
+    خروجی: ماتریس (up, taps) - یک ردیف برای هر فاز
+    """
+    preset = QUALITY[quality]
+    taps = preset['taps']
+    length = taps * up
+
+    # فرکانس قطع نسبت به Nyquist نرخ بالا-نمونه‌برداری‌شده
+    cutoff = preset['rolloff'] / max(up, down)
+
+    n = np.arange(length) - (length - 1) / 2
+    h = cutoff * np.sinc(cutoff * n) * np.kaiser(length, preset['beta'])
+    h *= up / h.sum()  # بهره DC برای هر فاز = 1
+
+    # h[p + k*up] -> phases[p, k]
+    return h.reshape(taps, up).T.astype(np.float32)
+
+
+class PolyphaseResampler:
+    """
+    تغییر نرخ نمونه‌برداری با فیلتر polyphase روی تکه‌های پشت سر هم
+    (خروجی بیت به بیت مستقل از اندازه تکه‌ها؛ فقط taps نمونه از تکه قبل نگه داشته می‌شود)
+
+    خروجی n از موقعیت u = n*down + delay در نرخ بالا ساخته می‌شود:
+    پایه = u // up و فاز = u % up؛ خروجی‌هایی که باقی‌مانده n بر up یکسان دارند
+    فاز یکسان دارند و پایه‌شان با گام down جلو می‌رود،
+    پس پنجره‌ها یک view با stride هستند (بدون کپی) و هر گروه یک ضرب ماتریس-بردار است
+    """
+
+    def __init__(self, src_rate, dst_rate, channels, quality='standard'):
+        g = math.gcd(src_rate, dst_rate)
+        self.up, self.down = dst_rate // g, src_rate // g
+        # ضرایب معکوس تا پنجره‌ها رو به جلو خوانده شوند
+        self.phases = design_filter(self.up, self.down, quality)[:, ::-1].copy()
+        self.taps = self.phases.shape[1]
+        # تأخیر گروهی فیلتر متقارن (طول taps*up) در نرخ بالا
+        self.delay = (self.taps * self.up - 1) // 2
+
+        # نمونه‌ها به صورت (channels, frames) تا هر کانال پیوسته باشد؛
+        # taps صفر قبل از شروع آهنگ (buf_start = اندیس مطلق buf[:, 0])
+        self.buf = np.zeros((channels, self.taps), dtype=np.float32)
+        self.buf_start = -self.taps
+        self.frames_in = 0
+        self.next_out = 0
+
+    def _base(self, n):
+        """اندیس مطلق اولین نمونه ورودی پنجره خروجی n"""
+        return (n * self.down + self.delay) // self.up + 1 - self.taps
+
+    def process(self, x, final=False):
+        """x: (frames, channels) -> خروجی‌هایی که کامل شده‌اند (frames, channels)"""
+        up, down, taps = self.up, self.down, self.taps
+        self.buf = np.concatenate([self.buf, x.T], axis=1)
+        self.frames_in += len(x)
+
+        if final:
+            end = -(-self.frames_in * up // down)  # ceil
+            # صفر بعد از پایان آهنگ تا پنجره آخرین خروجی کامل شود
+            missing = self._base(end - 1) + taps - (self.buf_start + self.buf.shape[1])
+            if end > self.next_out and missing > 0:
+                self.buf = np.pad(self.buf, ((0, 0), (0, missing)))
+        else:
+            available = self.buf_start + self.buf.shape[1]
+            end = (available * up - 1 - self.delay) // down + 1
+        start = self.next_out
+        count = max(0, end - start)
+
+        y = np.empty((self.buf.shape[0], count), dtype=np.float32)
+        if count:
+            windows = sliding_window_view(self.buf, taps, axis=1)
+            for r in range(min(up, count)):
+                u = (start + r) * down + self.delay
+                base = u // up + 1 - taps - self.buf_start
+                rows = len(range(r, count, up))
+                y[:, r::up] = windows[:, base:base + (rows - 1) * down + 1:down] @ self.phases[u % up]
+
+            self.next_out = end
+            drop = self._base(end) - self.buf_start
+            if drop > 0:
+                self.buf = self.buf[:, drop:]
+                self.buf_start += drop
+        return y.T
+
+    def flush(self):
+        """خروجی‌های باقی‌مانده بعد از آخرین تکه"""
+        return self.process(np.zeros((0, self.buf.shape[0]), dtype=np.float32), final=True)
+
+
+def resample_poly(x, src_rate, dst_rate, quality='standard'):
+    """
+    تغییر نرخ کل آرایه x: (frames, channels) float32
+    تعداد خروجی = ceil(frames * dst / src)
+    """
+    if src_rate == dst_rate:
+        return x
+    return PolyphaseResampler(src_rate, dst_rate, x.shape[1], quality).process(x, final=True)
+
+
+# ================ حذف سکوت ابتدا و انتها ==================
+# padding دیکودر MP3 و سکوت ابتدا/انتهای آهنگ فقط خواندن SD را هدر می‌دهند
+# و در playlist فاصله می‌اندازند؛ برش دقیق روی اولین/آخرین نمونه بالای آستانه است
+SILENCE_DB = -60.0
+SILENCE_SCAN = 8192      # جستجو از دو طرف در بلوک‌های 8192 فریمی (نه کل آهنگ)
+
+TRIM_CHUNK = b'trim'
+TRIM_STRUCT = struct.Struct('<III')  # فریم‌های باقی‌مانده، حذف از ابتدا، حذف از انتها
+
+
+def _first_loud(x, level):
+    """اندیس اولین فریمی که یکی از کانال‌هایش از level بلندتر است (یا len(x))"""
+    for start in range(0, len(x), SILENCE_SCAN):
+        block = x[start:start + SILENCE_SCAN]
+        hits = np.flatnonzero((np.abs(block) > level).any(axis=1))
+        if len(hits):
+            return start + int(hits[0])
+    return len(x)
+
+
+def silence_bounds(x, threshold_db=SILENCE_DB):
+    """
+    (start, end) بخش غیرساکت به صورت دقیق در سطح نمونه
+    آهنگ کاملاً ساکت -> (0, 0)
+    """
+    level = 10 ** (threshold_db / 20)
+    start = _first_loud(x, level)
+    if start == len(x):
+        return 0, 0
+    end = len(x) - _first_loud(x[::-1], level)
+    return start, end
+
+
+def trim_silence(x, threshold_db=SILENCE_DB):
+    """خروجی: (view بدون سکوت، فریم‌های حذف‌شده از ابتدا، از انتها)"""
+    start, end = silence_bounds(x, threshold_db)
+    return x[start:end], start, len(x) - end
+
+
+# ================ Dither و خروجی 16 بیتی ==================
+def to_int16(x, dither=True, seed=None):
+    """float در بازه [-1, 1] -> int16 با TPDF dither (مجموع دو نویز یکنواخت ±0.5 LSB)"""
+    scaled = x * 32767.0
+    if dither:
+        rng = np.random.default_rng(seed)
+        scaled += rng.random(x.shape, dtype=np.float32)
+        scaled -= rng.random(x.shape, dtype=np.float32)
+    np.clip(np.rint(scaled), -32768, 32767, out=scaled)
+    return scaled.astype('<i2')
+
+
+def process(x, src_rate, rate, channels, quality='standard', dither=True):
+    """
+    کل زنجیره در یک مسیر:
+    اول downmix (کار resample برای مونو نصف می‌شود)، بعد resample، بعد dither
+    خروجی: آرایه int16 با شکل (frames, channels)
+    """
+    x = downmix(x, channels)
+    x = resample_poly(x, src_rate, rate, quality)
+    return to_int16(x, dither)
@@ -20,62 +20,259 @@
 # server.py - روی کامپیوتر اجرا کنید
 # این سرور فایل‌های دایرکتوری جاری را سرو می‌کند
 
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import quote, unquote
+import argparse
 import os
 import socket
+import threading
+import time
+
+from catalog import folder_files, open_catalog, open_reader, scan, walk_files
+from transcode_cache import hash_file
+
+
+# فایل‌هایی که در manifest برای همگام‌سازی با ESP32 می‌آیند
+SYNC_EXTENSIONS = ('.wav', '.spec', '.art', '.pak')
+
+# هر ESP32 حدود 45 KB/s می‌گیرد؛ یک WAV چند مگابایتی یک thread را دقیقه‌ها نگه می‌دارد
+WORKERS = 8             # thread هایی که همزمان جواب می‌دهند
+MAX_CONNECTIONS = 32    # اتصال‌های پذیرفته‌شده (در حال سرویس + منتظر thread)
+CLIENT_TIMEOUT = 30     # ثانیه؛ کلاینتی که این مدت چیزی نخواند/نفرستد قطع می‌شود
+COPY_CHUNK = 64 * 1024  # فقط وقتی sendfile ممکن نیست
+CATALOG_TTL = 10        # ثانیه؛ بعد از این لیست فایل یک اسکن تدریجی پس‌زمینه راه می‌اندازد
+
+# کش هش: نام -> (size, mtime, sha256)؛ فایل فقط وقتی عوض شود دوباره هش می‌شود
+# با pool چند thread همزمان manifest می‌سازند؛ قفل نمی‌گذارد یک فایل دو بار هش شود
+_hashes = {}
+_hash_lock = threading.Lock()
+
+# کاتالوگ SQLite (catalog.py) با --catalog؛ None = listdir و هش در همین پروسس
+_catalog_path = None
+_readers = threading.local()
+_scan_lock = threading.Lock()
+_last_scan = 0.0
+
+
+def catalog_reader():
+    """اتصال فقط‌خواندنی همین thread به کاتالوگ، یا None اگر کاتالوگ نداریم"""
+    if _catalog_path is None:
+        return None
+    conn = getattr(_readers, 'conn', None)
+    if conn is None:
+        conn = _readers.conn = open_reader(_catalog_path)
+    return conn
+
+
+def refresh_catalog(folder='.'):
+    """
+    اسکن تدریجی پوشه در کاتالوگ (فقط فایل‌های جدید/عوض‌شده خوانده و هش می‌شوند)؛
+    اگر اسکن دیگری در جریان است کاری نمی‌کند
+    """
+    global _last_scan
+    if not _scan_lock.acquire(blocking=False):
+        return None
+    try:
+        conn = open_catalog(_catalog_path)
+        try:
+            return scan(conn, folder, 'output', with_hash=True)
+        finally:
+            conn.close()
+            _last_scan = time.monotonic()
+    finally:
+        _scan_lock.release()
+
+
+def refresh_catalog_later(folder='.'):
+    """
+    WAV هایی که بعد از شروع سرور اضافه می‌شوند (batch_convert، watch_convert، segments)
+    با یک اسکن پس‌زمینه حداکثر هر CATALOG_TTL ثانیه وارد کاتالوگ می‌شوند
+    """
+    if time.monotonic() - _last_scan < CATALOG_TTL or _scan_lock.locked():
+        return
+
+    def run():
+        try:
+            refresh_catalog(folder)
+        except Exception as e:
+            print(f"⚠️  Catalog scan failed: {e}")
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def build_manifest(folder='.'):
+    """
+    لیست فایل‌های قابل همگام‌سازی: (نام، حجم، mtime، sha256)
+    با کاتالوگ، هش WAV ها از همان‌جا می‌آید (فقط .spec/.art کوچک اینجا هش می‌شوند)
+    """
+    known = {}
+    conn = catalog_reader()
+    if conn is not None:
+        refresh_catalog_later(folder)
+        known = {row['path']: row for row in folder_files(conn, folder)}
+
+    entries = []
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if not name.lower().endswith(SYNC_EXTENSIONS) or not os.path.isfile(path):
+            continue
+        st = os.stat(path)
+        mtime = int(st.st_mtime)
+        row = known.get(os.path.abspath(path))
+        if row and row['sha256'] and (row['size'], row['mtime_ns']) == (st.st_size, st.st_mtime_ns):
+            digest = row['sha256']
+        else:
+            digest = file_digest(name, path, st.st_size, mtime)
+        entries.append((name, st.st_size, mtime, digest))
+    return entries
+
+
+def file_digest(name, path, size, mtime):
+    """sha256 از کش، یا هش فایل زیر قفل (درخواست دوم منتظر نتیجه اولی می‌ماند)"""
+    with _hash_lock:
+        cached = _hashes.get(name)
+        if cached and cached[:2] == (size, mtime):
+            return cached[2]
+        digest = hash_file(path)
+        _hashes[name] = (size, mtime, digest)
+        return digest
+
+
+def warm_manifest(folder='.'):
+    """
+    هش همه فایل‌ها در thread پس‌زمینه از لحظه شروع سرور؛
+    وگرنه اولین /manifest کل کتابخانه را هش می‌کند و ESP32 قبل از جواب timeout می‌شود
+    """
+    start = time.perf_counter()
+    try:
+        entries = build_manifest(folder)
+    except Exception as e:
+        print(f"⚠️  Manifest warm-up failed: {e}")
+        return
+    print(f"✓ Manifest ready: {len(entries)} files ({time.perf_counter() - start:.1f}s)")
+
 
 class FileServer(BaseHTTPRequestHandler):
     
     def do_GET(self):
         """پاسخ به درخواست GET"""
         
-        # حذف / از ابتدای path
-        file_path = self.path.lstrip('/')
+        # حذف / از ابتدای path (اسم‌های دارای فاصله به صورت %20 می‌آیند)
+        file_path = unquote(self.path.lstrip('/'))
         
         # اگر خالی بود، لیست فایل‌ها را نمایش بده
         if not file_path or file_path == '/':
             self.send_file_list()
             return
         
+        if file_path == 'manifest':
+            self.send_manifest()
+            return
+        
+        # فقط فایل‌های زیر پوشه جاری (مثلاً LastNight.seg/003.wav)، نه ../
+        file_path = os.path.normpath(file_path)
+        if os.path.isabs(file_path) or file_path.startswith('..'):
+            self.send_error(403, "Forbidden")
+            return
+        
         # بررسی وجود فایل
-        if not os.path.exists(file_path):
+        if not os.path.isfile(file_path):
             self.send_error(404, f"File not found: {file_path}")
             return
         
-        # ارسال فایل
+        # ارسال فایل: حجم از os.fstat (بدون خواندن فایل)، بدنه با sendfile
         try:
             with open(file_path, 'rb') as f:
-                content = f.read()
+                size = os.fstat(f.fileno()).st_size
                 
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/octet-stream')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(file_path)}"')
-            self.end_headers()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/octet-stream')
+                self.send_header('Content-Length', str(size))
+                # هدرهای HTTP فقط latin-1 هستند؛ اسم‌های فارسی به صورت UTF-8 کد می‌شوند
+                self.send_header('Content-Disposition', f"attachment; filename*=UTF-8''{quote(os.path.basename(file_path))}")
+                self.end_headers()
+                
+                sent = self.copy_file(f, size)
             
-            # ارسال به صورت chunk برای فایل‌های بزرگ
-            chunk_size = 8192
-            with open(file_path, 'rb') as f:
-                while True:
-                    chunk = f.read(chunk_size)
-                    if not chunk:
-                        break
-                    self.wfile.write(chunk)
+            if sent != size:
+                # فایل وسط ارسال کوتاه شد؛ کلاینت با Content-Length می‌فهمد ناقص است
+                self.close_connection = True
+                print(f"⚠️  {file_path} changed while sending ({sent} of {size} bytes)")
+            else:
+                print(f"✓ File sent: {file_path} ({size} bytes)")
             
-            print(f"✓ File sent: {file_path} ({len(content)} bytes)")
+        except (ConnectionError, TimeoutError) as e:
+            # کلاینت قطع شد یا گیر کرد؛ هدرها رفته‌اند و جواب خطا معنی ندارد
+            self.close_connection = True
+            print(f"⚠️  Client dropped during {file_path}: {e}")
             
         except Exception as e:
             print(f"✗ Error sending file: {e}")
             self.send_error(500, str(e))
     
+    def copy_file(self, f, size):
+        """
+        بدنه پاسخ با حافظه ثابت:
+        روی سوکت socket.sendfile (کپی مستقیم فایل به سوکت داخل kernel با os.sendfile،
+        و اگر نشد send تکه‌تکه)؛ برای wfile غیر سوکت (مثلاً تست) کپی با بافر
+        خروجی: تعداد بایت ارسال‌شده
+        """
+        if isinstance(self.connection, socket.socket):
+            return self.connection.sendfile(f, 0, size)
+        
+        sent = 0
+        while sent < size:
+            chunk = f.read(min(COPY_CHUNK, size - sent))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            sent += len(chunk)
+        return sent
+    
+    def send_manifest(self):
+        """
+        manifest برای همگام‌سازی (MICROPYTHON/download_music.py -> sync_library)
+        هر خط: sha256<TAB>size<TAB>mtime<TAB>name
+        متن ساده است تا ESP32 خط به خط بخواند و کل لیست را در RAM پارس نکند
+        """
+        try:
+            lines = [f"{digest}\t{size}\t{mtime}\t{name}\n"
+                     for name, size, mtime, digest in build_manifest()]
+            body = ''.join(lines).encode('utf-8')
+            
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            
+            print(f"✓ Manifest sent: {len(lines)} files")
+            
+        except Exception as e:
+            self.send_error(500, str(e))
+    
     def send_file_list(self):
-        """نمایش لیست فایل‌های موجود"""
+        """
+        نمایش لیست فایل‌های موجود
+        با کاتالوگ: همه فایل‌های زیرپوشه‌ها از روی دیسک (.spec و .art و .seg هم)،
+        و مدت/فرمت از کاتالوگ برای فایل‌هایی که از آخرین اسکن عوض نشده‌اند
+        """
         try:
             files = []
-            for item in os.listdir('.'):
-                if os.path.isfile(item):
-                    size = os.path.getsize(item)
-                    files.append((item, size))
+            conn = catalog_reader()
+            if conn is not None:
+                refresh_catalog_later()
+                rows = {row['path']: row for row in folder_files(conn, '.')}
+                for path, size, mtime_ns in sorted(walk_files(os.path.abspath('.'), None)):
+                    row = rows.get(path)
+                    current = row and (row['size'], row['mtime_ns']) == (size, mtime_ns)
+                    files.append((os.path.relpath(path), size, self.describe(row) if current else ''))
+            else:
+                for item in os.listdir('.'):
+                    if os.path.isfile(item):
+                        size = os.path.getsize(item)
+                        files.append((item, size, ''))
             
             html = """
             <!DOCTYPE html>
@@ -101,17 +298,19 @@ class FileServer(BaseHTTPRequestHandler):
                     <tr>
                         <th>File Name</th>
                         <th>Size</th>
+                        <th>Info</th>
                         <th>Download</th>
                     </tr>
             """
             
-            for filename, size in files:
+            for filename, size, info in files:
                 size_str = self.format_size(size)
                 html += f"""
                     <tr>
                         <td>{filename}</td>
                         <td class="size">{size_str}</td>
-                        <td><a href="/{filename}">Download</a></td>
+                        <td class="size">{info}</td>
+                        <td><a href="/{quote(filename)}">Download</a></td>
                     </tr>
                 """
             
@@ -129,6 +328,20 @@ class FileServer(BaseHTTPRequestHandler):
         except Exception as e:
             self.send_error(500, str(e))
     
+    def describe(self, row):
+        """ستون Info از ردیف کاتالوگ: مدت، فرمت، تگ‌ها"""
+        parts = []
+        if row['duration']:
+            minutes, seconds = divmod(int(row['duration']), 60)
+            parts.append(f"{minutes}:{seconds:02d}")
+        if row['rate']:
+            parts.append(f"{row['format'] or ''} {row['rate']} Hz "
+                         f"{'mono' if row['channels'] == 1 else 'stereo'}".strip())
+        tags = ' - '.join(t for t in (row['artist'], row['title']) if t)
+        if tags:
+            parts.append(tags)
+        return ' · '.join(parts)
+    
     def format_size(self, size):
         """فرمت حجم فایل"""
         for unit in ['B', 'KB', 'MB', 'GB']:
@@ -142,6 +355,49 @@ class FileServer(BaseHTTPRequestHandler):
         print(f"[{self.address_string()}] {format % args}")
 
 
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTPServer که هر اتصال را به یک pool محدود از thread ها می‌دهد:
+    یک برد کند بقیه برد‌ها و مرورگر را معطل نمی‌کند
+    بیشتر از max_connections اتصال همزمان با 503 رد می‌شود (ESP32 بعداً دوباره می‌پرسد)
+    timeout: هر read/write روی سوکت؛ کلاینت مرده slot را برای همیشه نگه نمی‌دارد
+    """
+
+    def __init__(self, address, handler, workers=WORKERS, max_connections=MAX_CONNECTIONS,
+                 timeout=CLIENT_TIMEOUT):
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http')
+        self.slots = threading.BoundedSemaphore(max_connections)
+        self.client_timeout = timeout
+
+    def process_request(self, request, client_address):
+        # در thread اصلی (accept)؛ کار واقعی در pool
+        if not self.slots.acquire(blocking=False):
+            try:
+                request.sendall(b"HTTP/1.0 503 Service Unavailable\r\n"
+                                b"Retry-After: 5\r\nContent-Length: 0\r\n\r\n")
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            print(f"⚠️  [{client_address[0]}] Too many connections, refused")
+            return
+        request.settimeout(self.client_timeout)
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
 def get_local_ip():
     """پیدا کردن IP لوکال"""
     try:
@@ -154,8 +410,28 @@ def get_local_ip():
         return "127.0.0.1"
 
 
-def main():
-    PORT = 8000
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the current directory to the ESP32 boards")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help=f"requests answered at the same time (default: {WORKERS})")
+    parser.add_argument('--max-connections', type=int, default=MAX_CONNECTIONS,
+                        help=f"connections accepted at once, more get 503 (default: {MAX_CONNECTIONS})")
+    parser.add_argument('--timeout', type=float, default=CLIENT_TIMEOUT,
+                        help=f"seconds before a silent client is dropped (default: {CLIENT_TIMEOUT})")
+    parser.add_argument('--catalog', metavar='DB',
+                        help="SQLite catalog (catalog.py): the current directory is scanned into it "
+                             "at startup; the file list and manifest hashes come from it")
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.max_connections < args.workers:
+        parser.error("need --workers >= 1 and --max-connections >= --workers")
+    return args
+
+
+def main(argv=None):
+    global _catalog_path
+    args = parse_args(argv)
+    PORT = args.port
     
     print("=" * 60)
     print("🚀 File Server Starting...")
@@ -170,6 +446,14 @@ def main():
     if len(files) > 10:
         print(f"  ... and {len(files) - 10} more files")
     
+    # اسکن تدریجی (فقط فایل‌های عوض‌شده) با هش، تا manifest هیچ WAV ی را در درخواست هش نکند
+    if args.catalog:
+        _catalog_path = args.catalog
+        total, scanned, removed, _ = refresh_catalog()
+        print(f"\n📇 {args.catalog}: {total} tracks ({scanned} new or changed, {removed} removed)")
+    
+    threading.Thread(target=warm_manifest, daemon=True).start()
+    
     # نمایش آدرس‌های قابل استفاده
     local_ip = get_local_ip()
     print(f"\n🌐 Server URLs:")
@@ -177,18 +461,23 @@ def main():
     print(f"  Network: http://{local_ip}:{PORT}")
     print(f"\n💡 Use this URL in ESP32 code:")
     print(f"   http://{local_ip}:{PORT}/filename.ext")
+    print(f"   http://{local_ip}:{PORT}/manifest  (for sync_library)")
+    print(f"\n⚡ {args.workers} workers, up to {args.max_connections} connections, "
+          f"{args.timeout:g}s client timeout")
     print("\n" + "=" * 60)
     print("Press Ctrl+C to stop server")
     print("=" * 60 + "\n")
     
     # شروع سرور
-    server = HTTPServer(('0.0.0.0', PORT), FileServer)
+    server = PooledHTTPServer(('0.0.0.0', PORT), FileServer,
+                              args.workers, args.max_connections, args.timeout)
     
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("\n\n⛔ Server stopped by user")
-        server.shutdown()
+    finally:
+        server.server_close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,90 @@
+# g711.py - فرمت 8 بیتی μ-law / A-law (G.711) برای WAV
+# هر نمونه 16bit با منحنی لگاریتمی به یک بایت تبدیل می‌شود؛ SD و WiFi نصف PCM می‌خوانند
+# دیکود روی دستگاه فقط یک جدول 256 خانه‌ای است (بدون وضعیت، بدون بلوک):
+# خیلی ارزان‌تر از ADPCM، با نویز کوانتیزاسیون کمتر از PCM هشت‌بیتی معمولی
+# دیکودر سمت دستگاه: MICROPYTHON/g711_player.py
+#
+# WAV استاندارد: فرمت 7 (μ-law) یا 6 (A-law)، 8 bit، block_align = تعداد کانال
+
+import array
+import audioop  # از پایتون 3.13 حذف شده؛ آنجا پکیج audioop-lts (pyproject.toml) همین ماژول است
+
+from wav_writer import WavWriter, WAVE_FORMAT_ALAW, WAVE_FORMAT_MULAW
+
+
+# نام فرمت -> (format tag، انکودر، دیکودر) از audioop
+LAWS = {
+    'ulaw': (WAVE_FORMAT_MULAW, audioop.lin2ulaw, audioop.ulaw2lin),
+    'alaw': (WAVE_FORMAT_ALAW, audioop.lin2alaw, audioop.alaw2lin),
+}
+
+
+def byte_rate(rate, channels):
+    """بایت در ثانیه روی SD برای این فرمت"""
+    return rate * channels
+
+
+def expand_table(law='ulaw'):
+    """جدول 256 خانه‌ای بایت -> int16 (همان جدولی که دستگاه می‌سازد)"""
+    return array.array('h', LAWS[law][2](bytes(range(256)), 2))
+
+
+def decode(data, law='ulaw'):
+    """دیکود مرجع (برای تست روی PC) -> PCM شانزده‌بیتی"""
+    return LAWS[law][2](data, 2)
+
+
+class CompandWriter:
+    """
+    همان رابط WavWriter، ولی PCM ورودی را به μ-law / A-law تبدیل می‌کند:
+        with MulawWriter("out.wav", 44100, 2) as w:
+            w.write(pcm_bytes)
+    """
+
+    law = 'ulaw'
+
+    def __init__(self, path, rate, channels, sample_width=2, align=0):
+        if sample_width != 2:
+            raise ValueError("G.711 companding needs 16-bit input")
+        tag, self.encode, _ = LAWS[self.law]
+        self.channels = channels
+        self.pending = b''
+        self.wav = WavWriter(path, rate, channels,
+                             format_tag=tag,
+                             bits=8,
+                             block_align=channels,
+                             byte_rate=byte_rate(rate, channels),
+                             align=align)
+
+    @property
+    def frames(self):
+        return self.wav.frames
+
+    def add_chunk(self, cid, payload):
+        self.wav.add_chunk(cid, payload)
+
+    def write(self, pcm):
+        # تکه‌های stream ممکن است وسط یک نمونه بریده شده باشند
+        if self.pending:
+            pcm = self.pending + bytes(pcm)
+        usable = len(pcm) - len(pcm) % 2
+        self.pending = bytes(pcm[usable:])
+        if usable:
+            self.wav.write(self.encode(pcm[:usable], 2))
+
+    def close(self):
+        self.wav.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MulawWriter(CompandWriter):
+    law = 'ulaw'
+
+
+class AlawWriter(CompandWriter):
+    law = 'alaw'
@@ -0,0 +1,142 @@
+# library_index.py - ساخت فایل index کتابخانه (library.idx) برای کارت SD
+# پلیرها در هر boot همه فایل‌ها را stat می‌کنند و هدر هر WAV را باز می‌کنند
+# (زمان شروع با تعداد آهنگ‌ها زیاد می‌شود)؛ با این index فهرست کامل با یک read خوانده می‌شود
+# روی دستگاه: MICROPYTHON/library.py (همین فرمت، به‌روزرسانی تدریجی با os.ilistdir)
+#
+# فرمت library.idx (همه اعداد little-endian):
+#   هدر 12 بایت: b'WLIB', version (u8), 0 (u8), count (u16), 0 (u32)
+#   برای هر فایل: ENTRY (29 بایت) + نام UTF-8 (طول در آخرین فیلد ENTRY)
+#
+# مثال:
+#   python library_index.py /media/sd
+#   python batch_convert.py INPUT_DIR /media/sd --index
+
+import argparse
+import os
+import struct
+import sys
+
+from playlist_pack import read_wav_info
+
+
+INDEX_NAME = 'library.idx'
+INDEX_MAGIC = b'WLIB'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sBBHI')
+
+# حجم فایل، data_offset، data_size، frames، rate، format، channels، bits، block_align،
+# samples_per_block، طول نام
+ENTRY = struct.Struct('<IIIIIHBBHHB')
+
+FIELDS = ('file_size', 'data_offset', 'data_size', 'frames', 'rate', 'format',
+          'channels', 'bits', 'block_align', 'samples_per_block')
+
+
+def read_index(folder):
+    """خواندن library.idx -> دیکشنری name -> رکورد (فایل نبود یا خراب بود: {})"""
+    try:
+        with open(os.path.join(folder, INDEX_NAME), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return {}
+    if len(data) < INDEX_HEADER.size:
+        return {}
+    magic, version, _, count, _ = INDEX_HEADER.unpack_from(data)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION:
+        return {}
+
+    entries = {}
+    pos = INDEX_HEADER.size
+    for _ in range(count):
+        values = ENTRY.unpack_from(data, pos)
+        pos += ENTRY.size
+        name = data[pos:pos + values[-1]].decode('utf-8')
+        pos += values[-1]
+        entries[name] = dict(zip(FIELDS, values))
+    return entries
+
+
+def write_index(folder, entries):
+    """نوشتن index (اول فایل موقت، بعد جایگزینی)"""
+    names = sorted(entries)
+    if len(names) > 0xFFFF:
+        raise ValueError("Too many files for one index")
+
+    parts = [INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, len(names), 0)]
+    for name in names:
+        raw = name.encode('utf-8')
+        if len(raw) > 255:
+            raise ValueError(f"File name too long: {name}")
+        rec = entries[name]
+        parts.append(ENTRY.pack(*(rec[k] for k in FIELDS), len(raw)))
+        parts.append(raw)
+
+    path = os.path.join(folder, INDEX_NAME)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(b''.join(parts))
+    os.replace(path + '.tmp', path)
+
+
+def update_index(folder):
+    """
+    به‌روزرسانی تدریجی: فقط فایل‌های جدید یا با حجم تغییرکرده دوباره خوانده می‌شوند
+    index فقط وقتی چیزی عوض شده باشد نوشته می‌شود
+    خروجی: (رکوردها، تعداد فایل‌های خوانده‌شده، تعداد حذف‌شده)
+    """
+    old = read_index(folder)
+    entries = {}
+    scanned = 0
+    with os.scandir(folder) as it:
+        for item in it:
+            if not item.is_file() or not item.name.lower().endswith('.wav'):
+                continue
+            size = item.stat().st_size
+            rec = old.get(item.name)
+            if rec and rec['file_size'] == size:
+                entries[item.name] = rec
+                continue
+            try:
+                with open(item.path, 'rb') as f:
+                    info = read_wav_info(f)
+            except (OSError, ValueError):
+                continue  # فایل ناقص یا غیر WAV؛ در index نمی‌آید
+            info['file_size'] = size
+            entries[item.name] = {k: info[k] for k in FIELDS}
+            scanned += 1
+
+    removed = len(set(old) - set(entries))
+    if scanned or removed or not os.path.exists(os.path.join(folder, INDEX_NAME)):
+        write_index(folder, entries)
+    return entries, scanned, removed
+
+
+# ================ CLI ==================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build or update the library index (library.idx) read by the ESP32 players.")
+    parser.add_argument('folders', nargs='+', help="folders holding converted WAV files")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="read every file again instead of updating")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    failed = 0
+    for folder in args.folders:
+        try:
+            if args.rebuild and os.path.exists(os.path.join(folder, INDEX_NAME)):
+                os.remove(os.path.join(folder, INDEX_NAME))
+            entries, scanned, removed = update_index(folder)
+        except (OSError, ValueError) as e:
+            print(f"✗ {folder}: {e}")
+            failed += 1
+            continue
+        seconds = sum(r['frames'] / r['rate'] for r in entries.values() if r['rate'])
+        print(f"✓ {os.path.join(folder, INDEX_NAME)}: {len(entries)} tracks "
+              f"({seconds / 60:.0f} min), {scanned} read, {removed} removed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# loudness.py - اندازه‌گیری بلندی صدا (LUFS) و peak روی PC
+# آهنگ‌ها با سطح صدای خیلی متفاوت تبدیل می‌شوند؛ ESP32 وقت ضرب کردن
+# هر نمونه در gain را ندارد، پس gain همین‌جا در حین تبدیل اعمال می‌شود
+#
+# روش: ITU-R BS.1770 (K-weighting + gating)
+# فیلتر K در حوزه فرکانس روی هر بلوک 400ms اعمال می‌شود (Parseval)،
+# پس همه بلوک‌ها با یک FFT دسته‌ای حساب می‌شوند و حلقه نمونه‌به‌نمونه نیست
+#
+# مقادیر اندازه‌گیری‌شده در chunk ـه 'loud' در انتهای WAV ذخیره می‌شوند:
+#   float32 ×4: integrated LUFS، sample peak dBFS، gain اعمال‌شده dB، هدف LUFS
+
+import math
+import struct
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+LOUDNESS_CHUNK = b'loud'
+LOUDNESS_STRUCT = struct.Struct('<ffff')
+
+DEFAULT_TARGET = -16.0   # LUFS - مناسب بلندگوهای کوچک
+PEAK_CEILING = -1.0      # dBFS - gain بیشتر از این peak را بالا نمی‌برد
+
+BLOCK_SECONDS = 0.4
+HOP_SECONDS = 0.1        # هم‌پوشانی 75%
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+
+_BLOCKS_PER_FFT = 256    # تعداد بلوک در هر دسته FFT (محدود کردن حافظه)
+
+
+# ================ فیلتر K ==================
+def _biquad_response(b, a, freqs, rate):
+    """|H(f)|^2 یک biquad در فرکانس‌های داده‌شده"""
+    z = np.exp(-1j * 2 * np.pi * freqs / rate)
+    num = b[0] + b[1] * z + b[2] * z * z
+    den = a[0] + a[1] * z + a[2] * z * z
+    return np.abs(num / den) ** 2
+
+
+def k_weighting(freqs, rate):
+    """
+    پاسخ توان فیلتر K (high-shelf + high-pass) برای هر rate
+    ضرایب از روی پارامترهای آنالوگ استاندارد طراحی می‌شوند
+    """
+    # مرحله 1: high-shelf حدود +4dB بالای 1.5kHz
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf_b = ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0)
+    shelf_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+
+    # مرحله 2: high-pass حدود 38Hz
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / rate)
+    a0 = 1 + k / q + k * k
+    hp_b = (1.0, -2.0, 1.0)
+    hp_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+
+    return (_biquad_response(shelf_b, shelf_a, freqs, rate)
+            * _biquad_response(hp_b, hp_a, freqs, rate))
+
+
+# ================ اندازه‌گیری ==================
+def block_energies(x, rate):
+    """
+    میانگین مربع K-weighted هر بلوک 400ms برای هر کانال
+    x: (frames, channels) float
+    خروجی: (blocks,) مجموع انرژی کانال‌ها
+    """
+    block = int(round(BLOCK_SECONDS * rate))
+    hop = int(round(HOP_SECONDS * rate))
+    if len(x) < block:
+        x = np.concatenate([x, np.zeros((block - len(x), x.shape[1]), dtype=x.dtype)])
+
+    count = 1 + (len(x) - block) // hop
+    weights = k_weighting(np.fft.rfftfreq(block, 1 / rate), rate)
+    # Parseval برای rfft: bin های میانی دو بار شمرده می‌شوند
+    weights[1:(block + 1) // 2] *= 2
+
+    energies = np.zeros(count)
+    for c in range(x.shape[1]):
+        channel = np.ascontiguousarray(x[:, c], dtype=np.float32)
+        stride = channel.strides[0]
+        for first in range(0, count, _BLOCKS_PER_FFT):
+            n = min(_BLOCKS_PER_FFT, count - first)
+            blocks = as_strided(channel[first * hop:], shape=(n, block),
+                                strides=(hop * stride, stride), writeable=False)
+            power = np.abs(np.fft.rfft(blocks, axis=1)) ** 2
+            energies[first:first + n] += power @ weights / (block * block)
+    return energies
+
+
+def integrated_loudness(x, rate):
+    """بلندی یکپارچه (LUFS) با gate مطلق و نسبی"""
+    energies = block_energies(x, rate)
+    loudness = -0.691 + 10 * np.log10(energies + 1e-20)
+
+    gated = energies[loudness > ABSOLUTE_GATE]
+    if not len(gated):
+        return -math.inf
+
+    relative = -0.691 + 10 * math.log10(gated.mean()) + RELATIVE_GATE
+    gated = energies[(loudness > ABSOLUTE_GATE) & (loudness > relative)]
+    return -0.691 + 10 * math.log10(gated.mean())
+
+
+def sample_peak(x):
+    """بیشترین دامنه به dBFS"""
+    peak = float(np.max(np.abs(x))) if x.size else 0.0
+    return 20 * math.log10(peak) if peak > 0 else -math.inf
+
+
+def measure(x, rate):
+    """خروجی: دیکشنری lufs و peak"""
+    return {'lufs': integrated_loudness(x, rate), 'peak': sample_peak(x)}
+
+
+def gain_for(stats, target=DEFAULT_TARGET, ceiling=PEAK_CEILING):
+    """
+    gain لازم (dB) برای رسیدن به target
+    اگر peak از ceiling بالاتر برود، gain کم می‌شود (بدون limiter)
+    """
+    if math.isinf(stats['lufs']):
+        return 0.0  # سکوت کامل
+    gain = target - stats['lufs']
+    return min(gain, ceiling - stats['peak'])
+
+
+def apply_gain(x, gain_db):
+    """ضرب درجا در gain"""
+    if gain_db:
+        x *= np.float32(10 ** (gain_db / 20))
+    return x
+
+
+def pack_chunk(stats, gain_db, target):
+    """محتوای chunk ـه 'loud'"""
+    return LOUDNESS_STRUCT.pack(stats['lufs'], stats['peak'], gain_db, target)
+
+
+def unpack_chunk(payload):
+    lufs, peak, gain_db, target = LOUDNESS_STRUCT.unpack(payload[:LOUDNESS_STRUCT.size])
+    return {'lufs': lufs, 'peak': peak, 'gain': gain_db, 'target': target}
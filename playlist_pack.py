@@ -0,0 +1,229 @@
+# playlist_pack.py - بسته‌بندی یک playlist کامل در یک فایل (.pak)
+# دستگاه به جای os.listdir + os.stat + باز کردن فایل جدا برای هر آهنگ،
+# یک فایل را یک بار باز می‌کند و برای عوض کردن آهنگ فقط seek می‌کند
+# پخش روی دستگاه: MICROPYTHON/pack_player.py
+#
+# فرمت فایل .pak (همه اعداد little-endian):
+#   هدر 16 بایت: b'WPAK', version (u8), 0 (u8), count (u16), align (u32), 0 (u32)
+#   index: برای هر آهنگ یک رکورد 64 بایتی (ENTRY)
+#   سپس داده خام هر آهنگ (بدون هدر WAV)، هر کدام روی مرز align
+#
+# مثال:
+#   python playlist_pack.py /media/sd/music.pak OUTPUT_DIR
+
+import argparse
+import os
+import struct
+import sys
+
+from wav_writer import SECTOR_SIZE
+
+
+PACK_MAGIC = b'WPAK'
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct('<4sBBHII')
+
+# offset، size، frames، rate، format، channels، bits، block_align، samples_per_block، نام
+ENTRY = struct.Struct('<IIIIHBBHH40s')
+
+COPY_BLOCK = 1024 * 1024
+
+# offset و size در index از نوع u32 هستند (FAT32 هم فایل بزرگ‌تر از این ندارد)
+PACK_LIMIT = 0xFFFFFFFF
+
+
+def _align(value, align):
+    return -(-value // align) * align
+
+
+# ================ خواندن WAV ==================
+def read_wav_info(f):
+    """
+    پیمایش chunk ها (PCM، ADPCM، فایل‌های --align و --trim)
+    خروجی: دیکشنری فرمت + data_offset و data_size؛ فایل روی شروع داده است
+    """
+    riff = f.read(12)
+    if riff[0:4] != b'RIFF' or riff[8:12] != b'WAVE':
+        raise ValueError("Not a WAV file")
+
+    info = {'samples_per_block': 0}
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            raise ValueError("No data chunk")
+        cid = head[0:4]
+        size = struct.unpack('<I', head[4:8])[0]
+
+        if cid == b'fmt ':
+            fmt = f.read(size + (size & 1))
+            (info['format'], info['channels'], info['rate'], info['byte_rate'],
+             info['block_align'], info['bits']) = struct.unpack_from('<HHIIHH', fmt)
+            info['fmt_extra'] = fmt[18:size]
+            if size >= 20:
+                info['samples_per_block'] = struct.unpack_from('<H', fmt, 18)[0]
+        elif cid == b'fact':
+            info['frames'] = struct.unpack('<I', f.read(4))[0]
+            f.seek(size - 4 + (size & 1), 1)
+        elif cid == b'data':
+            if 'format' not in info:
+                raise ValueError("data chunk before fmt")
+            info['data_offset'] = f.tell()
+            info['data_size'] = size
+            info.setdefault('frames', size // info['block_align'])
+            return info
+        else:
+            f.seek(size + (size & 1), 1)
+
+
+def _entry_name(path):
+    """نام آهنگ برای نمایش روی OLED (حداکثر 40 بایت UTF-8 کامل)"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name.encode('utf-8')[:40].decode('utf-8', 'ignore').encode('utf-8')
+
+
+def collect_wavs(inputs):
+    """فایل‌های WAV از لیست فایل/پوشه (پوشه‌ها به ترتیب حروف)"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                # پوشه‌های مخفی (.staging) و تکه‌های segments.py جزو playlist نیستند
+                dirs[:] = sorted(d for d in dirs
+                                 if not d.startswith('.') and not d.endswith(('.seg', '.seg.tmp')))
+                paths += [os.path.join(root, name) for name in sorted(files)
+                          if name.lower().endswith('.wav')]
+        else:
+            paths.append(item)
+    return paths
+
+
+# ================ ساخت فایل pack ==================
+def build_pack(output_path, wav_paths, align=SECTOR_SIZE):
+    """
+    ساخت فایل .pak
+    اول کل چیدمان حساب و فایل یک‌جا به اندازه نهایی رزرو می‌شود
+    (روی FAT کپی یک فایل بزرگ پشت سر هم = cluster های پیوسته)
+    خروجی: لیست رکوردهای index (دیکشنری)
+    """
+    if not wav_paths:
+        raise ValueError("No WAV files to pack")
+    if len(wav_paths) > 0xFFFF:
+        raise ValueError("Too many tracks for one pack")
+
+    entries = []
+    for path in wav_paths:
+        with open(path, 'rb') as f:
+            info = read_wav_info(f)
+        info['path'] = path
+        info['name'] = _entry_name(path)
+        entries.append(info)
+
+    offset = _align(PACK_HEADER.size + ENTRY.size * len(entries), align)
+    for info in entries:
+        info['offset'] = offset
+        offset = _align(offset + info['data_size'], align)
+        if offset > PACK_LIMIT:
+            raise ValueError(f"Pack would pass 4 GiB at {info['path']}; "
+                             f"split the playlist into several packs")
+    total = offset
+
+    tmp = output_path + '.tmp'
+    try:
+        _write_pack(tmp, entries, total, align)
+    except BaseException:
+        # نیمه‌کاره (دیسک پر، WAV کوتاه‌شده، Ctrl+C) روی دیسک نماند
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+    os.replace(tmp, output_path)
+    return entries
+
+
+def _write_pack(tmp, entries, total, align):
+    """نوشتن هدر، index و داده‌ها در فایل موقت"""
+    with open(tmp, 'wb') as out:
+        # رزرو فضای کامل قبل از نوشتن (در صورت پشتیبانی سیستم‌عامل)
+        if hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(out.fileno(), 0, total)
+            except OSError:
+                pass
+        out.truncate(total)
+
+        out.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, len(entries), align, 0))
+        for info in entries:
+            out.write(ENTRY.pack(info['offset'], info['data_size'], info['frames'],
+                                 info['rate'], info['format'], info['channels'],
+                                 info['bits'], info['block_align'],
+                                 info['samples_per_block'], info['name']))
+
+        for info in entries:
+            out.seek(info['offset'])
+            with open(info['path'], 'rb') as f:
+                f.seek(info['data_offset'])
+                remaining = info['data_size']
+                while remaining > 0:
+                    chunk = f.read(min(COPY_BLOCK, remaining))
+                    if not chunk:
+                        raise ValueError(f"Truncated WAV: {info['path']}")
+                    out.write(chunk)
+                    remaining -= len(chunk)
+
+
+def read_index(path):
+    """خواندن index یک فایل .pak -> (align، لیست رکوردها)"""
+    with open(path, 'rb') as f:
+        magic, version, _, count, align, _ = PACK_HEADER.unpack(f.read(PACK_HEADER.size))
+        if magic != PACK_MAGIC:
+            raise ValueError("Not a playlist pack")
+        entries = []
+        for _ in range(count):
+            (offset, size, frames, rate, fmt, channels, bits, block_align,
+             spb, name) = ENTRY.unpack(f.read(ENTRY.size))
+            entries.append({
+                'offset': offset, 'data_size': size, 'frames': frames, 'rate': rate,
+                'format': fmt, 'channels': channels, 'bits': bits,
+                'block_align': block_align, 'samples_per_block': spb,
+                'name': name.rstrip(b'\x00').decode('utf-8'),
+            })
+    return align, entries
+
+
+# ================ CLI ==================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pack converted WAV files into one playlist file for the ESP32.")
+    parser.add_argument('output', help="pack file to write (e.g. music.pak)")
+    parser.add_argument('inputs', nargs='+', help="WAV files or folders, in playback order")
+    parser.add_argument('--align', type=int, default=SECTOR_SIZE,
+                        help="start every track on this boundary (default 512)")
+    args = parser.parse_args(argv)
+    if args.align <= 0 or args.align % SECTOR_SIZE:
+        parser.error(f"--align must be a multiple of {SECTOR_SIZE}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = collect_wavs(args.inputs)
+
+    try:
+        entries = build_pack(args.output, paths, args.align)
+    except (OSError, ValueError) as e:
+        print(f"✗ {e}")
+        return 1
+
+    for i, info in enumerate(entries, 1):
+        print(f"✓ [{i}/{len(entries)}] {info['name'].decode('utf-8')} "
+              f"({info['rate']}Hz, {info['channels']}ch, {info['data_size'] / 1024:.0f} KB)")
+
+    size = os.path.getsize(args.output)
+    print(f"\n📦 {args.output}: {len(entries)} tracks, {size / 1024 / 1024:.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
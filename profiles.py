@@ -0,0 +1,100 @@
+# profiles.py - پروفایل‌های خروجی برای دستگاه
+# به جای سه اسکریپت جدا با فرمت‌های hard-code شده (test1/test2/test3)
+# هر فرمت یک اسم دارد و بررسی می‌شود که SD کارت توان خواندنش را دارد یا نه
+
+import warnings
+
+import adpcm
+import g711
+
+
+# ================ پروفایل‌ها ==================
+PROFILES = {
+    # test1.py / test2.py - کیفیت پایه، کمترین بار روی SD
+    'mono16k': {'rate': 16000, 'channels': 1, 'sample_width': 2, 'format': 'pcm'},
+    # test3.py - کیفیت دوبرابر
+    'mono32k': {'rate': 32000, 'channels': 1, 'sample_width': 2, 'format': 'pcm'},
+    # نسخه کامنت‌شده test3.py - کیفیت CD (نیاز به ~172 KB/s)
+    'stereo44k': {'rate': 44100, 'channels': 2, 'sample_width': 2, 'format': 'pcm'},
+    # IMA-ADPCM (4:1) - پخش با MICROPYTHON/adpcm_player.py
+    'mono32k_adpcm': {'rate': 32000, 'channels': 1, 'sample_width': 2, 'format': 'adpcm'},
+    'stereo44k_adpcm': {'rate': 44100, 'channels': 2, 'sample_width': 2, 'format': 'adpcm'},
+    # μ-law هشت‌بیتی (2:1) - دیکود با جدول در MICROPYTHON/g711_player.py، تقریباً بدون هزینه CPU
+    'mono32k_ulaw': {'rate': 32000, 'channels': 1, 'sample_width': 2, 'format': 'ulaw'},
+    'stereo44k_ulaw': {'rate': 44100, 'channels': 2, 'sample_width': 2, 'format': 'ulaw'},
+}
+
+DEFAULT_PROFILE = 'mono16k'
+
+# حاشیه امن: SD نباید بیشتر از 80% سرعت پایدارش درگیر شود
+SAFETY_MARGIN = 0.8
+
+
+class ThroughputWarning(UserWarning):
+    """پروفایل از سرعت اندازه‌گیری‌شده SD سنگین‌تر است"""
+
+
+def get_profile(name):
+    """کپی تنظیمات یک پروفایل (برای پاس دادن به convert_track)"""
+    try:
+        return dict(PROFILES[name])
+    except KeyError:
+        raise ValueError(f"Unknown profile: {name} (available: {', '.join(PROFILES)})")
+
+
+def byte_rate(profile):
+    """تعداد بایت در ثانیه که پخش‌کننده باید از SD بخواند"""
+    if profile.get('format') == 'adpcm':
+        return adpcm.byte_rate(profile['rate'], profile['channels'])
+    if profile.get('format') in g711.LAWS:
+        return g711.byte_rate(profile['rate'], profile['channels'])
+    return profile['rate'] * profile['channels'] * profile['sample_width']
+
+
+def describe(profile):
+    """توضیح کوتاه مثل: 32000Hz mono 16bit (62 KB/s)"""
+    channels = 'mono' if profile['channels'] == 1 else 'stereo'
+    if profile.get('format') == 'adpcm':
+        encoding = 'IMA-ADPCM'
+    elif profile.get('format') == 'ulaw':
+        encoding = '8bit μ-law'
+    elif profile.get('format') == 'alaw':
+        encoding = '8bit A-law'
+    else:
+        encoding = f"{profile['sample_width'] * 8}bit"
+    return (f"{profile['rate']}Hz {channels} {encoding} "
+            f"({byte_rate(profile) / 1024:.0f} KB/s)")
+
+
+# ================ بررسی بودجه سرعت SD / WiFi ==================
+def check_budget(profile, card_speed, strict=False, margin=SAFETY_MARGIN):
+    """
+    مقایسه نرخ بایت پروفایل با سرعت پایدار SD (KB/s)
+    سرعت را از test_speed.py یا diagnose_problem در double_buffer_player.py بگیرید
+
+    strict=True  -> ValueError (فایلی که حتماً لرزش دارد ساخته نشود)
+    strict=False -> فقط هشدار
+    خروجی: True اگر پروفایل در بودجه جا شود
+    """
+    required = byte_rate(profile) / 1024
+    budget = card_speed * margin
+
+    if required <= budget:
+        return True
+
+    message = (f"Profile needs {required:.0f} KB/s but the card sustains "
+               f"{card_speed:.0f} KB/s ({margin:.0%} budget = {budget:.0f} KB/s); "
+               f"playback will stutter")
+    if strict:
+        raise ValueError(message)
+    warnings.warn(message, ThroughputWarning, stacklevel=2)
+    return False
+
+
+def best_profile(card_speed, margin=SAFETY_MARGIN):
+    """سنگین‌ترین پروفایلی که در بودجه SD جا می‌شود"""
+    fitting = [name for name, p in PROFILES.items()
+               if byte_rate(p) / 1024 <= card_speed * margin]
+    if not fitting:
+        return None
+    return max(fitting, key=lambda name: byte_rate(PROFILES[name]))
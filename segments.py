@@ -0,0 +1,161 @@
+# segments.py - تقسیم آهنگ به تکه‌های کوتاه مستقل برای دانلود روی WiFi
+# با 45 KB/s قطع شدن WiFi وسط یک فایل چند مگابایتی یعنی دانلود از اول؛
+# با تکه‌های چند ثانیه‌ای فقط همان تکه دوباره گرفته می‌شود و پخش بعد از تکه اول شروع می‌شود
+# پخش روی دستگاه: MICROPYTHON/segment_player.py
+#
+# LastNight.wav -> LastNight.seg/
+#   index      متن ساده، خط اول: SEG<TAB>version<TAB>rate<TAB>channels<TAB>format<TAB>count<TAB>frames
+#              سپس برای هر تکه: name<TAB>size<TAB>frames<TAB>sha256
+#              (sha256 از نسخه 2؛ دستگاه تکه مانده روی SD را فقط با هش یکسان دوباره استفاده می‌کند،
+#              چون بعد از تبدیل دوباره تکه‌ها معمولاً هم‌حجم تکه‌های قبلی هستند)
+#   000.wav    هر تکه یک WAV کامل با هدر خودش است
+#   001.wav ...
+#
+# تکه‌های ADPCM روی مرز بلوک بریده می‌شوند (هر بلوک predictor خودش را دارد)
+# پس هر تکه بدون تکه قبلی قابل دیکود است
+#
+# مثال:
+#   python segments.py SERVED_DIR --seconds 10
+
+import argparse
+import os
+import shutil
+import sys
+
+from playlist_pack import collect_wavs, read_wav_info
+from transcode_cache import hash_file
+from wav_writer import WavWriter
+
+
+SEGMENT_SECONDS = 10
+SEGMENT_VERSION = 2
+INDEX_NAME = 'index'
+
+
+def segment_dir(wav_path):
+    """LastNight.wav -> LastNight.seg"""
+    return os.path.splitext(wav_path)[0] + '.seg'
+
+
+def split_wav(wav_path, seconds=SEGMENT_SECONDS, out_dir=None, align=0):
+    """
+    تقسیم یک WAV به تکه‌های seconds ثانیه‌ای
+    پوشه اول با نام موقت ساخته و بعد جایگزین می‌شود؛ index آخر از همه نوشته می‌شود
+    خروجی: (پوشه، لیست (name, size, frames, sha256))
+    """
+    out_dir = out_dir or segment_dir(wav_path)
+
+    with open(wav_path, 'rb') as f:
+        info = read_wav_info(f)
+        block_align = info['block_align']
+
+        # اندازه تکه: مضرب block_align (برای PCM یک فریم، برای ADPCM یک بلوک)
+        if info['samples_per_block']:
+            frames_per_unit = info['samples_per_block']
+        else:
+            frames_per_unit = 1
+        units = max(1, round(seconds * info['rate'] / frames_per_unit))
+        segment_bytes = units * block_align
+
+        tmp_dir = out_dir + '.tmp'
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+
+        segments = []
+        remaining = info['data_size'] - info['data_size'] % block_align
+        frames_left = info['frames']
+        while remaining > 0 and frames_left > 0:
+            data = f.read(min(segment_bytes, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            frames = min(len(data) // block_align * frames_per_unit, frames_left)
+            frames_left -= frames
+
+            name = f"{len(segments):03d}.wav"
+            path = os.path.join(tmp_dir, name)
+            with WavWriter(path, info['rate'], info['channels'],
+                           format_tag=info['format'], bits=info['bits'],
+                           block_align=block_align, byte_rate=info['byte_rate'],
+                           fmt_extra=info['fmt_extra'], align=align) as wav:
+                wav.write(data, frames)
+            segments.append((name, os.path.getsize(path), frames, hash_file(path)))
+
+    total = sum(seg[2] for seg in segments)
+    with open(os.path.join(tmp_dir, INDEX_NAME), 'w', encoding='utf-8', newline='\n') as f:
+        f.write(f"SEG\t{SEGMENT_VERSION}\t{info['rate']}\t{info['channels']}\t"
+                f"{info['format']}\t{len(segments)}\t{total}\n")
+        for name, size, frames, digest in segments:
+            f.write(f"{name}\t{size}\t{frames}\t{digest}\n")
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.replace(tmp_dir, out_dir)
+    return out_dir, segments
+
+
+def read_index(seg_dir):
+    """خواندن index -> (دیکشنری هدر، لیست (name, size, frames, sha256))؛ نسخه 1 هش ندارد (None)"""
+    with open(os.path.join(seg_dir, INDEX_NAME), encoding='utf-8') as f:
+        head = f.readline().rstrip('\n').split('\t')
+        if head[0] != 'SEG':
+            raise ValueError("Not a segment index")
+        rate, channels, fmt, count, frames = map(int, head[2:7])
+        segments = []
+        for line in f:
+            name, size, seg_frames, *digest = line.rstrip('\n').split('\t')
+            segments.append((name, int(size), int(seg_frames), digest[0] if digest else None))
+    header = {'version': int(head[1]), 'rate': rate, 'channels': channels,
+              'format': fmt, 'count': count, 'frames': frames}
+    return header, segments
+
+
+def is_current(wav_path):
+    """آیا پوشه تکه‌ها از WAV جدیدتر است"""
+    index = os.path.join(segment_dir(wav_path), INDEX_NAME)
+    return os.path.exists(index) and os.path.getmtime(index) >= os.path.getmtime(wav_path)
+
+
+# ================ CLI ==================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Split converted WAVs into short independently playable segments.")
+    parser.add_argument('inputs', nargs='+', help="WAV files or folders (scanned recursively)")
+    parser.add_argument('--seconds', type=float, default=SEGMENT_SECONDS,
+                        help=f"segment length in seconds (default {SEGMENT_SECONDS})")
+    parser.add_argument('--align', type=int, default=0,
+                        help="start each segment's audio data on this boundary (e.g. 512)")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="split again even if the segments are newer than the WAV")
+    args = parser.parse_args(argv)
+    if args.seconds <= 0:
+        parser.error("--seconds must be positive")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = collect_wavs(args.inputs)
+    if not args.overwrite:
+        paths = [p for p in paths if not is_current(p)]
+
+    if not paths:
+        print("✓ Nothing to split")
+        return 0
+
+    failed = 0
+    for i, path in enumerate(paths, 1):
+        try:
+            out_dir, segments = split_wav(path, args.seconds, align=args.align)
+        except (OSError, ValueError) as e:
+            print(f"✗ [{i}/{len(paths)}] {path}: {e}")
+            failed += 1
+            continue
+        print(f"✓ [{i}/{len(paths)}] {path} -> {out_dir} ({len(segments)} segments)")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
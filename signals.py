@@ -0,0 +1,158 @@
+# signals.py - ساخت سیگنال‌های تست (sine، sweep، چند تن، impulse، نویز) روی PC
+# به جای struct.pack برای هر نمونه (create_tiny.py)، کل سیگنال با NumPy یک‌جا ساخته
+# و با یک write نوشته می‌شود؛ یک ساعت صدا در کسری از ثانیه
+# نسخه دستگاه (بدون NumPy): MICROPYTHON/testsignals.py
+#
+# مثال:
+#   python signals.py TEST_DIR --seconds 600 --rate 44100 --channels 2
+#   python signals.py TEST_DIR --kinds sweep,impulse --format adpcm
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+import dsp
+from converter import WRITERS, open_writer
+
+
+DEFAULT_AMPLITUDE = 0.5   # نسبت به full scale (حدود -6 dBFS)
+BLOCK_SECONDS = 30        # سیگنال‌های خیلی بلند تکه‌تکه ساخته می‌شوند
+
+
+# ================ سیگنال‌ها ==================
+# همه: (frames,) float32 در بازه [-1, 1]؛ start = اندیس اولین نمونه (برای تکه‌ها)
+def sine(frames, rate, freq=440.0, amplitude=DEFAULT_AMPLITUDE, start=0):
+    n = np.arange(start, start + frames, dtype=np.float64)
+    return (amplitude * np.sin(2 * np.pi * freq * n / rate)).astype(np.float32)
+
+
+def multitone(frames, rate, freqs=(100.0, 440.0, 1000.0, 5000.0),
+              amplitude=DEFAULT_AMPLITUDE, start=0):
+    """مجموع چند sine با دامنه برابر (peak = amplitude)"""
+    n = np.arange(start, start + frames, dtype=np.float64)
+    freqs = np.asarray(freqs, dtype=np.float64)[:, None]
+    tones = np.sin(2 * np.pi * freqs * n / rate).sum(axis=0)
+    return (amplitude * tones / len(freqs)).astype(np.float32)
+
+
+def sweep(frames, rate, f0=20.0, f1=None, seconds=None, amplitude=DEFAULT_AMPLITUDE, start=0):
+    """
+    sweep نمایی (log chirp) از f0 تا f1 در طول seconds
+    فاز به صورت بسته حساب می‌شود، پس تکه‌ها بدون پرش به هم می‌چسبند
+    """
+    f1 = f1 or rate * 0.45
+    seconds = seconds or frames / rate
+    t = np.arange(start, start + frames, dtype=np.float64) / rate
+    k = np.log(f1 / f0) / seconds
+    phase = 2 * np.pi * f0 * (np.exp(k * t) - 1) / k
+    return (amplitude * np.sin(phase)).astype(np.float32)
+
+
+def impulse(frames, rate, interval=1.0, amplitude=DEFAULT_AMPLITUDE, start=0):
+    """قطار ضربه: یک نمونه غیرصفر هر interval ثانیه (برای اندازه‌گیری تأخیر)"""
+    x = np.zeros(frames, dtype=np.float32)
+    step = max(1, int(round(interval * rate)))
+    first = -start % step
+    x[first::step] = amplitude
+    return x
+
+
+def noise(frames, rate, amplitude=DEFAULT_AMPLITUDE, color='white', seed=0, start=0):
+    """
+    نویز سفید یا صورتی (صورتی = فیلتر 1/f در حوزه فرکانس)
+    seed + start: هر تکه نویز متفاوت ولی تکرارپذیر دارد
+    """
+    rng = np.random.default_rng((seed, start))
+    x = rng.uniform(-1.0, 1.0, frames)
+    if color == 'pink':
+        spectrum = np.fft.rfft(x)
+        f = np.fft.rfftfreq(frames)
+        f[0] = f[1] if frames > 1 else 1.0
+        x = np.fft.irfft(spectrum / np.sqrt(f), frames)
+        x /= np.max(np.abs(x)) or 1.0
+    return (amplitude * x).astype(np.float32)
+
+
+SIGNALS = {
+    'sine': sine,
+    'multitone': multitone,
+    'sweep': sweep,
+    'impulse': impulse,
+    'noise': noise,
+}
+
+
+def generate(kind, seconds, rate, **params):
+    """کل سیگنال یک‌جا (frames,) float32"""
+    frames = int(round(seconds * rate))
+    if kind == 'sweep':
+        params.setdefault('seconds', seconds)
+    return SIGNALS[kind](frames, rate, **params)
+
+
+# ================ نوشتن WAV ==================
+def write_signal(path, kind, seconds, rate=16000, channels=1, format='pcm',
+                 dither=False, align=0, **params):
+    """
+    ساخت و نوشتن سیگنال تست به صورت تکه‌های BLOCK_SECONDS ثانیه‌ای
+    (حافظه ثابت حتی برای فایل‌های چند ساعته)
+    کانال‌ها یکسان هستند؛ خروجی: تعداد فریم
+    """
+    total = int(round(seconds * rate))
+    block = BLOCK_SECONDS * rate
+    if kind == 'sweep':
+        params.setdefault('seconds', seconds)
+
+    with open_writer(path, rate, channels, 2, format, align) as wav:
+        for start in range(0, total, block):
+            x = SIGNALS[kind](min(block, total - start), rate, start=start, **params)
+            pcm = dsp.to_int16(x[:, None], dither)
+            if channels > 1:
+                pcm = np.repeat(pcm, channels, axis=1)
+            wav.write(pcm.tobytes())
+    return total
+
+
+# ================ CLI ==================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate WAV test signals in bulk.")
+    parser.add_argument('dest', help="output directory")
+    parser.add_argument('--kinds', default=','.join(SIGNALS),
+                        help=f"comma separated signals (default: {','.join(SIGNALS)})")
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--rate', type=int, default=16000)
+    parser.add_argument('--channels', type=int, default=1, choices=(1, 2))
+    parser.add_argument('--format', default='pcm', choices=sorted(WRITERS))
+    parser.add_argument('--amplitude', type=float, default=DEFAULT_AMPLITUDE,
+                        help="peak level, 0..1 of full scale (default 0.5)")
+    parser.add_argument('--freq', type=float, default=440.0, help="sine frequency in Hz")
+    parser.add_argument('--align', type=int, default=0,
+                        help="start the audio data on this boundary (e.g. 512)")
+    args = parser.parse_args(argv)
+    args.kinds = args.kinds.split(',')
+    for kind in args.kinds:
+        if kind not in SIGNALS:
+            parser.error(f"unknown signal: {kind}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.dest, exist_ok=True)
+
+    for kind in args.kinds:
+        params = {'amplitude': args.amplitude}
+        if kind == 'sine':
+            params['freq'] = args.freq
+        name = f"{kind}_{args.rate}_{args.channels}ch_{args.seconds:g}s.wav"
+        path = os.path.join(args.dest, name)
+        write_signal(path, kind, args.seconds, args.rate, args.channels,
+                     args.format, align=args.align, **params)
+        print(f"✓ {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
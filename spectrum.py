@@ -0,0 +1,173 @@
+# spectrum.py - محاسبه طیف فرکانسی روی PC برای ویژوالایزر OLED
+# ESP32 در حین پخش وقت FFT ندارد، پس انرژی هر باند از قبل حساب می‌شود
+# و در یک فایل کوچک کنار WAV ذخیره می‌شود (LastNight.wav -> LastNight.spec)
+#
+# فرمت فایل .spec:
+#   هدر 16 بایت: b'SPEC', version (u8), bands (u8), fps (u16), frames (u32), rate (u32)
+#   سپس برای هر فریم، bands بایت (0..255)
+# دستگاه برای هر فریم فقط bands بایت می‌خواند (MICROPYTHON/test2.py)
+
+import os
+import struct
+import subprocess
+
+import numpy as np
+
+
+SPEC_MAGIC = b'SPEC'
+SPEC_VERSION = 1
+SPEC_HEADER = struct.Struct('<4sBBHII')
+
+BANDS = 18        # همان bars = 18 در draw_screen
+FPS = 20          # فریم‌های ویژوالایزر در ثانیه
+NFFT = 2048
+FLOOR_DB = -60.0  # پایین‌تر از این = میله خالی
+LOW_HZ = 60.0
+
+
+def spectrum_path(wav_path):
+    """مسیر فایل sidecar کنار WAV"""
+    return os.path.splitext(wav_path)[0] + '.spec'
+
+
+def band_edges(rate, bands=BANDS, nfft=NFFT):
+    """مرز باندها به صورت لگاریتمی (اندیس bin های FFT)"""
+    high = min(16000.0, rate / 2)
+    hz = np.geomspace(LOW_HZ, high, bands + 1)
+    bins = np.round(hz * nfft / rate).astype(int)
+    # هر باند حداقل یک bin
+    for i in range(1, len(bins)):
+        bins[i] = max(bins[i], bins[i - 1] + 1)
+    return np.minimum(bins, nfft // 2)
+
+
+class SpectrumAnalyzer:
+    """
+    تحلیل تدریجی: تکه‌های صدای مونو (float) با feed() داده می‌شوند
+    حافظه فقط به اندازه یک پنجره FFT + نتایج (frames × bands) است
+    """
+
+    def __init__(self, rate, bands=BANDS, fps=FPS, nfft=NFFT):
+        self.rate = rate
+        self.bands = bands
+        self.fps = fps
+        self.nfft = nfft
+        self.hop = rate / fps
+        self.edges = band_edges(rate, bands, nfft)
+        self.window = np.hanning(nfft).astype(np.float32)
+
+        # نیم پنجره صفر در ابتدا تا مرکز فریم i روی نمونه i*hop باشد
+        self.buffer = np.zeros(nfft // 2, dtype=np.float32)
+        self.consumed = 0   # تعداد نمونه‌های حذف‌شده از ابتدای buffer
+        self.total = 0      # تعداد کل نمونه‌های ورودی
+        self.levels = []
+
+    def feed(self, mono):
+        """اضافه کردن نمونه‌ها و پردازش فریم‌های کامل"""
+        self.buffer = np.concatenate([self.buffer, np.asarray(mono, dtype=np.float32)])
+        self.total += len(mono)
+        self._process(final=False)
+
+    def _process(self, final):
+        starts = []
+        i = len(self.levels)
+        while True:
+            start = int(round(i * self.hop)) - self.consumed
+            if start + self.nfft > len(self.buffer):
+                break
+            if final and i * self.hop >= self.total:
+                break
+            starts.append(start)
+            i += 1
+
+        if not starts:
+            return
+
+        frames = np.stack([self.buffer[s:s + self.nfft] for s in starts])
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2
+        # میانگین توان هر باند (reduceat روی bin ها)
+        sums = np.add.reduceat(power[:, :self.edges[-1]], self.edges[:-1], axis=1)
+        widths = np.diff(self.edges)
+        self.levels.extend(10 * np.log10(sums / widths + 1e-12))
+
+        # نمونه‌هایی که دیگر در هیچ پنجره‌ای لازم نیستند حذف می‌شوند
+        drop = min(int(i * self.hop) - self.consumed, len(self.buffer))
+        self.buffer = self.buffer[drop:]
+        self.consumed += drop
+
+    def finish(self):
+        """پردازش باقی‌مانده و نرمال‌سازی به 0..255 نسبت به بلندترین نقطه آهنگ"""
+        self.buffer = np.concatenate([self.buffer, np.zeros(self.nfft, dtype=np.float32)])
+        self._process(final=True)
+
+        if not self.levels:
+            return np.zeros((0, self.bands), dtype=np.uint8)
+
+        db = np.array(self.levels, dtype=np.float32)
+        db -= db.max()
+        scaled = (db - FLOOR_DB) / -FLOOR_DB * 255
+        return np.clip(scaled, 0, 255).astype(np.uint8)
+
+
+def analyze(samples, rate, bands=BANDS, fps=FPS):
+    """تحلیل آرایه کامل (frames, channels) - برای موتور numpy"""
+    analyzer = SpectrumAnalyzer(rate, bands, fps)
+    mono = samples.mean(axis=1) if samples.ndim == 2 else samples
+    block = rate * 30
+    for i in range(0, len(mono), block):
+        analyzer.feed(mono[i:i + block])
+    return analyzer.finish()
+
+
+def analyze_file(input_path, rate, bands=BANDS, fps=FPS, block_size=64 * 1024):
+    """
+    تحلیل stream: ffmpeg صدای مونو float را تکه‌تکه می‌دهد
+    برای موتورهای pydub/stream که آرایه کامل ندارند
+    """
+    proc = subprocess.Popen(
+        ['ffmpeg', '-loglevel', 'error', '-nostdin', '-i', input_path,
+         '-f', 'f32le', '-ac', '1', '-ar', str(rate), 'pipe:1'],
+        stdout=subprocess.PIPE)
+
+    analyzer = SpectrumAnalyzer(rate, bands, fps)
+    leftover = b''
+    try:
+        while True:
+            chunk = proc.stdout.read(block_size)
+            if not chunk:
+                break
+            chunk = leftover + chunk
+            usable = len(chunk) - len(chunk) % 4
+            leftover = chunk[usable:]
+            analyzer.feed(np.frombuffer(chunk[:usable], dtype='<f4'))
+    finally:
+        proc.stdout.close()
+        code = proc.wait()
+
+    if code != 0:
+        raise RuntimeError(f"ffmpeg failed with exit code {code}: {input_path}")
+    return analyzer.finish()
+
+
+def write_sidecar(path, levels, rate, fps=FPS):
+    """
+    نوشتن فایل .spec
+    اول در فایل موقت و بعد replace؛ فایل قبلی ممکن است hardlink به کش باشد
+    """
+    frames, bands = levels.shape
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(SPEC_HEADER.pack(SPEC_MAGIC, SPEC_VERSION, bands, fps, frames, rate))
+        f.write(np.ascontiguousarray(levels, dtype=np.uint8).tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+def read_sidecar(path):
+    """خواندن فایل .spec -> (levels، fps، rate)"""
+    with open(path, 'rb') as f:
+        magic, version, bands, fps, frames, rate = SPEC_HEADER.unpack(f.read(SPEC_HEADER.size))
+        if magic != SPEC_MAGIC:
+            raise ValueError("Not a spectrum sidecar")
+        data = np.frombuffer(f.read(frames * bands), dtype=np.uint8)
+    return data.reshape(frames, bands), fps, rate
@@ -1,19 +1,15 @@
-from pydub import AudioSegment
+from converter import convert_track
 
-def convert_mp3_for_esp32(input_mp3, output_wav):
-    # MP3 را بخوان
-    audio = AudioSegment.from_mp3(input_mp3)
-
-    # تنظیمات دقیق سازگار با ESP32
-    audio = audio.set_frame_rate(16000)   # نرخ نمونه‌برداری
-    audio = audio.set_channels(1)         # مونو
-    audio = audio.set_sample_width(2)     # 16-bit (2 bytes per sample)
-
-    # خروجی WAV استاندارد PCM
-    audio.export(output_wav, format="wav")
+def convert_mp3_for_esp32(input_mp3, output_wav, profile="mono16k"):
+    # تنظیمات سازگار با ESP32 در profiles.py تعریف شده‌اند:
+    # mono16k  -> 16kHz مونو 16bit
+    # mono32k  -> 32kHz مونو 16bit
+    # stereo44k -> 44.1kHz استریو 16bit
+    result = convert_track(input_mp3, output_wav, profile=profile)
 
     print("Done!")
     print("Saved:", output_wav)
+    return result
 
 # مثال:
 # convert_mp3_for_esp32(
@@ -21,4 +17,4 @@ def convert_mp3_for_esp32(input_mp3, output_wav):
 #     "output.wav")
 convert_mp3_for_esp32(
     "Last Night.mp3", 
-    "LastNight.wav")
\ No newline at end of file
+    "LastNight.wav")
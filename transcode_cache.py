@@ -0,0 +1,233 @@
+# transcode_cache.py - کش تبدیل بر اساس محتوای فایل
+# کلید کش = هش بایت‌های فایل منبع + تنظیمات خروجی (rate/channels/width)
+# اگر فایل قبلاً با همین تنظیمات تبدیل شده باشد، فقط hardlink یا کپی می‌شود
+
+import hashlib
+import json
+import os
+import shutil
+import struct
+import time
+
+from playlist_pack import read_wav_info
+
+
+HASH_CHUNK = 1024 * 1024  # خواندن 1MB در هر مرحله
+
+
+def hash_file(path):
+    """هش SHA-256 محتوای فایل (بدون لود کامل در RAM)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(source_hash, options):
+    """ترکیب هش منبع با تنظیمات خروجی"""
+    profile = json.dumps(options, sort_keys=True)
+    digest = hashlib.sha256(profile.encode('utf-8'))
+    digest.update(source_hash.encode('ascii'))
+    return digest.hexdigest()
+
+
+def link_or_copy(src, dst):
+    """hardlink اگر ممکن بود (هم‌پارتیشن)، در غیر این صورت کپی"""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def wav_duration(path):
+    """
+    مدت فایل WAV از روی هدر
+    ماژول wave فقط PCM می‌خواند؛ read_wav_info فرمت‌های ADPCM و μ-law/A-law (chunk ـه fact)
+    و chunk های JUNK/trim را هم می‌شناسد
+    """
+    try:
+        with open(path, 'rb') as f:
+            info = read_wav_info(f)
+        return info['frames'] / info['rate']
+    except (OSError, ValueError, struct.error, ZeroDivisionError):
+        return 0.0
+
+
+class TranscodeCache:
+    """
+    کش با حجم محدود و حذف LRU
+    زمان آخرین استفاده در mtime فایل WAV ذخیره می‌شود، پس فایل index لازم نیست
+    فایل‌های کناری (مثل .spec) با همان کلید ذخیره و همراه WAV حذف می‌شوند
+    """
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_path(self, key, ext='.wav'):
+        return os.path.join(self.cache_dir, key[:2], key + ext)
+
+    def _sidecar_exts(self, key):
+        """پسوند فایل‌های کناری ذخیره‌شده برای این کلید"""
+        folder = os.path.dirname(self.entry_path(key))
+        try:
+            names = os.listdir(folder)
+        except FileNotFoundError:
+            return []
+        return [name[len(key):] for name in names
+                if name.startswith(key + '.') and not name.endswith(('.wav', '.tmp'))]
+
+    def fetch(self, key, output_path):
+        """
+        اگر در کش بود، به مقصد لینک کن
+        خروجی: لیست مسیر فایل‌های کناری، یا None اگر در کش نبود
+        """
+        entry = self.entry_path(key)
+        try:
+            os.utime(entry)  # علامت‌گذاری به عنوان اخیراً استفاده‌شده
+        except FileNotFoundError:
+            return None
+        link_or_copy(entry, output_path)
+
+        sidecars = []
+        base = os.path.splitext(output_path)[0]
+        for ext in self._sidecar_exts(key):
+            link_or_copy(self.entry_path(key, ext), base + ext)
+            sidecars.append(base + ext)
+        return sidecars
+
+    def store(self, key, output_path, sidecars=()):
+        """اضافه کردن خروجی تبدیل به کش (اتمیک)؛ WAV آخر از همه تا hit ناقص نباشد"""
+        os.makedirs(os.path.dirname(self.entry_path(key)), exist_ok=True)
+
+        for path in list(sidecars) + [output_path]:
+            ext = os.path.splitext(path)[1]
+            entry = self.entry_path(key, ext)
+            tmp = f"{entry}.{os.getpid()}.tmp"
+            link_or_copy(path, tmp)
+            os.replace(tmp, entry)
+
+        os.utime(self.entry_path(key))
+        self.evict()
+
+    def entries(self):
+        """لیست (mtime، حجم کل، لیست فایل‌ها) برای هر کلید"""
+        groups = {}
+        for root, dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue  # پروسس دیگری حذفش کرده
+                key = name.split('.', 1)[0]
+                mtime, size, paths = groups.get(key, (0, 0, []))
+                if name.endswith('.wav'):
+                    mtime = st.st_mtime
+                groups[key] = (mtime, size + st.st_size, paths + [path])
+        return list(groups.values())
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """حذف قدیمی‌ترین کلیدها تا حجم کش زیر سقف برود"""
+        items = self.entries()
+        total = sum(size for _, size, _ in items)
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        for _, size, paths in sorted(items):
+            if total <= self.max_bytes:
+                break
+            # اول WAV حذف شود تا کلید نیمه‌کاره hit نشود
+            for path in sorted(paths, key=lambda p: not p.endswith('.wav')):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+        return removed
+
+    def convert(self, convert_fn, input_path, output_path, **options):
+        """
+        تبدیل با کش:
+        hit  -> فقط لینک/کپی
+        miss -> تبدیل واقعی و ذخیره در کش
+        """
+        start = time.perf_counter()
+        key = cache_key(hash_file(input_path), options)
+
+        result = self._fetch_result(key, input_path, output_path, start)
+        if result is not None:
+            return result
+
+        self._clear_outputs(key, output_path)
+        result = convert_fn(input_path, output_path, **options)
+        self.store(key, output_path, result.get('sidecars', ()))
+        result['elapsed'] = time.perf_counter() - start
+        result['cached'] = False
+        return result
+
+    def convert_many(self, convert_fn, input_path, targets):
+        """
+        مثل convert برای چند خروجی از یک منبع (fan-out):
+        منبع یک بار هش می‌شود و فقط خروجی‌های miss با یک صدا زدن
+        convert_fn(input_path, [(output_path, options), ...]) ساخته می‌شوند
+        """
+        start = time.perf_counter()
+        source_hash = hash_file(input_path)
+
+        results = {}
+        misses = []
+        for output_path, options in targets:
+            key = cache_key(source_hash, options)
+            result = self._fetch_result(key, input_path, output_path, start)
+            if result is not None:
+                results[output_path] = result
+                continue
+            self._clear_outputs(key, output_path)
+            misses.append((output_path, options, key))
+
+        if misses:
+            converted = convert_fn(input_path, [(path, options) for path, options, _ in misses])
+            for (output_path, _, key), result in zip(misses, converted):
+                self.store(key, output_path, result.get('sidecars', ()))
+                result['cached'] = False
+                results[output_path] = result
+
+        return [results[output_path] for output_path, _ in targets]
+
+    def _fetch_result(self, key, input_path, output_path, start):
+        """نتیجه hit با همان شکل خروجی تبدیل، یا None"""
+        sidecars = self.fetch(key, output_path)
+        if sidecars is None:
+            return None
+        return {
+            'input': input_path,
+            'output': output_path,
+            'duration': wav_duration(output_path),
+            'bytes_in': os.path.getsize(input_path),
+            'bytes_out': os.path.getsize(output_path),
+            'elapsed': time.perf_counter() - start,
+            'sidecars': sidecars,
+            'cached': True,
+        }
+
+    def _clear_outputs(self, key, output_path):
+        """خروجی قبلی ممکن است hardlink به کش باشد؛ نباید روی آن نوشت"""
+        base = os.path.splitext(output_path)[0]
+        for path in [output_path] + [base + ext for ext in self._sidecar_exts(key)]:
+            if os.path.exists(path):
+                os.remove(path)
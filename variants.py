@@ -0,0 +1,93 @@
+# variants.py - چند نسخه با کیفیت‌های مختلف از هر آهنگ، انتخاب خودکار روی دستگاه
+# بعضی کارت‌ها 200+ KB/s می‌دهند و بعضی حتی 172 KB/s (استریو 44.1kHz) را هم ندارند؛
+# به جای مسیر hard-code در main() هر پلیر، همه نسخه‌ها ساخته می‌شوند و
+# ESP32 خودش سرعت SD و حافظه آزاد را اندازه می‌گیرد و بهترین نسخه را انتخاب می‌کند
+# (MICROPYTHON/variants.py، نتیجه برای هر کارت ذخیره می‌شود)
+#
+# ساختار خروجی:
+#   OUTPUT/variants.txt          لیست نسخه‌ها، از بهترین کیفیت به پایین
+#   OUTPUT/stereo44k/Song.wav
+#   OUTPUT/mono32k_adpcm/Song.wav ...
+#
+# variants.txt (متن ساده):
+#   VAR<TAB>version
+#   name<TAB>byte_rate<TAB>rate<TAB>channels<TAB>format<TAB>heap    (برای هر نسخه)
+#
+# مثال:
+#   python batch_convert.py MUSIC_DIR /media/sd/music --variants stereo44k,stereo44k_adpcm,mono16k
+
+import os
+
+import adpcm
+from profiles import PROFILES, byte_rate, get_profile
+
+
+VARIANTS_NAME = 'variants.txt'
+VARIANTS_VERSION = 1
+
+# بافرهای پلیر روی دستگاه (pack_player.play_entry): I2S ibuf + بافر خواندن
+DEVICE_IBUF = 20480
+DEVICE_CHUNK = 8192
+
+
+# در نرخ نمونه برابر: PCM بهتر از μ-law/A-law، و آن‌ها بهتر از ADPCM
+FORMAT_RANK = {'pcm': 2, 'ulaw': 1, 'alaw': 1, 'adpcm': 0}
+
+
+def quality(profile):
+    """
+    ترتیب کیفیت: نمونه در ثانیه بعد از دیکود، و در حالت برابر ترتیب FORMAT_RANK
+    (نرخ بایت SD معیار کیفیت نیست: ADPCM استریو سبک‌تر از PCM مونو است)
+    """
+    return (profile['rate'] * profile['channels'], FORMAT_RANK[profile.get('format', 'pcm')])
+
+
+def heap_needed(profile):
+    """حافظه تقریبی که پلیر برای این نسخه از heap می‌گیرد (بایت)"""
+    heap = DEVICE_IBUF + DEVICE_CHUNK
+    if profile.get('format') == 'adpcm':
+        heap += adpcm.samples_per_block(profile['channels']) * profile['channels'] * 2
+    return heap
+
+
+def parse_variants(text):
+    """'stereo44k,mono16k' -> لیست نام پروفایل‌ها به ترتیب کیفیت (بهترین اول)"""
+    names = []
+    for name in text.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        get_profile(name)  # ValueError برای نام ناشناخته
+        if name not in names:
+            names.append(name)
+    if not names:
+        raise ValueError("No variants given")
+    return sorted(names, key=lambda n: quality(PROFILES[n]), reverse=True)
+
+
+def write_manifest(dest_dir, names):
+    """نوشتن variants.txt (اول فایل موقت، بعد جایگزینی)"""
+    os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, VARIANTS_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8', newline='\n') as f:
+        f.write(f"VAR\t{VARIANTS_VERSION}\n")
+        for name in names:
+            p = PROFILES[name]
+            f.write(f"{name}\t{byte_rate(p)}\t{p['rate']}\t{p['channels']}\t"
+                    f"{p.get('format', 'pcm')}\t{heap_needed(p)}\n")
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def read_manifest(dest_dir):
+    """خواندن variants.txt -> لیست دیکشنری‌ها (بهترین اول)"""
+    with open(os.path.join(dest_dir, VARIANTS_NAME), encoding='utf-8') as f:
+        head = f.readline().rstrip('\n').split('\t')
+        if head[0] != 'VAR':
+            raise ValueError("Not a variants manifest")
+        variants = []
+        for line in f:
+            name, rate_bytes, rate, channels, fmt, heap = line.rstrip('\n').split('\t')
+            variants.append({'name': name, 'byte_rate': int(rate_bytes), 'rate': int(rate),
+                             'channels': int(channels), 'format': fmt, 'heap': int(heap)})
+    return variants
@@ -0,0 +1,363 @@
+# watch_convert.py - تبدیل خودکار آهنگ‌های جدید در پس‌زمینه
+# یک پوشه ورودی را زیر نظر می‌گیرد (inotify روی لینوکس، در غیر این صورت polling)
+# و هر MP3 تازه را بعد از تمام شدن کپی، روی Pool تبدیل می‌کند
+# خروجی اول در پوشه .staging ساخته و بعد با os.replace منتشر می‌شود،
+# پس flask_server.py هیچ‌وقت WAV نیمه‌کاره نمی‌فرستد
+#
+# استفاده:
+#   python watch_convert.py INBOX_DIR SERVED_DIR --profile mono32k --engine numpy
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import struct
+import sys
+import time
+from concurrent.futures import wait
+
+from batch_convert import (AUDIO_EXTENSIONS, _convert_job, _make_executor,
+                           add_conversion_args, check_conversion_args,
+                           conversion_options, find_tracks, format_result)
+from profiles import check_budget, describe, get_profile
+
+
+STAGING_DIR = '.staging'
+SETTLE_SECONDS = 2.0   # فایل باید این مدت بدون تغییر بماند تا تبدیل شود
+POLL_SECONDS = 1.0     # فاصله اسکن در حالت polling
+
+# ================ inotify (ctypes) ==================
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """
+    رویدادهای یک درخت پوشه با inotify (بدون وابستگی اضافه)
+    poll() لیست (مسیر، نوع) برمی‌گرداند: 'changed'، 'deleted'، 'dir'، 'rescan'
+    """
+
+    def __init__(self, root):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        self.add_tree(root)
+
+    def add_tree(self, root):
+        for path, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            wd = self._add(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd >= 0:
+                self.dirs[wd] = path
+
+    def poll(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        pos = 0
+        while pos + EVENT.size <= len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, pos)
+            name = data[pos + EVENT.size:pos + EVENT.size + length].rstrip(b'\0')
+            pos += EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                events.append((None, 'rescan'))
+                continue
+            folder = self.dirs.get(wd)
+            if folder is None or not name:
+                continue
+            path = os.path.join(folder, os.fsdecode(name))
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                    events.append((path, 'dir'))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append((path, 'deleted'))
+            else:
+                events.append((path, 'changed'))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollWatcher:
+    """جایگزین بدون inotify: مقایسه (size, mtime) همه فایل‌ها هر POLL_SECONDS"""
+
+    def __init__(self, root):
+        self.root = root
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        state = {}
+        for path, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                full = os.path.join(path, name)
+                try:
+                    st = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                state[full] = (st.st_size, st.st_mtime_ns)
+        return state
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, POLL_SECONDS))
+        current = self._scan()
+        events = [(path, 'changed') for path, st in current.items()
+                  if self.snapshot.get(path) != st]
+        events += [(path, 'deleted') for path in self.snapshot if path not in current]
+        self.snapshot = current
+        return events
+
+    def close(self):
+        pass
+
+
+def make_watcher(root):
+    try:
+        return InotifyWatcher(root)
+    except (OSError, AttributeError):
+        print("⚠️  inotify not available, polling every second")
+        return PollWatcher(root)
+
+
+# ================ انتشار اتمیک ==================
+def staging_path(dest_dir, dst):
+    return os.path.join(dest_dir, STAGING_DIR, os.path.relpath(dst, dest_dir))
+
+
+def publish(result, dst):
+    """
+    انتقال خروجی از .staging به پوشه سرو‌شده
+    os.replace روی یک پارتیشن اتمیک است؛ فایل‌های کناری اول، WAV آخر
+    """
+    os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+    base = os.path.splitext(dst)[0]
+    for sidecar in result.get('sidecars') or ():
+        os.replace(sidecar, base + os.path.splitext(sidecar)[1])
+    os.replace(result['output'], dst)
+    result['output'] = dst
+
+
+def unpublish(dst):
+    """حذف خروجی و فایل‌های کناری (وقتی منبع حذف شده)"""
+    base = os.path.splitext(dst)[0]
+    folder = os.path.dirname(dst) or '.'
+    try:
+        names = os.listdir(folder)
+    except FileNotFoundError:
+        return
+    prefix = os.path.basename(base) + '.'
+    for name in names:
+        if name.startswith(prefix) and '.' not in name[len(prefix):]:
+            os.remove(os.path.join(folder, name))
+            print(f"🗑️  Removed: {os.path.join(folder, name)}")
+
+
+# ================ دیمن ==================
+class WatchDaemon:
+    """
+    صف تبدیل با debounce:
+    هر رویداد زمان آماده شدن فایل را SETTLE_SECONDS عقب می‌اندازد؛
+    وقتی زمان رسید و (size, mtime) عوض نشده بود، کار به Pool می‌رود
+    """
+
+    def __init__(self, source, dest, options, workers, settle=SETTLE_SECONDS,
+                 cache_dir=None, cache_bytes=0, delete=False):
+        self.source = source
+        self.dest = dest
+        self.options = options
+        self.workers = workers
+        self.settle = settle
+        self.cache_dir = cache_dir
+        self.cache_bytes = cache_bytes
+        self.delete = delete
+
+        self.pending = {}    # src -> (deadline, stat)
+        self.running = {}    # future -> (src, dst)
+        self.dirty = set()   # منبع در حین تبدیل دوباره تغییر کرده
+        self.done = 0
+        self.stopping = False
+
+    def dest_for(self, src):
+        rel = os.path.relpath(src, self.source)
+        return os.path.join(self.dest, os.path.splitext(rel)[0] + '.wav')
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def touch(self, src):
+        if not src.lower().endswith(AUDIO_EXTENSIONS) or os.path.basename(src).startswith('.'):
+            return
+        self.pending[src] = (time.monotonic() + self.settle, self._stat(src))
+
+    def scan(self, folder=None):
+        """منابعی که خروجی ندارند یا از خروجی جدیدترند"""
+        for src, _ in find_tracks(folder or self.source, self.dest):
+            dst = self.dest_for(src)
+            if not os.path.exists(dst) or os.path.getmtime(src) > os.path.getmtime(dst):
+                self.touch(src)
+
+    def handle(self, path, kind):
+        if kind == 'rescan':
+            self.scan()
+        elif kind == 'dir':
+            self.scan(path)
+        elif kind == 'deleted':
+            self.pending.pop(path, None)
+            if self.delete and path.lower().endswith(AUDIO_EXTENSIONS):
+                unpublish(self.dest_for(path))
+        else:
+            self.touch(path)
+
+    def submit_ready(self, pool):
+        now = time.monotonic()
+        in_flight = {src for src, _ in self.running.values()}
+        for src, (deadline, stat) in list(self.pending.items()):
+            if deadline > now or len(self.running) >= self.workers * 2:
+                continue
+            current = self._stat(src)
+            if current is None:
+                del self.pending[src]
+                continue
+            if current != stat:
+                # هنوز در حال کپی است
+                self.pending[src] = (now + self.settle, current)
+                continue
+            if src in in_flight:
+                self.dirty.add(src)
+                del self.pending[src]
+                continue
+
+            del self.pending[src]
+            dst = self.dest_for(src)
+            staged = staging_path(self.dest, dst)
+            future = pool.submit(_convert_job, src, staged, self.options,
+                                 self.cache_dir, self.cache_bytes)
+            self.running[future] = (src, dst)
+            in_flight.add(src)
+
+    def collect(self, finished):
+        for future in finished:
+            src, dst = self.running.pop(future)
+            result = future.result()
+            if 'error' not in result:
+                try:
+                    publish(result, dst)
+                except OSError as e:
+                    result['error'] = f"publish failed: {e}"
+            self.done += 1
+            total = self.done + len(self.running) + len(self.pending)
+            print(format_result(self.done, total, result, self.source))
+            if src in self.dirty:
+                self.dirty.discard(src)
+                self.touch(src)
+
+    def next_timeout(self):
+        if not self.pending:
+            return 1.0
+        wait_for = min(deadline for deadline, _ in self.pending.values()) - time.monotonic()
+        return max(0.05, min(1.0, wait_for))
+
+    def run(self):
+        os.makedirs(self.dest, exist_ok=True)
+        watcher = make_watcher(self.source)
+        self.scan()
+
+        with _make_executor(self.workers, detach=True) as pool:
+            try:
+                while not self.stopping:
+                    for path, kind in watcher.poll(self.next_timeout()):
+                        self.handle(path, kind)
+                    self.submit_ready(pool)
+                    if self.running:
+                        finished, _ = wait(list(self.running), timeout=0)
+                        self.collect(finished)
+            finally:
+                watcher.close()
+                # کارهای در حال اجرا تمام و منتشر می‌شوند
+                if self.running:
+                    print(f"\n⏳ Finishing {len(self.running)} running conversions...")
+                    finished, _ = wait(list(self.running))
+                    self.collect(finished)
+
+    def stop(self, *_):
+        self.stopping = True
+
+
+# ================ CLI ==================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Watch a folder and convert new tracks for the ESP32 in the background")
+    parser.add_argument('source', help="inbox directory to watch (recursively)")
+    parser.add_argument('dest', help="served directory where finished WAVs appear")
+    add_conversion_args(parser)
+    parser.add_argument('--settle', type=float, default=SETTLE_SECONDS,
+                        help="seconds a file must stay unchanged before converting (default 2)")
+    parser.add_argument('--delete', action='store_true',
+                        help="remove the published WAV when its source is deleted")
+    args = parser.parse_args(argv)
+    check_conversion_args(parser, args)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    profile = get_profile(args.profile)
+    if args.card_speed:
+        try:
+            check_budget(profile, args.card_speed, strict=args.strict)
+        except ValueError as e:
+            print(f"⛔ {e}")
+            return 2
+
+    daemon = WatchDaemon(args.source, args.dest, conversion_options(args),
+                         max(1, args.workers), args.settle,
+                         args.cache_dir, args.cache_size * 1024 * 1024, args.delete)
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+
+    print("=" * 60)
+    print(f"👀 Watching {args.source} -> {args.dest}")
+    print(f"   {args.profile}: {describe(profile)}, {daemon.workers} workers")
+    print("   Press Ctrl+C to stop")
+    print("=" * 60 + "\n")
+
+    daemon.run()
+    print("\n⛔ Watcher stopped")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
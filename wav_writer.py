@@ -0,0 +1,118 @@
+# wav_writer.py - نوشتن تدریجی فایل WAV
+# هدر اول با حجم صفر نوشته می‌شود و در close() اندازه‌ها اصلاح می‌شوند
+# پس لازم نیست کل صدا در RAM باشد
+
+import struct
+
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IMA_ADPCM = 0x11
+WAVE_FORMAT_ALAW = 6
+WAVE_FORMAT_MULAW = 7
+
+SECTOR_SIZE = 512  # کوچک‌ترین align معقول برای SD
+
+
+class WavWriter:
+    """
+    نوشتن WAV به صورت stream:
+        with WavWriter("out.wav", 16000, 1) as w:
+            w.write(pcm_bytes)
+
+    برای فرمت‌های فشرده (مثل ADPCM) فیلدهای fmt را صریح بدهید؛
+    در این حالت chunk ـه fact (تعداد فریم‌ها) هم نوشته می‌شود
+
+    align: اگر داده شود (مثلاً 512 یا اندازه cluster) یک chunk ـه JUNK بعد از fmt
+    اضافه می‌شود تا داده دقیقاً روی این مرز شروع شود و خواندن‌های دستگاه
+    با سکتورهای SD هم‌راستا باشند
+    """
+
+    def __init__(self, path, rate, channels, sample_width=2,
+                 format_tag=WAVE_FORMAT_PCM, bits=None, block_align=None,
+                 byte_rate=None, fmt_extra=b'', align=0):
+        self.path = path
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.format_tag = format_tag
+        self.bits = bits or sample_width * 8
+        self.block_align = block_align or channels * sample_width
+        self.byte_rate = byte_rate or rate * self.block_align
+        self.fmt_extra = fmt_extra
+        self.align = align
+        self.data_bytes = 0
+        self.frames = 0
+        self.trailer = []
+
+        self.f = open(path, 'wb')
+        self.f.write(self._header(0))
+        self.data_start = self.f.tell()
+
+    def _header(self, data_bytes):
+        """RIFF + fmt (+ fact) + شروع chunk داده"""
+        fmt = struct.pack('<HHIIHH',
+                          self.format_tag,
+                          self.channels,
+                          self.rate,
+                          self.byte_rate,
+                          self.block_align,
+                          self.bits)
+        if self.format_tag != WAVE_FORMAT_PCM:
+            fmt += struct.pack('<H', len(self.fmt_extra)) + self.fmt_extra
+
+        body = b'WAVE'
+        body += b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+        if self.format_tag != WAVE_FORMAT_PCM:
+            body += b'fact' + struct.pack('<II', 4, self.frames)
+        if self.align:
+            # JUNK بعد از fmt است تا فیلدهای fmt برای پخش‌کننده‌های 44 بایتی جابه‌جا نشوند
+            used = 8 + len(body) + 8 + 8  # RIFF + body + هدر JUNK + هدر data
+            body += b'JUNK' + struct.pack('<I', -used % self.align) + bytes(-used % self.align)
+        body += b'data' + struct.pack('<I', data_bytes)
+
+        riff_size = len(body) + data_bytes + (data_bytes & 1) + len(self._trailer_bytes())
+        return b'RIFF' + struct.pack('<I', riff_size) + body
+
+    def _trailer_bytes(self):
+        out = b''
+        for cid, payload in self.trailer:
+            out += cid + struct.pack('<I', len(payload)) + payload
+            if len(payload) & 1:
+                out += b'\x00'
+        return out
+
+    def write(self, data, frames=None):
+        """
+        نوشتن داده خام
+        frames: تعداد فریم صوتی این داده (برای PCM خودکار حساب می‌شود)
+        """
+        self.f.write(data)
+        self.data_bytes += len(data)
+        if frames is None:
+            frames = len(data) // self.block_align
+        self.frames += frames
+
+    def add_chunk(self, cid, payload):
+        """
+        chunk اضافه (مثل 'loud') که بعد از داده نوشته می‌شود
+        پخش‌کننده‌هایی که فقط 44 بایت هدر رد می‌کنند، ابتدای صدا را درست می‌خوانند
+        """
+        self.trailer.append((cid, bytes(payload)))
+
+    def close(self):
+        """اصلاح اندازه‌ها در هدر و بستن فایل"""
+        if self.f is None:
+            return
+        if self.data_bytes & 1:
+            self.f.write(b'\x00')  # chunk ها باید زوج باشند
+        self.f.write(self._trailer_bytes())
+        self.f.seek(0)
+        self.f.write(self._header(self.data_bytes))
+        self.f.close()
+        self.f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()